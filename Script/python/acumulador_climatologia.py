@@ -0,0 +1,227 @@
+import json
+import numpy as np
+import pandas as pd
+from .climatologia import CLASES_CALENDARIO, codigos_calendario, indice_clases, componentes_vector
+from .estadistica_circular import conteo_direccion, frecuencia_relativa, sumas_circulares, resumen_circular
+from .conteo_rosa import BINS_VELOCIDAD, histograma_rosa, escala_velocidad, nombres_direcciones
+
+HORA = np.timedelta64(1, 'h')
+
+class AcumuladorClimatologia:
+    """
+    Descripción: Estadísticos suficientes de las climatologías que se actualizan con datos horarios nuevos sin releer
+                 el historial: conteos, sumas y sumas de cuadrados por clase, sumas de componentes u y v, conteos por
+                 sector de dirección y conteos de la rosa de los vientos por clase.
+
+                 Las fechas que ya fueron agregadas para una variable no se vuelven a contar (se mantiene el primer dato),
+                 por lo que agregar periodos que se traslapan entrega lo mismo que agregar el historial completo una vez.
+                 Los conteos, frecuencias y rosas son exactos; los promedios coinciden con climatologia() en el tipo de
+                 los datos (float32), la suma interna en float64 puede diferir en el último bit según el orden de carga.
+
+    variables        (list):    Variables para conteo, promedio y desviación estándar por clase.
+    por             (tuple):    Clases de calendario, por defecto ("MES", "HORA").
+    vectores         (dict):    Vectores a promediar por componentes, {nombre: (magnitud, dirección)}.
+    direcciones      (list):    Variables de dirección para frecuencias por sector y estadísticos circulares.
+    rosas            (dict):    Rosas de los vientos, {nombre: (velocidad, dirección)}.
+    nsectores         (int):    Número de sectores de las frecuencias de dirección.
+    nrosa             (int):    Número de sectores de las rosas.
+    bins_vel   (np.ndarray):    Límites de las clases de velocidad de las rosas.
+
+    Ejemplo:
+        acumulador = AcumuladorClimatologia(["M-TEMP", "M-VEL"], vectores={"viento": ("M-VEL", "M-DIR")},
+                                            direcciones=["M-DIR"], rosas={"viento": ("M-VEL", "M-DIR")})
+        acumulador.actualizar(df_historial)
+        acumulador.actualizar(df_nuevo)
+        acumulador.climatologia()
+        acumulador.guardar("clima_id244.npz")
+    """
+    def __init__(self, variables=(), por=("MES", "HORA"), vectores=None, direcciones=(), rosas=None,
+                 nsectores=24, nrosa=16, bins_vel=BINS_VELOCIDAD):
+        self.variables   = list(variables)
+        self.por         = tuple(por)
+        self.vectores    = dict(vectores or {})
+        self.direcciones = list(direcciones)
+        self.rosas       = dict(rosas or {})
+        self.nsectores   = int(nsectores)
+        self.nrosa       = int(nrosa)
+        self.bins_vel    = np.asarray(bins_vel, dtype=np.float64)
+        self.nclases     = int(np.prod([CLASES_CALENDARIO[clase][0] for clase in self.por]))
+
+        # Series con promedio: las variables y las componentes de cada vector.
+        self.series = self.variables + [nombre+s for nombre in self.vectores for s in ("_u", "_v")]
+        self.tipos  = {}
+        self.conteo = np.zeros((self.nclases, len(self.series)), dtype=np.int64)
+        self.suma   = np.zeros((self.nclases, len(self.series)))
+        self.suma2  = np.zeros((self.nclases, len(self.series)))
+        self.sectores = np.zeros((len(self.direcciones), self.nsectores, self.nclases), dtype=np.int64)
+        self.circular = {clave: np.zeros((len(self.direcciones), self.nclases), dtype=np.int64 if clave == "conteo" else np.float64)
+                         for clave in ("conteo", "suma_w", "seno", "coseno")}
+        self.conteo_rosa = np.zeros((len(self.rosas), self.nclases, len(self.bins_vel) + 1, self.nrosa), dtype=np.int64)
+
+        # Horas ya agregadas de cada grupo de estadísticos, desde la hora "origen".
+        self.origen = None
+        self.vistos = {clave: np.zeros(0, dtype=bool) for clave in self._claves()}
+
+    def _claves(self):
+        return [("variable", v) for v in self.variables] + [("vector", v) for v in self.vectores] + \
+               [("direccion", v) for v in self.direcciones] + [("rosa", v) for v in self.rosas]
+
+    def _desfases(self, fechas):
+        # Desfase en horas de cada fecha respecto al origen, ampliando los registros de horas vistas si es necesario.
+        fechas = np.asarray(pd.DatetimeIndex(fechas).values)
+        inicio = fechas.min().astype('datetime64[h]')
+        if self.origen is None:
+            self.origen = inicio
+        if inicio < self.origen:
+            extra = int((self.origen - inicio)//HORA)
+            self.vistos = {clave: np.concatenate([np.zeros(extra, dtype=bool), visto]) for clave, visto in self.vistos.items()}
+            self.origen = inicio
+        delta = fechas - self.origen
+        if (delta % HORA != np.timedelta64(0)).any():
+            raise ValueError("Las fechas deben estar en horas exactas.")
+        desfase = (delta//HORA).astype(np.intp)
+        largo = int(desfase.max()) + 1
+        for clave, visto in self.vistos.items():
+            if len(visto) < largo:
+                self.vistos[clave] = np.concatenate([visto, np.zeros(largo - len(visto), dtype=bool)])
+        return desfase
+
+    def _nuevos(self, clave, desfase, valido):
+        # Filas válidas cuya hora no fue agregada antes, dentro del lote se mantiene la primera de cada hora.
+        visto = self.vistos[clave]
+        nuevo = valido & ~visto[desfase]
+        _, primera = np.unique(np.where(nuevo, desfase, -1), return_index=True)
+        unico = np.zeros(len(desfase), dtype=bool)
+        unico[primera] = True
+        nuevo &= unico
+        visto[desfase[nuevo]] = True
+        return nuevo
+
+    def actualizar(self, df):
+        """
+        Descripción: Agrega datos horarios nuevos. Las horas ya agregadas y los NaN no se consideran.
+
+        df          (Dataframe):    Datos nuevos con índice de fechas horarias.
+        """
+        if len(df) == 0:
+            return self
+        desfase = self._desfases(df.index)
+        codigos, _ = codigos_calendario(df.index, self.por)
+        columnas = {}
+        for v in self.variables:
+            if v in df.columns:
+                columnas[v] = (("variable", v), df[v])
+        for nombre, (magnitud, direccion) in self.vectores.items():
+            if magnitud in df.columns and direccion in df.columns:
+                u, w = componentes_vector(df[magnitud], df[direccion])
+                columnas[nombre+"_u"] = (("vector", nombre), u)
+                columnas[nombre+"_v"] = (("vector", nombre), w)
+
+        # Conteo, suma y suma de cuadrados de cada serie.
+        nuevos = {}
+        for serie, (clave, valores) in columnas.items():
+            x = valores.to_numpy()
+            self.tipos.setdefault(serie, str(x.dtype) if x.dtype.kind == 'f' else "float64")
+            if clave not in nuevos:
+                nuevos[clave] = self._nuevos(clave, desfase, ~np.isnan(x))
+            fila = nuevos[clave]
+            k = self.series.index(serie)
+            self.conteo[:, k] += np.bincount(codigos[fila], minlength=self.nclases)
+            self.suma[:, k]   += np.bincount(codigos[fila], weights=x[fila], minlength=self.nclases)
+            self.suma2[:, k]  += np.bincount(codigos[fila], weights=x[fila].astype(np.float64)**2, minlength=self.nclases)
+
+        # Frecuencias por sector y sumas circulares de las direcciones.
+        for i, v in enumerate(self.direcciones):
+            if v not in df.columns:
+                continue
+            d = df[v].to_numpy(dtype=np.float64)
+            fila = self._nuevos(("direccion", v), desfase, ~np.isnan(d))
+            self.sectores[i] += conteo_direccion(d[fila], codigos[fila], self.nclases, self.nsectores)
+            for clave, valor in sumas_circulares(d[fila], codigos[fila], self.nclases).items():
+                self.circular[clave][i] += valor
+
+        # Rosas de los vientos por clase.
+        for i, (nombre, (velocidad, direccion)) in enumerate(self.rosas.items()):
+            if velocidad not in df.columns or direccion not in df.columns:
+                continue
+            vel, d = df[velocidad].to_numpy(dtype=np.float64), df[direccion].to_numpy(dtype=np.float64)
+            fila = self._nuevos(("rosa", nombre), desfase, ~np.isnan(vel) & ~np.isnan(d))
+            self.conteo_rosa[i] += histograma_rosa(vel[fila], d[fila], self.nrosa, self.bins_vel, codigos[fila], self.nclases)
+        return self
+
+    def climatologia(self):
+        """
+        Descripción: Tabla por clase con conteo, promedio y desviación estándar de cada serie, con columnas
+                     (estadístico, serie) como climatologia(). Los promedios se entregan en el tipo de los datos.
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            promedio = np.column_stack([
+                self.suma[:, k].astype(self.tipos.get(s, "float64"))/self.conteo[:, k].astype(self.tipos.get(s, "float64"))
+                for k, s in enumerate(self.series)]) if len(self.series) > 0 else self.suma
+            varianza = (self.suma2 - self.suma**2/self.conteo)/(self.conteo - 1)
+            desviacion = np.sqrt(np.maximum(varianza, 0))
+        indice = indice_clases(self.por)
+        tablas = {"conteo": self.conteo, "promedio": promedio, "desviacion": desviacion}
+        return pd.concat({clave: pd.DataFrame(t, index=indice, columns=self.series) for clave, t in tablas.items()}, axis=1)
+
+    def frecuencia_direccion(self, variable):
+        """
+        Descripción: Frecuencia relativa (%) por sector (filas) y clase (columnas) de una variable de dirección.
+        """
+        i = self.direcciones.index(variable)
+        sectores = np.arange(self.nsectores)*360/self.nsectores
+        sectores = pd.Index(sectores.astype(np.int64) if (sectores % 1 == 0).all() else sectores, name="nombre_viento")
+        return pd.DataFrame(frecuencia_relativa(self.sectores[i]), index=sectores, columns=indice_clases(self.por))
+
+    def estadisticos_circulares(self, variable):
+        """
+        Descripción: Dirección media, R y desviación circular por clase de una variable de dirección.
+        """
+        i = self.direcciones.index(variable)
+        return pd.DataFrame(resumen_circular(**{clave: valor[i] for clave, valor in self.circular.items()}),
+                            index=indice_clases(self.por))
+
+    def rosa(self, nombre, clases=None):
+        """
+        Descripción: Conteos de la rosa de los vientos (clase de velocidad x sector), de todas las clases o de las indicadas.
+
+        nombre            (str):    Nombre de la rosa.
+        clases           (list):    Códigos de clase a sumar (ej. las horas de un bloque horario), por defecto todas.
+        """
+        conteo = self.conteo_rosa[list(self.rosas).index(nombre)]
+        conteo = conteo.sum(axis=0) if clases is None else conteo[list(clases)].sum(axis=0)
+        return pd.DataFrame(
+            conteo,
+            index   = pd.Index(escala_velocidad(self.bins_vel), name="clase_velocidad"),
+            columns = pd.Index(nombres_direcciones(self.nrosa)[:-1], name="clase_direccion"))
+
+    def guardar(self, path):
+        """
+        Descripción: Guarda el acumulador en un archivo .npz.
+        """
+        meta = {
+            "variables": self.variables, "por": list(self.por), "vectores": self.vectores, "direcciones": self.direcciones,
+            "rosas": self.rosas, "nsectores": self.nsectores, "nrosa": self.nrosa, "tipos": self.tipos,
+            "origen": None if self.origen is None else str(self.origen)}
+        arreglos = {"bins_vel": self.bins_vel, "conteo": self.conteo, "suma": self.suma, "suma2": self.suma2,
+                    "sectores": self.sectores, "conteo_rosa": self.conteo_rosa}
+        arreglos.update({"circular_"+clave: valor for clave, valor in self.circular.items()})
+        arreglos.update({"visto_"+str(n): self.vistos[clave] for n, clave in enumerate(self._claves())})
+        np.savez_compressed(path, meta=np.array(json.dumps(meta)), **arreglos)
+
+    @classmethod
+    def cargar(cls, path):
+        """
+        Descripción: Lee un acumulador guardado con guardar().
+        """
+        with np.load(path) as archivo:
+            meta  = json.loads(str(archivo["meta"]))
+            nuevo = cls(meta["variables"], meta["por"], {k: tuple(v) for k, v in meta["vectores"].items()}, meta["direcciones"],
+                        {k: tuple(v) for k, v in meta["rosas"].items()}, meta["nsectores"], meta["nrosa"], archivo["bins_vel"])
+            nuevo.tipos  = meta["tipos"]
+            nuevo.origen = None if meta["origen"] is None else np.datetime64(meta["origen"], 'h')
+            for nombre in ("conteo", "suma", "suma2", "sectores", "conteo_rosa"):
+                setattr(nuevo, nombre, archivo[nombre].copy())
+            nuevo.circular = {clave: archivo["circular_"+clave].copy() for clave in nuevo.circular}
+            nuevo.vistos   = {clave: archivo["visto_"+str(n)].copy() for n, clave in enumerate(nuevo._claves())}
+        return nuevo
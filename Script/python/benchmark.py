@@ -0,0 +1,485 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+from glob import glob
+from contextlib import contextmanager
+import matplotlib
+import numpy as np
+import pandas as pd
+import matplotlib.dates as mdates
+from .lectura_archivos import lectura_csv, lectura_todoscsv, COLUMNA_FECHA, COLUMNA_HORA, COLUMNAS_REGISTROS
+from .estaciones import lectura_estaciones
+from .renderizador import Renderizador
+from .exportacion import ExportadorTablas
+from .series_de_tiempo import series_de_tiempo
+from .ciclo_diario import ciclo_diario
+from .ciclo_diario_direccion import ciclo_diario_direccion
+from .ciclo_estacional import ciclo_estacional
+from .ciclo_estacional_viento import ciclo_estacional_viento
+from .conteo_rosa import clasificando_viento
+from .rosa_viento import rosa_vientos
+
+# Cambiar la versión cuando cambian las etapas o los datos generados, los resultados de otra versión no se comparan.
+VERSION_BENCHMARK = 3
+
+# Modelo de cada variable sintética: nivel, amplitud estacional y diaria (fracción del nivel en las concentraciones,
+# que son log-normales), hora del máximo diario, ruido, límites y decimales. Los valores son del orden de los del SINCA.
+VARIABLES_SINTETICAS = {
+    "C-MP10": {"nivel": 45,   "estacional": 0.35, "diaria": 0.30, "hora_maximo": 21, "ruido": 0.45, "limites": (0, 800),   "decimales": 0},
+    "C-MP25": {"nivel": 16,   "estacional": 0.50, "diaria": 0.35, "hora_maximo": 22, "ruido": 0.50, "limites": (0, 400),   "decimales": 0},
+    "C-O3"  : {"nivel": 12,   "estacional": -0.30, "diaria": 0.80, "hora_maximo": 16, "ruido": 0.40, "limites": (0, 120),  "decimales": 1},
+    "C-CO"  : {"nivel": 0.35, "estacional": 0.40, "diaria": 0.40, "hora_maximo": 21, "ruido": 0.45, "limites": (0, 10),    "decimales": 3},
+    "C-SO2" : {"nivel": 1.5,  "estacional": 0.10, "diaria": 0.30, "hora_maximo": 13, "ruido": 0.60, "limites": (0, 60),    "decimales": 2},
+    "M-TEMP": {"nivel": 14,   "estacional": -6.0, "diaria": 7.0,  "hora_maximo": 16, "ruido": 1.5,  "limites": (-8, 40),   "decimales": 4},
+    "M-HR"  : {"nivel": 68,   "estacional": 10.0, "diaria": -18,  "hora_maximo": 16, "ruido": 6.0,  "limites": (5, 100),   "decimales": 4},
+    "M-PRE" : {"nivel": 977,  "estacional": 2.0,  "diaria": 1.0,  "hora_maximo": 10, "ruido": 2.0,  "limites": (950, 1000),"decimales": 3},
+    "M-RAD" : {"nivel": 0,    "estacional": 0.0,  "diaria": 0.0,  "hora_maximo": 13, "ruido": 0.15, "limites": (0, 1200),  "decimales": 4},
+    "M-VEL" : {"nivel": 1.5,  "estacional": 0.0,  "diaria": 0.6,  "hora_maximo": 16, "ruido": 0.0,  "limites": (0, 15),    "decimales": 4},
+    "M-DIR" : {"nivel": 225,  "estacional": 0.0,  "diaria": 0.0,  "hora_maximo": 16, "ruido": 0.0,  "limites": (0, 360),   "decimales": 3},
+    }
+
+# Parámetros de los gráficos de cada etapa, como en el manifiesto del reporte.
+PARAMETROS_ETAPAS = {
+    "series_de_tiempo"       : {"variable": "M-TEMP", "xlabel": "Tiempo [años]", "ylabel": "Temperatura ambiente (°C)",
+                                "ylim": {"bottom": -5, "top": 40}},
+    "ciclo_diario"           : {"variable": "M-TEMP", "xlabel": "Hora Local [horas]", "ylabel": "Temperatura ambiente (°C)",
+                                "ylim": {"bottom": -5, "top": 40}},
+    "ciclo_diario_direccion" : {"variable": "M-DIR", "vmin": 0, "vmax": 30},
+    "ciclo_estacional"       : {"variable": "M-TEMP", "vmin": 0, "vmax": 30, "step": 1.0, "clabel": "Temperatura ambiente",
+                                "unidad": "(°C)"},
+    "ciclo_estacional_viento": {"velocidad": "M-VEL", "direccion": "M-DIR", "vmin": 0, "vmax": 3, "step": 0.05},
+    "clasificando_viento"    : {"nrosa": 16, "var_vientos": "M-VEL", "var_direccion": "M-DIR"},
+    "rosa_vientos"           : {"var_vientos": "M-VEL", "var_direccion": "M-DIR", "nrosa": 16},
+    }
+
+# Módulos del núcleo numérico (lectura, agregación, rosa, estadística circular), deben importar solo NumPy y pandas.
+MODULOS_NUCLEO = (
+    "lectura_archivos", "lectores", "cache_archivos", "eje_tiempo", "estaciones", "completitud", "climatologia",
+    "acumulador_climatologia", "estadistica_circular", "histograma_cuantiles", "conteo_rosa", "normativa", "interpolacion",
+    "decimacion", "dependencia", "exportacion", "instrumentacion")
+
+# Bibliotecas de gráficos, Excel y GIS que el núcleo solo puede cargar al usarlas.
+BIBLIOTECAS_PESADAS = ("matplotlib", "scipy", "openpyxl", "geopandas", "pyproj", "plotly", "seaborn", "ppscore")
+
+GRAFICOS_ETAPAS = {
+    "series_de_tiempo"       : series_de_tiempo,
+    "ciclo_diario"           : ciclo_diario,
+    "ciclo_diario_direccion" : ciclo_diario_direccion,
+    "ciclo_estacional"       : ciclo_estacional,
+    "ciclo_estacional_viento": ciclo_estacional_viento,
+    "rosa_vientos"           : rosa_vientos,
+    }
+
+def _ruido_correlacionado(rng, n, coeficiente=0.9):
+    # Ruido AR(1) de varianza unitaria, para que los valores cambien de forma continua de una hora a otra.
+    from scipy.signal import lfilter
+    return lfilter([np.sqrt(1 - coeficiente**2)], [1, -coeficiente], rng.standard_normal(n))
+
+def valores_sinteticos(variable, fechas, rng, modelo=None):
+    """
+    Descripción: Serie horaria sintética de una variable con ciclo estacional (hemisferio sur), ciclo diario y ruido
+                 correlacionado. La radiación es cero de noche, la velocidad sigue una distribución de Weibull y la dirección
+                 tiene un viento dominante.
+
+    variable          (str):    Nombre de la variable (ej. "M-TEMP"), ver VARIABLES_SINTETICAS.
+    fechas  (DatetimeIndex):    Fechas horarias.
+    rng   (np.random.Generator):  Generador de números aleatorios.
+    modelo           (dict):    Modelo de la variable, por defecto el de VARIABLES_SINTETICAS.
+    """
+    m     = VARIABLES_SINTETICAS[variable] if modelo is None else modelo
+    n     = len(fechas)
+    anio  = 2*np.pi*(fechas.dayofyear.to_numpy() - 15)/365.25
+    hora  = fechas.hour.to_numpy() + fechas.minute.to_numpy()/60
+    diaria = np.cos(2*np.pi*(hora - m["hora_maximo"])/24)
+    if variable == "M-RAD":
+        # Altura del sol aproximada, más alta en verano (enero), con máximos de unos 1000 W/m2.
+        sol   = np.clip(np.cos(2*np.pi*(hora - 13)/24) - 0.35*np.cos(anio) + 0.05, 0, None)
+        valor = 750*sol*np.clip(1 - m["ruido"]*np.abs(_ruido_correlacionado(rng, n, 0.95)), 0, 1)
+    elif variable == "M-VEL":
+        escala = m["nivel"]*(1 + m["diaria"]*diaria)
+        valor  = escala*rng.weibull(1.8, n)
+    elif variable == "M-DIR":
+        # Mezcla de un viento dominante (de la tarde) y direcciones al azar.
+        dominante = rng.random(n) < 0.55 + 0.25*diaria
+        valor = np.where(dominante, rng.vonmises(np.deg2rad(m["nivel"]), 4.0, n), rng.uniform(-np.pi, np.pi, n))
+        valor = np.rad2deg(valor) % 360
+    elif variable.startswith("C-"):
+        valor = m["nivel"]*np.exp(m["estacional"]*np.cos(anio) + m["diaria"]*diaria + m["ruido"]*_ruido_correlacionado(rng, n))
+    else:
+        valor = m["nivel"] + m["estacional"]*np.cos(anio) + m["diaria"]*diaria + m["ruido"]*_ruido_correlacionado(rng, n)
+    return np.round(np.clip(valor, *m["limites"]), m["decimales"])
+
+def huecos_sinteticos(n, rng, fraccion=0.02, cortes_por_anio=0.6, horas_por_anio=8766):
+    """
+    Descripción: Máscara de datos faltantes: horas sueltas al azar (fracción) y cortes largos de horas a semanas
+                 (largo log-normal), como las mantenciones y fallas de los equipos.
+
+    n                 (int):    Número de horas.
+    rng   (np.random.Generator):  Generador de números aleatorios.
+    fraccion        (float):    Fracción de horas sueltas sin dato.
+    cortes_por_anio (float):    Número medio de cortes largos por año.
+    """
+    falta  = rng.random(n) < fraccion
+    cortes = rng.poisson(cortes_por_anio*n/horas_por_anio)
+    inicio = rng.integers(0, max(n, 1), cortes)
+    largo  = np.minimum(np.exp(rng.normal(np.log(48), 1.3, cortes)).astype(np.int64) + 1, n)
+    # Cada corte se marca con +1 al inicio y -1 al final, la suma acumulada queda positiva dentro de los cortes.
+    marcas = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(marcas, inicio, 1)
+    np.add.at(marcas, np.minimum(inicio + largo, n), -1)
+    return falta | (np.cumsum(marcas[:-1]) > 0)
+
+def textos_fecha(fechas):
+    """
+    Descripción: Columnas de fecha (YYMMDD) y hora (HHMM) en texto de los archivos del SINCA, para unas fechas horarias.
+    """
+    return pd.Series(fechas.strftime("%y%m%d")), pd.Series(fechas.strftime("%H%M"))
+
+def escribir_csv_sinca(path, fechas, valores, registros=False, preliminares=0, rng=None, textos=None):
+    """
+    Descripción: Escribe un archivo con el formato de descarga del SINCA: fecha YYMMDD, hora HHMM, separador ";", coma decimal
+                 y un ";" al final de cada fila. Con registros=True usa el encabezado de los contaminantes ("Registros
+                 validados", "Registros preliminares", "Registros no validados"): las últimas horas quedan como preliminares
+                 y parte de las horas sin dato validado tienen un valor no validado; si no, una sola columna sin nombre.
+
+    path              (str):    Ruta del archivo.
+    fechas  (DatetimeIndex):    Fechas horarias (final de cada hora).
+    valores    (np.ndarray):    Valores, NaN donde no hay dato.
+    registros        (bool):    Encabezado de tres columnas de registros.
+    preliminares      (int):    Número de horas finales como registros preliminares.
+    rng   (np.random.Generator):  Generador para elegir las horas no validadas.
+    textos          (tuple):    Fecha y hora en texto (ver textos_fecha), para no volver a calcularlas en cada archivo.
+    """
+    fecha, hora = textos_fecha(fechas) if textos is None else textos
+    columnas = {COLUMNA_FECHA: fecha.to_numpy(), COLUMNA_HORA: hora.to_numpy()}
+    if registros == True:
+        rng   = np.random.default_rng(0) if rng is None else rng
+        final = np.arange(len(valores)) >= len(valores) - preliminares
+        no_validado = np.isnan(valores) & ~final & (rng.random(len(valores)) < 0.5)
+        columnas[COLUMNAS_REGISTROS[0]] = np.where(final, np.nan, valores)
+        columnas[COLUMNAS_REGISTROS[1]] = np.where(final, valores, np.nan)
+        columnas[COLUMNAS_REGISTROS[2]] = np.where(no_validado, np.round(np.abs(rng.normal(0, 20, len(valores)))), np.nan)
+    else:
+        columnas[""] = valores
+    tabla = pd.DataFrame(columnas)
+    tabla["_"] = ""
+    with open(path, "w", encoding="utf-8", newline="") as archivo:
+        archivo.write(";".join(list(tabla.columns[:-1]) + [""])+"\n")
+        # Los valores ya vienen redondeados, "%.10g" los escribe sin ceros de más (ej. "83", "17,8025").
+        tabla.to_csv(archivo, sep=";", decimal=",", float_format="%.10g", na_rep="", header=False, index=False,
+                     lineterminator="\n")
+
+def generar_datos(carpeta, estaciones=4, anios=7, variables=None, inicio="2014-01-01", fraccion_huecos=0.02,
+                  cortes_por_anio=0.6, semilla=0):
+    """
+    Descripción: Genera una carpeta de datos sintéticos con el formato del SINCA ("_info.txt" y un csv por estación y
+                 variable), con ciclos estacional y diario, horas sueltas sin dato, cortes largos y algunos contaminantes que
+                 empiezan después (equipos nuevos). Los contaminantes (C-) usan el encabezado de "Registros" y
+                 las meteorológicas (M-) la columna sin nombre. Si la carpeta ya tiene datos generados con los mismos
+                 parámetros no se vuelven a generar.
+
+    carpeta           (str):    Carpeta de salida.
+    estaciones        (int):    Número de estaciones.
+    anios             (int):    Años de datos horarios.
+    variables        (list):    Variables, por defecto todas las de VARIABLES_SINTETICAS.
+    inicio            (str):    Fecha de inicio (los años deben estar entre 2000 y 2099, la fecha usa dos dígitos).
+    fraccion_huecos (float):    Fracción de horas sueltas sin dato.
+    cortes_por_anio (float):    Número medio de cortes largos por año y archivo.
+    semilla           (int):    Semilla de los números aleatorios.
+
+    Ejemplo:
+        generar_datos("/tmp/sinca_50x20", estaciones=50, anios=20)
+    """
+    variables  = list(VARIABLES_SINTETICAS) if variables is None else list(variables)
+    parametros = {"version": VERSION_BENCHMARK, "estaciones": estaciones, "anios": anios, "variables": variables,
+                  "inicio": inicio, "fraccion_huecos": fraccion_huecos, "cortes_por_anio": cortes_por_anio, "semilla": semilla}
+    registro = os.path.join(carpeta, "_benchmark.json")
+    if os.path.isfile(registro):
+        with open(registro, encoding="utf-8") as archivo:
+            if json.load(archivo) == parametros:
+                return carpeta
+    os.makedirs(carpeta, exist_ok=True)
+    for path in glob(os.path.join(carpeta, "id*_*_datos_*.csv")):
+        os.remove(path)
+
+    rng   = np.random.default_rng(semilla)
+    ids   = np.arange(1, estaciones + 1) + 1000
+    info  = pd.DataFrame({
+        "id": ids, "nombre estación": ["Estación Sintética "+str(id) for id in ids],
+        "UTM_E": rng.integers(250000, 400000, estaciones), "UTM_N": rng.integers(6100000, 6300000, estaciones), "Huso": 19})
+    info.to_csv(os.path.join(carpeta, "_info.txt"), index=False, sep=",")
+    with open(os.path.join(carpeta, "_info.txt"), encoding="utf-8") as archivo:
+        texto = archivo.read().replace(",", ", ")
+    with open(os.path.join(carpeta, "_info.txt"), "w", encoding="utf-8") as archivo:
+        archivo.write(texto)
+
+    # Horas al final del periodo, como en el SINCA (la primera es 01:00 del día de inicio).
+    inicio = pd.Timestamp(inicio)
+    fin    = inicio + pd.DateOffset(years=anios)
+    fechas = pd.date_range(inicio + pd.Timedelta(hours=1), fin - pd.Timedelta(hours=1), freq="h")
+    fecha, hora = textos_fecha(fechas)
+    for id in ids:
+        for variable in variables:
+            modelo  = VARIABLES_SINTETICAS[variable]
+            valores = valores_sinteticos(variable, fechas, rng, modelo)
+            valores[huecos_sinteticos(len(fechas), rng, fraccion_huecos, cortes_por_anio)] = np.nan
+            # Uno de cada cinco contaminantes empieza después, en el primer tercio del periodo (equipos nuevos).
+            desde = int(rng.integers(0, len(fechas)//3)) if variable.startswith("C-") and rng.random() < 0.2 else 0
+            nombre = "id{}_{}_datos_{}_{}.csv".format(id, variable, fechas[desde].strftime("%y%m%d"), fechas[-1].strftime("%y%m%d"))
+            escribir_csv_sinca(
+                os.path.join(carpeta, nombre), fechas[desde:], valores[desde:], registros=variable.startswith("C-"),
+                preliminares=24*90, rng=rng, textos=(fecha[desde:], hora[desde:]))
+    with open(registro, "w", encoding="utf-8") as archivo:
+        json.dump(parametros, archivo)
+    return carpeta
+
+class _Cronometro:
+    # Tiempo acumulado dentro de un método (ej. Figure.savefig) mientras está activo.
+    def __init__(self):
+        self.segundos = 0.0
+
+    @contextmanager
+    def medir(self, clase, nombre):
+        original = getattr(clase, nombre)
+        def medido(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.segundos += time.perf_counter() - inicio
+        setattr(clase, nombre, medido)
+        try:
+            yield self
+        finally:
+            setattr(clase, nombre, original)
+
+def _medir(funcion, repeticiones, memoria):
+    # Segundos de cada repetición, tiempo de savefig y pico de memoria (MB, con tracemalloc en una ejecución aparte).
+    from matplotlib.figure import Figure
+    segundos, guardado = [], []
+    for _ in range(repeticiones):
+        cronometro = _Cronometro()
+        with cronometro.medir(Figure, "savefig"):
+            inicio = time.perf_counter()
+            funcion()
+            segundos.append(time.perf_counter() - inicio)
+        guardado.append(cronometro.segundos)
+    resultado = {
+        "segundos": float(np.min(segundos)), "mediana": float(np.median(segundos)), "repeticiones": repeticiones,
+        "savefig": float(np.min(guardado))}
+    if memoria == True:
+        tracemalloc.start()
+        try:
+            funcion()
+            resultado["memoria_mb"] = tracemalloc.get_traced_memory()[1]/2**20
+        finally:
+            tracemalloc.stop()
+    return resultado
+
+def importacion_nucleo(modulos=MODULOS_NUCLEO, pesadas=BIBLIOTECAS_PESADAS):
+    """
+    Descripción: Importa los módulos del núcleo en un proceso nuevo de Python (sin nada en memoria) y entrega los segundos
+                 de la importación y las bibliotecas pesadas que quedaron cargadas, que deberían ser ninguna.
+
+    modulos         (tuple):    Módulos del paquete a importar.
+    pesadas         (tuple):    Bibliotecas que no deben cargarse.
+    """
+    paquete = __package__
+    codigo  = ("import sys, json, time\ninicio = time.perf_counter()\nimport {}\nsegundos = time.perf_counter() - inicio\n"
+               "print(json.dumps([segundos, sorted({{m.split('.')[0] for m in sys.modules}} & set({!r}))]))").format(
+        ", ".join(paquete+"."+modulo for modulo in modulos), list(pesadas))
+    # El proceso se ejecuta desde la carpeta que contiene el paquete (ej. la raíz del repositorio para Script.python).
+    raiz    = os.path.dirname(os.path.abspath(__file__))
+    for _ in range(paquete.count(".") + 1):
+        raiz = os.path.dirname(raiz)
+    salida  = subprocess.run([sys.executable, "-c", codigo], cwd=raiz, capture_output=True, text=True, check=True)
+    segundos, cargadas = json.loads(salida.stdout.strip().splitlines()[-1])
+    return segundos, cargadas
+
+def ejecutar_benchmark(carpeta=None, estaciones=4, anios=7, variables=None, repeticiones=3, memoria=True, semilla=0,
+                       verbose=True):
+    """
+    Descripción: Mide el tiempo de importación del núcleo numérico (ver importacion_nucleo) y cada etapa por separado
+                 sobre datos sintéticos: lectura_csv (con y sin cache), lectura_todoscsv (completa y de un periodo),
+                 lectura_estaciones, cada gráfico (con su tiempo de savefig aparte), clasificando_viento y la exportación
+                 a Excel. Cada etapa se repite y se guarda el mínimo y la mediana de los segundos, y el pico de memoria
+                 medido con tracemalloc en una ejecución aparte (tracemalloc hace más lento el código).
+
+    carpeta           (str):    Carpeta de los datos sintéticos, por defecto una carpeta temporal según la escala.
+    estaciones        (int):    Número de estaciones.
+    anios             (int):    Años de datos.
+    variables        (list):    Variables, por defecto todas las de VARIABLES_SINTETICAS.
+    repeticiones      (int):    Repeticiones de cada etapa.
+    memoria          (bool):    Mide el pico de memoria de cada etapa.
+    semilla           (int):    Semilla de los datos.
+    verbose          (bool):    Muestra el tiempo de cada etapa.
+
+    Entrega un diccionario (serializable como json) con la escala, el entorno y las etapas.
+
+    Ejemplo:
+        base = ejecutar_benchmark(estaciones=50, anios=20)
+        guardar_resultados(base, "benchmark_base.json")
+    """
+    matplotlib.use("Agg")
+    # Solo el tiempo, que el núcleo no cargue bibliotecas pesadas se prueba en tests/test_importacion.py.
+    segundos   = [importacion_nucleo()[0] for _ in range(repeticiones)]
+    resultados = {"importacion_nucleo": {
+        "segundos": float(np.min(segundos)), "mediana": float(np.median(segundos)), "repeticiones": repeticiones}}
+    if verbose == True:
+        print("{:<24s} {:8.3f} s".format("importacion_nucleo", resultados["importacion_nucleo"]["segundos"]))
+    variables = list(VARIABLES_SINTETICAS) if variables is None else list(variables)
+    carpeta   = carpeta or os.path.join(tempfile.gettempdir(), "sinca_benchmark_{}x{}".format(estaciones, anios))
+    inicio    = time.perf_counter()
+    generar_datos(carpeta, estaciones, anios, variables, semilla=semilla)
+    generacion = time.perf_counter() - inicio
+
+    id     = 1001
+    paths  = sorted(glob(os.path.join(carpeta, "id"+str(id)+"_*.csv")))
+    filas  = sum(len(lectura_csv(path)) for path in paths)
+    salida = tempfile.mkdtemp(prefix="sinca_benchmark_salida_")
+    cache  = os.path.join(salida, "cache")
+    for subcarpeta in ("Plot", "Data"):
+        os.makedirs(os.path.join(salida, subcarpeta), exist_ok=True)
+    for path in paths:
+        lectura_csv(path, cache=cache)
+    df = lectura_todoscsv(paths)
+
+    renderizador = Renderizador()
+    exportador   = ExportadorTablas()
+    etapas = {
+        "lectura_csv"       : lambda: [lectura_csv(path) for path in paths],
+        "lectura_csv_cache" : lambda: [lectura_csv(path, cache=cache) for path in paths],
+        "lectura_todoscsv"  : lambda: lectura_todoscsv(paths),
+        # Consulta de un periodo de tres meses de viento, solo se leen esos archivos y esas filas.
+        "lectura_periodo"   : lambda: lectura_todoscsv(
+            paths, variables=["M-VEL", "M-DIR"], desde=df.index[0] + pd.DateOffset(months=5),
+            hasta=df.index[0] + pd.DateOffset(months=8)),
+        "lectura_estaciones": lambda: lectura_estaciones(carpeta, procesos=1),
+        }
+    for nombre, grafico in GRAFICOS_ETAPAS.items():
+        parametros = dict(PARAMETROS_ETAPAS[nombre])
+        if nombre == "series_de_tiempo":
+            parametros["major_locator"]   = {"locator": mdates.YearLocator()}
+            parametros["major_formatter"] = {"formatter": mdates.DateFormatter('%Y')}
+        etapas[nombre] = (lambda grafico, parametros: lambda: grafico(
+            df=df, nombre_estacion="Estación Sintética", output_folder=salida, renderizador=renderizador,
+            exportador=exportador, **parametros))(grafico, parametros)
+    etapas["clasificando_viento"] = lambda: clasificando_viento(
+        df, nombre_estacion="Estación Sintética", data_folder=os.path.join(salida, "Data"), exportador=exportador,
+        **PARAMETROS_ETAPAS["clasificando_viento"])
+    # La exportación escribe las tablas que juntaron los gráficos (un libro por archivo, como en el reporte).
+    tablas = {}
+    def exportacion():
+        exportador.tablas = {path: dict(hojas) for path, hojas in tablas.items()}
+        exportador.escribir()
+
+    try:
+        for nombre, funcion in etapas.items():
+            resultados[nombre] = _medir(funcion, repeticiones, memoria)
+            if verbose == True:
+                print("{:<24s} {:8.3f} s".format(nombre, resultados[nombre]["segundos"]))
+        tablas = {path: dict(hojas) for path, hojas in exportador.tablas.items()}
+        resultados["exportacion"] = _medir(exportacion, repeticiones, memoria)
+        # Tiempo total de savefig de todos los gráficos, también como una etapa.
+        resultados["savefig"] = {
+            "segundos"    : float(sum(r.get("savefig", 0.0) for r in resultados.values())),
+            "repeticiones": repeticiones}
+        if verbose == True:
+            for nombre in ("exportacion", "savefig"):
+                print("{:<24s} {:8.3f} s".format(nombre, resultados[nombre]["segundos"]))
+    finally:
+        renderizador.cerrar()
+        shutil.rmtree(salida, ignore_errors=True)
+
+    return {
+        "version": VERSION_BENCHMARK,
+        "fecha"  : pd.Timestamp.now().isoformat(timespec="seconds"),
+        "escala" : {"estaciones": estaciones, "anios": anios, "variables": variables, "filas_estacion": int(filas),
+                    "archivos": len(glob(os.path.join(carpeta, "id*_*_datos_*.csv"))), "generacion": generacion},
+        "entorno": {"python": platform.python_version(), "plataforma": platform.platform(), "numpy": np.__version__,
+                    "pandas": pd.__version__, "matplotlib": matplotlib.__version__, "nucleos": os.cpu_count()},
+        "etapas" : resultados,
+        }
+
+def guardar_resultados(resultados, path):
+    """
+    Descripción: Guarda los resultados de ejecutar_benchmark como json.
+    """
+    with open(path, "w", encoding="utf-8") as archivo:
+        json.dump(resultados, archivo, ensure_ascii=False, indent=1)
+
+def leer_resultados(path):
+    """
+    Descripción: Lee los resultados guardados con guardar_resultados.
+    """
+    with open(path, encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+def comparar_resultados(actual, base, tolerancia=0.25, minimo_segundos=0.005, minimo_memoria_mb=1.0):
+    """
+    Descripción: Compara dos resultados etapa por etapa (segundos mínimos y memoria) y marca como regresión las etapas
+                 que tardan (o usan memoria) más que la base en más de la tolerancia. Las etapas que tardan menos de
+                 minimo_segundos o usan menos de minimo_memoria_mb en la base no se marcan, su medida es muy variable.
+
+    actual           (dict):    Resultados de ejecutar_benchmark (o ruta de un json).
+    base             (dict):    Resultados de referencia (o ruta de un json).
+    tolerancia      (float):    Aumento relativo permitido (0.25 = 25%).
+    minimo_segundos (float):    Tiempo mínimo en la base para considerar una etapa.
+    minimo_memoria_mb (float):  Memoria mínima en la base (MB) para considerar el pico de memoria de una etapa.
+
+    Entrega un DataFrame por etapa con la base, el valor actual, la razón y la columna "regresion".
+    """
+    actual = leer_resultados(actual) if isinstance(actual, str) else actual
+    base   = leer_resultados(base) if isinstance(base, str) else base
+    if base.get("version") != actual.get("version") or base.get("escala", {}).get("estaciones") != actual.get("escala", {}).get("estaciones") \
+            or base.get("escala", {}).get("anios") != actual.get("escala", {}).get("anios"):
+        raise ValueError("Los resultados deben ser de la misma versión y escala (estaciones y años).")
+    filas = []
+    for etapa in actual["etapas"]:
+        if etapa not in base["etapas"]:
+            continue
+        for medida, minimo in (("segundos", minimo_segundos), ("memoria_mb", minimo_memoria_mb)):
+            a, b = actual["etapas"][etapa].get(medida), base["etapas"][etapa].get(medida)
+            if a is None or b is None:
+                continue
+            razon = a/b if b > 0 else np.nan
+            filas.append({"etapa": etapa, "medida": medida, "base": b, "actual": a, "razon": razon,
+                          "regresion": bool(b > 0 and b >= minimo and a > b*(1 + tolerancia))})
+    return pd.DataFrame(filas, columns=["etapa", "medida", "base", "actual", "razon", "regresion"])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m Script.python.benchmark", description="Mide los tiempos y la memoria de cada etapa con datos sintéticos.")
+    parser.add_argument("-n", "--estaciones", type=int, default=4, help="Número de estaciones.")
+    parser.add_argument("-a", "--anios", type=int, default=7, help="Años de datos.")
+    parser.add_argument("-r", "--repeticiones", type=int, default=3, help="Repeticiones de cada etapa.")
+    parser.add_argument("-c", "--carpeta", default=None, help="Carpeta de los datos sintéticos.")
+    parser.add_argument("-o", "--salida", default=None, help="Archivo json para guardar los resultados.")
+    parser.add_argument("-b", "--base", default=None, help="Resultados de referencia (json) para buscar regresiones.")
+    parser.add_argument("-t", "--tolerancia", type=float, default=0.25, help="Aumento relativo permitido frente a la base.")
+    parser.add_argument("-m", "--minimo-memoria", type=float, default=1.0,
+                        help="Memoria mínima de la base (MB) para marcar regresiones de memoria.")
+    parser.add_argument("--sin-memoria", action="store_true", help="No mide el pico de memoria.")
+    args = parser.parse_args(argv)
+    resultados = ejecutar_benchmark(
+        args.carpeta, args.estaciones, args.anios, repeticiones=args.repeticiones, memoria=not args.sin_memoria)
+    if args.salida is not None:
+        guardar_resultados(resultados, args.salida)
+    if args.base is not None:
+        comparacion = comparar_resultados(resultados, args.base, args.tolerancia, minimo_memoria_mb=args.minimo_memoria)
+        print(comparacion.round(3).to_string(index=False))
+        if comparacion["regresion"].any():
+            print("Regresiones: "+", ".join(comparacion.loc[comparacion["regresion"], "etapa"] + " (" +
+                                            comparacion.loc[comparacion["regresion"], "medida"] + ")"))
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
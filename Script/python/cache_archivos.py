@@ -0,0 +1,175 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+from .instrumentacion import etapa
+
+# Carpeta por defecto del cache, puede cambiarse con la variable de entorno SINCA_CACHE.
+CARPETA_CACHE = os.environ.get("SINCA_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "sinca"))
+
+# Cambiar la versión invalida todas las entradas guardadas con un formato anterior.
+VERSION_CACHE = 1
+
+def huella_archivo(path, contenido=True):
+    """
+    Descripción: Huella de un archivo fuente: ruta absoluta, tamaño, fecha de modificación y hash del contenido.
+
+    path              (str):    Ruta del archivo.
+    contenido        (bool):    Si es True se calcula el hash blake2b del contenido.
+    """
+    estado = os.stat(path)
+    huella = {"path": os.path.abspath(path), "size": estado.st_size, "mtime_ns": estado.st_mtime_ns}
+    if contenido == True:
+        h = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as archivo:
+            for bloque in iter(lambda: archivo.read(1 << 20), b""):
+                h.update(bloque)
+        huella["hash"] = h.hexdigest()
+    return huella
+
+def _carpeta_entrada(path, carpeta):
+    clave = hashlib.blake2b(os.path.abspath(path).encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(carpeta, clave)
+
+def _leer_meta(entrada):
+    try:
+        with open(os.path.join(entrada, "meta.json"), "r", encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return None
+
+def _escribir_meta(entrada, meta):
+    # Se escribe en un archivo temporal y se reemplaza, un lector nunca ve un meta.json a medias.
+    temporal = os.path.join(entrada, "meta.json.tmp"+str(os.getpid()))
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(meta, archivo, ensure_ascii=False)
+    os.replace(temporal, os.path.join(entrada, "meta.json"))
+
+def _entrada_vigente(meta, path, entrada=None):
+    # Primero se compara tamaño y fecha, el hash solo se calcula si alguno cambió. Si el contenido es el mismo (ej. el
+    # archivo se copió o se volvió a sacar de git) se guarda la nueva fecha en la entrada, para no volver a calcular el hash.
+    if meta is None or meta.get("version") != VERSION_CACHE or os.path.isfile(path) == False:
+        return False
+    huella = huella_archivo(path, contenido=False)
+    if huella["size"] != meta["size"]:
+        return False
+    if huella["mtime_ns"] == meta["mtime_ns"]:
+        return True
+    if huella_archivo(path)["hash"] != meta["hash"]:
+        return False
+    if entrada is not None:
+        meta["mtime_ns"] = huella["mtime_ns"]
+        try:
+            _escribir_meta(entrada, meta)
+        except OSError:
+            pass
+    return True
+
+def _guardar(path, df, entrada):
+    # Se escribe en una carpeta temporal y se reemplaza al final, para no dejar entradas a medias.
+    temporal = entrada+".tmp"+str(os.getpid())
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+    for n, columna in enumerate(df.columns):
+        np.save(os.path.join(temporal, "col"+str(n)+".npy"), df[columna].to_numpy())
+    meta = huella_archivo(path)
+    meta.update({"version": VERSION_CACHE, "columnas": [str(c) for c in df.columns], "filas": len(df)})
+    with open(os.path.join(temporal, "meta.json"), "w", encoding="utf-8") as archivo:
+        json.dump(meta, archivo, ensure_ascii=False)
+    # La entrada anterior se mueve a un lado antes de reemplazarla: un lector de otro proceso ve la entrada anterior
+    # completa o la nueva, nunca una entrada a medio borrar.
+    anterior = entrada+".old"+str(os.getpid())
+    try:
+        os.replace(entrada, anterior)
+    except OSError:
+        anterior = None
+    try:
+        os.replace(temporal, entrada)
+    except OSError:
+        # Otro proceso guardó la entrada primero, se mantiene la suya.
+        shutil.rmtree(temporal, ignore_errors=True)
+    if anterior is not None:
+        shutil.rmtree(anterior, ignore_errors=True)
+
+def _cargar(entrada, meta):
+    # Entrega None si la entrada desapareció mientras se cargaba (ej. otro proceso la reemplazó), se lee el archivo.
+    try:
+        columnas = {
+            columna: np.load(os.path.join(entrada, "col"+str(n)+".npy"), mmap_mode="c")
+            for n, columna in enumerate(meta["columnas"])}
+    except (OSError, ValueError):
+        return None
+    return pd.DataFrame(columnas, copy=False)
+
+def lectura_con_cache(path, lector, carpeta=None):
+    """
+    Descripción: Entrega el resultado de lector(path) desde el cache si el archivo fuente no ha cambiado.
+                 Si el archivo cambió, la entrada obsoleta se elimina y se vuelve a leer.
+
+    path              (str):    Ruta del archivo fuente.
+    lector       (function):    Función que lee el archivo y entrega un DataFrame (ej. lectura_csv).
+    carpeta           (str):    Carpeta del cache, por defecto CARPETA_CACHE.
+
+    Ejemplo:
+        lectura_con_cache("Data/P001_calidad aire/id212_C-MP10_datos_140101_201231.csv", lectura_csv)
+    """
+    carpeta = CARPETA_CACHE if carpeta is None else carpeta
+    entrada = _carpeta_entrada(path, carpeta)
+    meta    = _leer_meta(entrada)
+    if _entrada_vigente(meta, path, entrada) == True:
+        with etapa("cache_cargar", filas=meta["filas"]):
+            df = _cargar(entrada, meta)
+        if df is not None:
+            return df
+    df = lector(path)
+    with etapa("cache_guardar", filas=len(df)):
+        _guardar(path, df, entrada)
+    return df
+
+def info_cache(carpeta=None):
+    """
+    Descripción: Tabla con las entradas del cache: archivo fuente, filas, tamaño en disco y si sigue vigente.
+
+    carpeta           (str):    Carpeta del cache, por defecto CARPETA_CACHE.
+    """
+    carpeta = CARPETA_CACHE if carpeta is None else carpeta
+    filas = []
+    if os.path.isdir(carpeta) == True:
+        for nombre in sorted(os.listdir(carpeta)):
+            entrada = os.path.join(carpeta, nombre)
+            meta    = _leer_meta(entrada)
+            if meta is None:
+                continue
+            bytes_disco = sum(os.path.getsize(os.path.join(entrada, f)) for f in os.listdir(entrada))
+            filas.append({
+                "entrada" : nombre,
+                "path"    : meta["path"],
+                "columnas": meta["columnas"],
+                "filas"   : meta["filas"],
+                "bytes"   : bytes_disco,
+                "vigente" : _entrada_vigente(meta, meta["path"])})
+    return pd.DataFrame(filas, columns=["entrada", "path", "columnas", "filas", "bytes", "vigente"])
+
+def limpiar_cache(carpeta=None, solo_obsoletas=False):
+    """
+    Descripción: Elimina entradas del cache y entrega el número de entradas eliminadas.
+
+    carpeta           (str):    Carpeta del cache, por defecto CARPETA_CACHE.
+    solo_obsoletas   (bool):    Si es True solo elimina entradas cuyo archivo fuente cambió o ya no existe.
+    """
+    carpeta = CARPETA_CACHE if carpeta is None else carpeta
+    eliminadas = 0
+    if os.path.isdir(carpeta) == False:
+        return eliminadas
+    for nombre in os.listdir(carpeta):
+        entrada = os.path.join(carpeta, nombre)
+        if os.path.isdir(entrada) == False:
+            continue
+        meta = _leer_meta(entrada)
+        if solo_obsoletas == True and meta is not None and _entrada_vigente(meta, meta["path"]) == True:
+            continue
+        shutil.rmtree(entrada, ignore_errors=True)
+        eliminadas += 1
+    return eliminadas
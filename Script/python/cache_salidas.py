@@ -0,0 +1,134 @@
+import os
+import glob
+import json
+import shutil
+import hashlib
+import numpy as np
+
+# Cambiar la versión obliga a regenerar todas las salidas (ej. si cambia el estilo de los gráficos fuera del código del paquete).
+VERSION_SALIDAS = 1
+
+# Manifiesto de las salidas generadas, en la carpeta de salida del reporte.
+ARCHIVO_MANIFIESTO = "manifiesto_salidas.json"
+
+# Archivos que escribe cada gráfico, relativos a la carpeta de salida. {variable} es la variable del trabajo y {estacion}
+# el nombre de la estación sin espacios, como en las funciones de gráficos.
+SALIDAS = {
+    "series_de_tiempo"       : ("Plot/ST_{variable}_{estacion}.png",),
+    "ciclo_diario"           : ("Plot/CD_{variable}_{estacion}.png",),
+    "ciclo_diario_direccion" : ("Plot/CD_{variable}_{estacion}.png", "Data/CD_{variable}_{estacion}.xlsx"),
+    "ciclo_estacional"       : ("Plot/CE_{variable}_{estacion}.png", "Data/CE_{estacion}.xlsx"),
+    "ciclo_estacional_viento": ("Plot/CE_Viento_{estacion}.png", "Data/CE_{estacion}.xlsx"),
+    "rosa_vientos"           : ("Plot/rosadelosviento_{estacion}.png", "Data/rosadelosviento_{estacion}.xlsx"),
+    }
+
+_HUELLA_CODIGO = None
+
+def salidas_trabajo(grafico, parametros, nombre_estacion, formato="excel"):
+    """
+    Descripción: Archivos de salida de un trabajo, relativos a la carpeta de salida. En formato "parquet" o "csv" el libro
+                 Excel es una carpeta con un archivo por tabla (ver ExportadorTablas).
+
+    grafico           (str):    Tipo de gráfico (ej. "ciclo_diario").
+    parametros       (dict):    Parámetros del trabajo, con "variable" si el gráfico es por variable.
+    nombre_estacion   (str):    Nombre de la estación.
+    formato           (str):    Formato de las tablas.
+    """
+    salidas = []
+    for plantilla in SALIDAS.get(grafico, ()):
+        salida = plantilla.format(variable=parametros.get("variable", ""), estacion=nombre_estacion.replace(" ", ""))
+        if salida.endswith(".xlsx") and formato != "excel":
+            salida = os.path.splitext(salida)[0]
+        salidas.append(salida)
+    return salidas
+
+def huella_codigo():
+    """
+    Descripción: Versión del renderizador: hash del código del paquete (funciones de gráficos, climatologías, exportación),
+                 de la versión de matplotlib y de VERSION_SALIDAS. Cualquier cambio en el código regenera las salidas.
+    """
+    global _HUELLA_CODIGO
+    if _HUELLA_CODIGO is None:
+        import matplotlib
+        h = hashlib.blake2b(str(VERSION_SALIDAS).encode("utf-8"), digest_size=16)
+        h.update(matplotlib.__version__.encode("utf-8"))
+        for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+            with open(path, "rb") as archivo:
+                h.update(os.path.basename(path).encode("utf-8"))
+                h.update(archivo.read())
+        _HUELLA_CODIGO = h.hexdigest()
+    return _HUELLA_CODIGO
+
+def huella_trabajo(df, variables, grafico, parametros, nombre_estacion, formato="excel"):
+    """
+    Descripción: Huella de las entradas de un trabajo: fechas y valores de las variables que usa, parámetros del gráfico
+                 (límites, vmin/vmax/step, nrosa, etiquetas), nombre de la estación, formato de las tablas y versión del
+                 renderizador. Si la huella no cambia, las salidas del trabajo tampoco.
+
+    df          (DataFrame):    Datos de la estación con índice de fechas.
+    variables        (list):    Columnas que usa el trabajo.
+    grafico           (str):    Tipo de gráfico.
+    parametros       (dict):    Parámetros del trabajo (sin los objetos del reporte, como el exportador).
+    nombre_estacion   (str):    Nombre de la estación.
+    formato           (str):    Formato de las tablas.
+    """
+    h = hashlib.blake2b(huella_codigo().encode("utf-8"), digest_size=20)
+    h.update(json.dumps([grafico, nombre_estacion, formato, parametros], sort_keys=True, default=repr, ensure_ascii=False).encode("utf-8"))
+    h.update(np.ascontiguousarray(df.index.asi8).tobytes())
+    for variable in variables:
+        valores = np.ascontiguousarray(df[variable].to_numpy())
+        h.update(variable.encode("utf-8"))
+        h.update(str(valores.dtype).encode("utf-8"))
+        h.update(valores.tobytes())
+    return h.hexdigest()
+
+def leer_manifiesto(output_folder):
+    """
+    Descripción: Entradas del manifiesto de salidas, {clave del trabajo: {"huella": ..., "salidas": [...]}}.
+                 Entrega un diccionario vacío si no existe, no se puede leer o es de otra versión.
+    """
+    try:
+        with open(os.path.join(output_folder, ARCHIVO_MANIFIESTO), "r", encoding="utf-8") as archivo:
+            manifiesto = json.load(archivo)
+    except (OSError, ValueError):
+        return {}
+    return manifiesto.get("trabajos", {}) if manifiesto.get("version") == VERSION_SALIDAS else {}
+
+def escribir_manifiesto(output_folder, trabajos):
+    """
+    Descripción: Escribe el manifiesto de salidas (primero en un archivo temporal, para no dejarlo a medias).
+    """
+    path     = os.path.join(output_folder, ARCHIVO_MANIFIESTO)
+    temporal = path+".tmp"+str(os.getpid())
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump({"version": VERSION_SALIDAS, "trabajos": trabajos}, archivo, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(temporal, path)
+
+def vigente(entrada, huella, output_folder):
+    """
+    Descripción: True si el trabajo tiene la misma huella que en el manifiesto y todas sus salidas existen.
+    """
+    return entrada is not None and entrada.get("huella") == huella and \
+        all(os.path.exists(os.path.join(output_folder, salida)) for salida in entrada.get("salidas", []))
+
+def podar_salidas(output_folder, anteriores, actuales):
+    """
+    Descripción: Elimina las salidas del manifiesto anterior que ningún trabajo actual produce (ej. variables o estaciones
+                 que se quitaron del manifiesto del reporte, o trabajos que quedaron sin datos). Solo se eliminan archivos
+                 registrados en el manifiesto, nunca otros archivos de la carpeta de salida.
+
+    output_folder     (str):    Carpeta de salida.
+    anteriores       (dict):    Entradas del manifiesto anterior.
+    actuales         (dict):    Entradas del manifiesto nuevo.
+
+    Entrega la lista de salidas eliminadas.
+    """
+    vigentes  = {salida for entrada in actuales.values() for salida in entrada.get("salidas", [])}
+    huerfanas = sorted({salida for entrada in anteriores.values() for salida in entrada.get("salidas", [])} - vigentes)
+    for salida in huerfanas:
+        path = os.path.join(output_folder, salida)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.isfile(path):
+            os.remove(path)
+    return huerfanas
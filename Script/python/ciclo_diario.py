@@ -2,7 +2,27 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from .climatologia import climatologia, verificar_datos
+from .renderizador import obtener_plantilla, cerrar_plantilla
+from .instrumentacion import etapa, instrumentado
 
+def _plantilla_ciclo_diario():
+    #Crear figura, los valores pueden ser modificados en función de lo que se necesite.
+    fig, ax = plt.subplots( 
+        figsize     = (9,6),
+        gridspec_kw = {'left':0.075, 'right':0.975, 'top':0.945, 'bottom':0.085},
+        facecolor   ='w', 
+        edgecolor   ='w')
+
+    # Definición de tipografía del eje "x", el eje "y" y la grilla.
+    ax.grid(True)
+    ax.tick_params(
+        axis = "both", which = "major", direction = "in", length = 7.5, width = 1, pad = 5, 
+        grid_color = 'k', grid_linewidth = 0.75, grid_linestyle = "--", grid_alpha = 0.8,
+        bottom = True, top = True, left = True, right = True)
+    return {"fig": fig, "ax": ax}
+
+@instrumentado()
 def ciclo_diario(df, variable, nombre_estacion, xlabel, ylabel, **kwargs):
     """
     Descripción: Función para graficar ciclo diario con promedio horario.
@@ -14,6 +34,13 @@ def ciclo_diario(df, variable, nombre_estacion, xlabel, ylabel, **kwargs):
     ylabel            (str):    Nombre de eje y del gráfico.
     **kwargs               :    Variables que no están definidas en la función directamente, pero que una vez que
                                 ajuste a sus requerimientos, pueden ser cambiadas. Recordar que si se tiene kwargs debe estar definido cuando se llama la función.
+                                bosquejo (HistogramaCuantiles) y serie (str) son opcionales: si se entrega bosquejo, los
+                                percentiles y el promedio se obtienen de los histogramas de la serie (por defecto variable)
+                                y df no se usa.
+                                renderizador (Renderizador) es opcional, reutiliza la figura entre llamadas.
+                                output_folder (str) es opcional, carpeta con las subcarpetas "Plot" y "Data", por defecto "Output".
+                                completitud_minima (float) es opcional, fracción mínima de datos de cada clase (ej. 0.75),
+                                las clases con menos datos no se consideran (ver climatologia).
     Ejemplo:
         ciclo_diario(
         df              = df, 
@@ -24,31 +51,38 @@ def ciclo_diario(df, variable, nombre_estacion, xlabel, ylabel, **kwargs):
         ylim            = {"bottom": 0, "top": 5},
         )
     """
-    #Limpieza de valores NaN.
-    df = df[variable].dropna()
-
-    #Agrupar datas por hora.
-    df = df.groupby(df.index.hour)
-    
-    #Calcular percentil 95, percentil 5 y promedio de los datos.
-    df_P95 = df.apply(lambda x: np.percentile(x, 95))
-    df_P05 = df.apply(lambda x: np.percentile(x, 5))
-    df_promedio = df.mean()
-    
-    #Crear figura, los valores pueden ser modificados en función de lo que se necesite.
-    fig, ax = plt.subplots( 
-        figsize     = (9,6),
-        gridspec_kw = {'left':0.075, 'right':0.975, 'top':0.945, 'bottom':0.085},
-        facecolor   ='w', 
-        edgecolor   ='w')
+    #Calcular percentil 95, percentil 5 y promedio de los datos por hora, los valores NaN no se consideran.
+    if kwargs.get("bosquejo") is not None:
+        clima = kwargs["bosquejo"].climatologia(kwargs.get("serie", variable), percentiles=(5, 95))
+    else:
+        clima = climatologia(df, [variable], por=("HORA",), percentiles=(5, 95), completitud_minima=kwargs.get("completitud_minima"))
+        verificar_datos(clima, variable, kwargs.get("completitud_minima"))
+        clima = clima.xs(variable, axis=1, level=1)
+    clima = clima[clima["conteo"] > 0]
+    if len(clima) == 0:
+        raise ValueError("La serie {} del bosquejo no tiene datos.".format(kwargs.get("serie", variable)))
+    df_P95 = clima["P95"]
+    df_P05 = clima["P05"]
+    df_promedio = clima["promedio"]
     
+    # Figura con ejes, grilla y ticks, se reutiliza si se entrega un renderizador.
+    renderizador = kwargs.get("renderizador")
+    plantilla    = obtener_plantilla(renderizador, ("ciclo_diario",), _plantilla_ciclo_diario)
+    fig, ax      = plantilla["fig"], plantilla["ax"]
+
     #Graficar promedio de los datos.
-    ax.plot(df_promedio, ls = "-", lw = 1.5, c = "blue", label = "Promedio", zorder = 2)
-    ax.plot(df_P05, ls = "-", lw = 1.0, c = "k", label = "__no_legend__", zorder = 2)
-    ax.plot(df_P95, ls = "-", lw = 1.0, c = "k", label = "__no_legend__", zorder = 2)
+    if "lineas" in plantilla:
+        for linea, serie in zip(plantilla["lineas"], [df_promedio, df_P05, df_P95]):
+            linea.set_data(serie.index.to_numpy(), serie.to_numpy())
+        plantilla["relleno"].remove()
+    else:
+        plantilla["lineas"] = [
+            ax.plot(df_promedio, ls = "-", lw = 1.5, c = "blue", label = "Promedio", zorder = 2)[0],
+            ax.plot(df_P05, ls = "-", lw = 1.0, c = "k", label = "__no_legend__", zorder = 2)[0],
+            ax.plot(df_P95, ls = "-", lw = 1.0, c = "k", label = "__no_legend__", zorder = 2)[0]]
 
     #Graficar el 90% de los datos.
-    ax.fill_between(
+    plantilla["relleno"] = ax.fill_between(
         x = df_P05.index, y1 = df_P05, y2 = df_P95, alpha = 0.3, color = 'blue', zorder = 2, label = "90% de datos")
 
     #Definición de limites: "x" corresponde al tiempo e "y" corresponde a el valor a graficar.
@@ -59,25 +93,22 @@ def ciclo_diario(df, variable, nombre_estacion, xlabel, ylabel, **kwargs):
     ax.set_xlabel(xlabel, fontsize = 11, fontweight = "normal", labelpad = 2.5)
     ax.set_ylabel(ylabel, fontsize = 11, fontweight = "normal", labelpad = 2.5)
 
-    # Definición de tipografía del eje "x", el eje "y" y la grilla.
-    ax.grid(True)
+    # Ticks del eje "x" en cada hora.
     ax.set(xticks = df_promedio.index)
-    ax.tick_params(
-        axis = "both", which = "major", direction = "in", length = 7.5, width = 1, pad = 5, 
-        grid_color = 'k', grid_linewidth = 0.75, grid_linestyle = "--", grid_alpha = 0.8,
-        bottom = True, top = True, left = True, right = True)
 
-    # Definición de legenda
-    ax.legend(
-        loc = 0, ncol = 2, fontsize = 10, markerscale = 10, facecolor = 'lightgrey', edgecolor = 'k')
+    # Definición de legenda, se crea una sola vez por figura.
+    if ax.get_legend() is None:
+        ax.legend(
+            loc = 0, ncol = 2, fontsize = 10, markerscale = 10, facecolor = 'lightgrey', edgecolor = 'k')
     # Definición del titulo del gráfico
     fig.suptitle(
         "Ciclo Diario de "+ylabel+" "+nombre_estacion, 
         size = 11, weight = "normal")
     # Guarda la figura
-    fig.savefig(
-        "Output/Plot/CD_"+variable+"_"+nombre_estacion.replace(" ","")+".png", 
-        facecolor = 'w', edgecolor = 'w', dpi = 96)
-    # Cierra la figura
-    plt.close(fig)
+    with etapa("savefig"):
+        fig.savefig(
+            kwargs.get("output_folder", "Output")+"/Plot/CD_"+variable+"_"+nombre_estacion.replace(" ","")+".png", 
+            facecolor = 'w', edgecolor = 'w', dpi = 96)
+    # Cierra la figura, salvo que sea del renderizador
+    cerrar_plantilla(renderizador, plantilla)
     return
\ No newline at end of file
@@ -3,8 +3,26 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-from openpyxl import load_workbook
+from .estadistica_circular import ciclo_direccion
+from .renderizador import obtener_plantilla, cerrar_plantilla
+from .exportacion import guardar_tabla
+from .instrumentacion import etapa, instrumentado
 
+def _plantilla_ciclo_diario_direccion():
+    #Crear figura, los valores pueden ser modificados en función de lo que se necesite.
+    fig, (ax, cbar_ax) = plt.subplots(
+        ncols       = 2,
+        figsize     = (9,6), 
+        gridspec_kw = {'wspace':0.025, 'hspace':0.25, 'left':0.075, 'right':0.925, 'top':0.950, 'bottom':0.1, "width_ratios": [.9, .025]},
+        facecolor   ='lightgrey', 
+        edgecolor   ='w')
+
+    #Definición de etiqueta del eje "x" y el eje "y".
+    ax.set_xlabel("Hora Local [horas]", fontsize = 11, fontweight = "normal", labelpad = 2.5)
+    ax.set_ylabel("Dirección del Viento (°)", fontsize = 11, fontweight = "normal", labelpad = 2.5)
+    return {"fig": fig, "ax": ax, "cbar_ax": cbar_ax}
+
+@instrumentado()
 def ciclo_diario_direccion(df, variable, nombre_estacion, vmin, vmax, **kwargs):
     """
     Descripción: Función para graficar series de tiempo con promedio mensual.
@@ -16,6 +34,9 @@ def ciclo_diario_direccion(df, variable, nombre_estacion, vmin, vmax, **kwargs):
     vmax              (int):    Probabilidad máxima.
     **kwargs               :    Variables que no están definidas en la función directamente, pero que una vez que
                                 ajuste a sus requerimientos, pueden ser cambiadas. Recordar que si se tiene kwargs debe estar definido cuando se llama la función.
+                                renderizador (Renderizador) es opcional, reutiliza la figura entre llamadas.
+                                output_folder (str) es opcional, carpeta con las subcarpetas "Plot" y "Data", por defecto "Output".
+                                exportador (ExportadorTablas) es opcional, junta las tablas y escribe cada archivo una sola vez.
     Ejemplo: 
     ciclo_diario_direccion(
         df              = df, 
@@ -25,56 +46,28 @@ def ciclo_diario_direccion(df, variable, nombre_estacion, vmin, vmax, **kwargs):
         vmax            = 30
         )                                
     """
-    #Limpieza de valores NaN.
-    df = df.filter([variable]).dropna()
-
-    #Creación de diccionario para definir la dirección del viento, en este caso se considera que la dirección esta en el rango de 0° a 360°.
-    step        = 15
-    bins        = np.arange(step/2, 360, step)
-    directions  = {n: ndir for n, ndir in enumerate(np.arange(0, 360+step, step))}
+    # Tabla con índice la dirección del viento en sectores de 15° (0° a 345°, 360° queda en 0°) y en las columnas la hora,
+    # con la frecuencia relativa de cada sector en cada hora. Los valores NaN no se consideran y se omiten las horas sin datos.
+    pivot_table, _ = ciclo_direccion(df, variable, por=("HORA",), nsectores=24)
+    pivot_table = pivot_table.dropna(how="all", axis=1)
+    name_file = kwargs.get("output_folder", "Output")+"/Data/CD_"+variable+"_"+nombre_estacion.replace(" ","")+".xlsx"
+    guardar_tabla(pivot_table, name_file, variable, kwargs.get("exportador"))
     
-    # clasificación de dirección en número de 1 al 16
-    df["nombre_viento"] = np.digitize(x = df[variable], bins=bins)
-    df["nombre_viento"] = df["nombre_viento"].map(directions)
+    # Figura con ejes y etiquetas, se reutiliza si se entrega un renderizador con los mismos vmin y vmax.
+    renderizador = kwargs.get("renderizador")
+    plantilla    = obtener_plantilla(renderizador, ("ciclo_diario_direccion", vmin, vmax), _plantilla_ciclo_diario_direccion)
+    fig, ax, cbar_ax = plantilla["fig"], plantilla["ax"], plantilla["cbar_ax"]
 
-    # Se agrega la columna hora para agilizar tabla pivote
-    df['HORA'] = df.index.hour
-    
-    #función para determinar frecuencia relativa de una SerieFrame
-    freq_relativa = lambda x: 100*x/x.sum()
-    
-    # Tabla pivote con índice la clasificación que se le da al viento y en las columnas la hora, se considera usar la función count para contar los valores que cumplen esa dirección a esa hora.
-    pivot_table = pd.pivot_table(data=df, values = variable, index="nombre_viento",columns="HORA", aggfunc="count")
-    
-    #Determina la frecuencia relativa por cada hora
-    pivot_table = pivot_table.apply(freq_relativa, axis=0)
-    name_file = "Output/Data/CD_"+variable+"_"+nombre_estacion.replace(" ","")+".xlsx"
-    if os.path.isfile(name_file)==True:
-        ExcelWorkbook = load_workbook(name_file)
-        writer = pd.ExcelWriter(name_file, engine = 'openpyxl')
-        writer.book = ExcelWorkbook
-        pivot_table.to_excel(writer, sheet_name=variable)
-        writer.save()
-        writer.close()
-    else:
-        pivot_table.to_excel(name_file, sheet_name=variable)
-    
-    #Crear figura, los valores pueden ser modificados en función de lo que se necesite.
-    fig, (ax, cbar_ax) = plt.subplots(
-        ncols       = 2,
-        figsize     = (9,6), 
-        gridspec_kw = {'wspace':0.025, 'hspace':0.25, 'left':0.075, 'right':0.925, 'top':0.950, 'bottom':0.1, "width_ratios": [.9, .025]},
-        facecolor   ='lightgrey', 
-        edgecolor   ='w')
-    
     #Graficar promedio de los datos.
-    cf = ax.imshow(
-        pivot_table, **{"cmap": "jet", "origin": "lower", "vmin": vmin, "vmax": vmax, "zorder": 0, "aspect":"auto"})
-    plt.colorbar(cf, cax= cbar_ax, ticks = np.arange(vmin, vmax + 5, 5))
-    
-    #Definición de etiqueta del eje "x" y el eje "y".
-    ax.set_xlabel("Hora Local [horas]", fontsize = 11, fontweight = "normal", labelpad = 2.5)
-    ax.set_ylabel("Dirección del Viento (°)", fontsize = 11, fontweight = "normal", labelpad = 2.5)
+    if "imagen" in plantilla:
+        nfilas, ncolumnas = pivot_table.shape
+        plantilla["imagen"].set_data(pivot_table.to_numpy())
+        plantilla["imagen"].set_extent((-0.5, ncolumnas - 0.5, -0.5, nfilas - 0.5))
+    else:
+        cf = ax.imshow(
+            pivot_table, **{"cmap": "jet", "origin": "lower", "vmin": vmin, "vmax": vmax, "zorder": 0, "aspect":"auto"})
+        plt.colorbar(cf, cax= cbar_ax, ticks = np.arange(vmin, vmax + 5, 5))
+        plantilla["imagen"] = cf
 
     # #Definición de números o tipografía del eje "x" o el eje "ylabelfw
     ax.set(xticks = pivot_table.columns, 
@@ -90,9 +83,10 @@ def ciclo_diario_direccion(df, variable, nombre_estacion, vmin, vmax, **kwargs):
         **{"size": 12, "weight": "bold", "pad": 5})
     cbar_ax.set_ylabel(
         "Frecuencia (%)", fontsize = 11, labelpad = 2.5, fontweight="normal")
-    fig.savefig(
-        "Output/Plot/CD_"+variable+"_"+nombre_estacion.replace(" ","")+".png", 
-        facecolor = 'w', edgecolor = 'w', dpi = 96)
-    # Cierra la figura
-    plt.close(fig)
+    with etapa("savefig"):
+        fig.savefig(
+            kwargs.get("output_folder", "Output")+"/Plot/CD_"+variable+"_"+nombre_estacion.replace(" ","")+".png", 
+            facecolor = 'w', edgecolor = 'w', dpi = 96)
+    # Cierra la figura, salvo que sea del renderizador
+    cerrar_plantilla(renderizador, plantilla)
     return
\ No newline at end of file
@@ -1,11 +1,31 @@
 import os
 import numpy as np
 import pandas as pd
-from scipy import interpolate
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-from openpyxl import load_workbook
+from .climatologia import climatologia, tabla_pivote, verificar_datos
+from .renderizador import obtener_plantilla, cerrar_plantilla
+from .exportacion import guardar_tabla
+from .interpolacion import interpolacion_bilineal, grilla_fina
+from .instrumentacion import etapa, instrumentado
 
+def _plantilla_ciclo_estacional():
+    #Crear figura, los valores pueden ser modificados en función de lo que se necesite.
+    fig, (ax, cbar_ax) = plt.subplots(
+        ncols       = 2,
+        figsize     = (9,6), 
+        gridspec_kw = {'wspace':0.025, 'hspace':0.25, 'left':0.075, 'right':0.925, 'top':0.950, 'bottom':0.1, "width_ratios": [.9, .025]},
+        facecolor   ='lightgrey', 
+        edgecolor   ='w')
+
+    # Definición de etiqueta del eje "x" y el eje "y".
+    ax.set_xlabel("Hora", **{"fontsize": 11, "fontweight": "normal", "labelpad": 2.5})
+    ax.set_ylabel("Mes", **{"fontsize": 11, "fontweight": "normal", "labelpad": 2.5})
+    ax.tick_params(axis="both", **{"labelsize": 10, "length": 5, "direction": "in", "width": 1.25, "pad": 5})
+    cbar_ax.tick_params(labelsize = 10)
+    return {"fig": fig, "ax": ax, "cbar_ax": cbar_ax}
+
+@instrumentado()
 def ciclo_estacional(df, variable, nombre_estacion, vmin, vmax, step, clabel, unidad, **kwargs):
     """
     Descripción: Función para graficar ciclo estacional del viento.
@@ -18,6 +38,11 @@ def ciclo_estacional(df, variable, nombre_estacion, vmin, vmax, step, clabel, un
     step              (int):    Valor del paso a paso.
     clabel            (str):    Nombre completo de variable.
     unidad            (str):    Unidad correspondiente a la variable.
+    **kwargs               :    renderizador (Renderizador) es opcional, reutiliza la figura entre llamadas.
+                                output_folder (str) es opcional, carpeta con las subcarpetas "Plot" y "Data", por defecto "Output".
+                                exportador (ExportadorTablas) es opcional, junta las tablas y escribe cada archivo una sola vez.
+                                completitud_minima (float) es opcional, fracción mínima de datos de cada clase (ej. 0.75),
+                                las clases con menos datos no se consideran (ver climatologia).
 
     Ejemplo:
     ciclo_estacional(
@@ -31,57 +56,45 @@ def ciclo_estacional(df, variable, nombre_estacion, vmin, vmax, step, clabel, un
         unidad          = "(%)",
         )
     """
-    #Limpieza de valores NaN.
-    df = df.filter([variable]).dropna()
-
-    # Se agrega la columna hora y mes para tabla pivote
-    df['HORA'] = df.index.hour
-    df['MES']  = df.index.month
-    
-    # Tabla pivote con índice el mes y columna la hora, se considera usar la función mean para mostrar el promedio de los datos.
-    pivote_var  = pd.pivot_table(data=df, values=variable, index="MES", columns="HORA", aggfunc="mean")
+    # Tabla pivote con índice el mes y columna la hora con el promedio de los datos, los valores NaN no se consideran.
+    clima = climatologia(df, [variable], por=("MES", "HORA"), completitud_minima=kwargs.get("completitud_minima"))
+    verificar_datos(clima, variable, kwargs.get("completitud_minima"))
     
     # Guardar pivote en archivo excel
-    name_file = "Output/Data/CE_"+nombre_estacion.replace(" ","")+".xlsx"
-    if os.path.isfile(name_file)==True:
-        ExcelWorkbook = load_workbook(name_file)
-        writer = pd.ExcelWriter(name_file, engine = 'openpyxl')
-        writer.book = ExcelWorkbook
-        pivote_var.to_excel(writer, sheet_name=variable)
-        writer.save()
-        writer.close()
-    else:
-        pivote_var.to_excel(name_file, sheet_name=variable)
+    name_file = kwargs.get("output_folder", "Output")+"/Data/CE_"+nombre_estacion.replace(" ","")+".xlsx"
+    guardar_tabla(tabla_pivote(clima, "promedio", variable), name_file, variable, kwargs.get("exportador"))
 
 
     
-    #Interpolación pivote
+    #Interpolación bilineal del pivote completo (12 meses x 24 horas, las clases sin datos quedan en blanco) a una grilla
+    # de paso 1/n, los pesos se reutilizan entre estaciones y variables.
+    pivote_var = tabla_pivote(clima, "promedio", variable, completa=True)
     n = 5
-    x = np.arange(pivote_var.columns.min() - 1 - 1/n, pivote_var.columns.max() + 1, 1/n )
-    y = np.arange(pivote_var.index.min()   - 1 - 1/n, pivote_var.index.max()   + 1, 1/n )
-    f_var  = interpolate.interp2d(pivote_var.columns , pivote_var.index , pivote_var.values , kind='linear')
-    z_var  = f_var(x, y)
+    x, y   = grilla_fina(pivote_var, n)
+    z_var  = interpolacion_bilineal(pivote_var.columns, pivote_var.index, pivote_var.values, x, y)
     
-    #Crear figura, los valores pueden ser modificados en función de lo que se necesite.
-    fig, (ax, cbar_ax) = plt.subplots(
-        ncols       = 2,
-        figsize     = (9,6), 
-        gridspec_kw = {'wspace':0.025, 'hspace':0.25, 'left':0.075, 'right':0.925, 'top':0.950, 'bottom':0.1, "width_ratios": [.9, .025]},
-        facecolor   ='lightgrey', 
-        edgecolor   ='w')
+    # Figura con ejes y etiquetas, se reutiliza si se entrega un renderizador con los mismos vmin, vmax y step.
+    renderizador = kwargs.get("renderizador")
+    plantilla    = obtener_plantilla(renderizador, ("ciclo_estacional", vmin, vmax, step), _plantilla_ciclo_estacional)
+    fig, ax, cbar_ax = plantilla["fig"], plantilla["ax"], plantilla["cbar_ax"]
+
+    # Se quitan los contornos del gráfico anterior, la barra de colores se mantiene.
+    for elemento in plantilla.pop("elementos", []):
+        elemento.remove()
     
     # Grafico de contornos, correspondiente a la velocidad del viento    
-    cf = ax.contourf(
-        x, y, z_var, **{"levels": np.arange(vmin, vmax + step, step), "cmap": 'jet'})
-    ax.contour(
-        x, y, z_var, **{"levels": np.arange(vmin, vmax + step, step), "colors": "black", "linewidths": 0.1})
+    with etapa("contorno"):
+        cf = ax.contourf(
+            x, y, z_var, **{"levels": np.arange(vmin, vmax + step, step), "cmap": 'jet'})
+        cl = ax.contour(
+            x, y, z_var, **{"levels": np.arange(vmin, vmax + step, step), "colors": "black", "linewidths": 0.1})
+    plantilla["elementos"] = [cf, cl]
 
     # Grafico que corresponde a la barra de colores
-    plt.colorbar(cf, cax= cbar_ax, **{"ticks":  np.arange(vmin, vmax + step, step*5)})
+    if "barra" not in plantilla:
+        plantilla["barra"] = plt.colorbar(cf, cax= cbar_ax, **{"ticks":  np.arange(vmin, vmax + step, step*5)})
     
-    # Definición de etiqueta del eje "x" y el eje "y".
-    ax.set_xlabel("Hora", **{"fontsize": 11, "fontweight": "normal", "labelpad": 2.5})
-    ax.set_ylabel("Mes", **{"fontsize": 11, "fontweight": "normal", "labelpad": 2.5})
+    # Definición de etiqueta de la barra de colores.
     cbar_ax.set_ylabel(clabel+" "+unidad, **{"fontsize": 11, "fontweight": "normal", "labelpad": 2.5})
     
     # Definición de números o tipografía del eje "x", eje "y" y "colorbar"
@@ -91,8 +104,6 @@ def ciclo_estacional(df, variable, nombre_estacion, vmin, vmax, step, clabel, un
         xticklabels = pivote_var.columns,
         yticklabels = ["E", "F", "M", "A", "M", "J", "J", "A", "S", "O", "N", "D"]
         )
-    ax.tick_params(axis="both", **{"labelsize": 10, "length": 5, "direction": "in", "width": 1.25, "pad": 5})
-    cbar_ax.tick_params(labelsize = 10)
 
     # Definición de limites
     ax.set_xlim(pivote_var.columns.min() - 5/(2*n), pivote_var.columns.max() + 5/(2*n))
@@ -102,10 +113,11 @@ def ciclo_estacional(df, variable, nombre_estacion, vmin, vmax, step, clabel, un
     ax.set_title("Ciclo Estacional "+clabel+" "+nombre_estacion, **{"size": 12, "weight": "normal", "pad": 5})
 
     # Guarda la figura
-    fig.savefig(
-        "Output/Plot/CE_"+variable+"_"+nombre_estacion.replace(" ","")+".png", 
-        facecolor = 'w', edgecolor = 'w', dpi = 96)
+    with etapa("savefig"):
+        fig.savefig(
+            kwargs.get("output_folder", "Output")+"/Plot/CE_"+variable+"_"+nombre_estacion.replace(" ","")+".png", 
+            facecolor = 'w', edgecolor = 'w', dpi = 96)
 
-    # Cierra la figura
-    plt.close(fig)
+    # Cierra la figura, salvo que sea del renderizador
+    cerrar_plantilla(renderizador, plantilla)
     return
\ No newline at end of file
@@ -1,11 +1,31 @@
 import os
 import numpy as np
 import pandas as pd
-from scipy import interpolate
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-from openpyxl import load_workbook
+from .climatologia import climatologia, tabla_pivote, verificar_datos
+from .renderizador import obtener_plantilla, cerrar_plantilla
+from .exportacion import guardar_tabla
+from .interpolacion import interpolacion_bilineal, grilla_fina
+from .instrumentacion import etapa, instrumentado
 
+def _plantilla_ciclo_estacional_viento():
+    #Crear figura, los valores pueden ser modificados en función de lo que se necesite.
+    fig, (ax, cbar_ax) = plt.subplots(
+        ncols       = 2,
+        figsize     = (9,6), 
+        gridspec_kw = {'wspace':0.025, 'hspace':0.25, 'left':0.075, 'right':0.925, 'top':0.950, 'bottom':0.1, "width_ratios": [.9, .025]},
+        facecolor   ='lightgrey', 
+        edgecolor   ='w')
+
+    # Definición de etiqueta del eje "x" y el eje "y".
+    ax.set_xlabel("Hora", **{"fontsize": 11, "fontweight": "normal", "labelpad": 2.5})
+    ax.set_ylabel("Mes", **{"fontsize": 11, "fontweight": "normal", "labelpad": 2.5})
+    ax.tick_params(axis="both", **{"labelsize": 10, "length": 5, "direction": "in", "width": 1.25, "pad": 5})
+    cbar_ax.tick_params(labelsize = 10)
+    return {"fig": fig, "ax": ax, "cbar_ax": cbar_ax}
+
+@instrumentado()
 def ciclo_estacional_viento(df, velocidad, direccion, nombre_estacion, vmin, vmax, step, **kwargs):
     """
     Descripción: Función para graficar ciclo estacional del  viento.
@@ -19,65 +39,60 @@ def ciclo_estacional_viento(df, velocidad, direccion, nombre_estacion, vmin, vma
     step              (int):    Valor del paso a paso.
     **kwargs               :    Variables que no están definidas en la función directamente, pero que una vez que
                                 ajuste a sus requerimientos, pueden ser cambiadas. Recordar que si se tiene kwargs debe estar definido cuando se llama la función.
+                                renderizador (Renderizador) es opcional, reutiliza la figura entre llamadas.
+                                output_folder (str) es opcional, carpeta con las subcarpetas "Plot" y "Data", por defecto "Output".
+                                exportador (ExportadorTablas) es opcional, junta las tablas y escribe cada archivo una sola vez.
+                                completitud_minima (float) es opcional, fracción mínima de datos de cada clase (ej. 0.75),
+                                las clases con menos datos no se consideran (ver climatologia).
     """
     #Limpieza de valores NaN.
     df = df.filter([velocidad, direccion]).dropna()
     
-    # Se agrega la columna hora y mes para tabla pivote
-    df['HORA'] = df.index.hour
-    df['MES']  = df.index.month
-    df['udir'] = df[velocidad]*np.sin(df[direccion] * np.pi/180)# + np.pi)
-    df['vdir'] = df[velocidad]*np.cos(df[direccion] * np.pi/180)# + np.pi)
+    # Promedio por mes y hora de la velocidad y de las componentes u y v del viento en una sola pasada.
+    clima = climatologia(df, [velocidad], por=("MES", "HORA"), vectores={"viento": (velocidad, direccion)},
+                         completitud_minima=kwargs.get("completitud_minima"))
 
-    # Tabla pivote con índice el mes y columna la hora, se considera usar la función mean para mostrar el promedio de los datos.
-    pivote_viento = pd.pivot_table(data=df, values=velocidad, index="MES", columns="HORA", aggfunc="mean")
-    pivote_udir   = pd.pivot_table(data=df, values="udir", index="MES", columns="HORA", aggfunc="mean")
-    pivote_vdir   = pd.pivot_table(data=df, values="vdir", index="MES", columns="HORA", aggfunc="mean")
-    
-    name_file = "Output/Data/CE_"+nombre_estacion.replace(" ","")+".xlsx"
-    if os.path.isfile(name_file)==True:
-        ExcelWorkbook = load_workbook(name_file)
-        writer = pd.ExcelWriter(name_file, engine = 'openpyxl')
-        writer.book = ExcelWorkbook
-        pivote_viento.to_excel(writer, sheet_name="viento")
-        writer.save()
-        writer.close()
-    else:
-        pivote_viento.to_excel(name_file, sheet_name="viento")
+    verificar_datos(clima, velocidad, kwargs.get("completitud_minima"))
+
+    # Tabla pivote con índice el mes y columna la hora, se considera el promedio de los datos.
+    name_file = kwargs.get("output_folder", "Output")+"/Data/CE_"+nombre_estacion.replace(" ","")+".xlsx"
+    guardar_tabla(tabla_pivote(clima, "promedio", velocidad), name_file, "viento", kwargs.get("exportador"))
 
+    # Tablas completas (12 meses x 24 horas) para interpolar, las clases sin datos quedan en blanco.
+    pivote_viento = tabla_pivote(clima, "promedio", velocidad, completa=True)
+    pivote_udir   = tabla_pivote(clima, "promedio", "viento_u", completa=True)
+    pivote_vdir   = tabla_pivote(clima, "promedio", "viento_v", completa=True)
 
-    #Interpolación pivote
+
+    #Interpolación bilineal de velocidad, u y v en una sola operación, las tres tablas tienen los mismos meses y horas.
     n = 5
-    x = np.arange(pivote_viento.columns.min() - 1 - 1/n, pivote_viento.columns.max() + 1, 1/n )
-    y = np.arange(pivote_viento.index.min()   - 1 - 1/n, pivote_viento.index.max()   + 1, 1/n )
-    f_viento = interpolate.interp2d(pivote_viento.columns, pivote_viento.index, pivote_viento.values, kind='linear')
-    f_udir   = interpolate.interp2d(pivote_udir.columns, pivote_udir.index, pivote_udir.values, kind='linear')
-    f_vdir   = interpolate.interp2d(pivote_vdir.columns, pivote_vdir.index, pivote_vdir.values, kind='linear')
-    z_viento = f_viento(x, y)
-    u        = f_udir(x, y)
-    v        = f_vdir(x, y)
+    x, y = grilla_fina(pivote_viento, n)
+    z_viento, u, v = interpolacion_bilineal(
+        pivote_viento.columns, pivote_viento.index, np.stack([pivote_viento.values, pivote_udir.values, pivote_vdir.values]), x, y)
     
-    #Crear figura, los valores pueden ser modificados en función de lo que se necesite.
-    fig, (ax, cbar_ax) = plt.subplots(
-        ncols       = 2,
-        figsize     = (9,6), 
-        gridspec_kw = {'wspace':0.025, 'hspace':0.25, 'left':0.075, 'right':0.925, 'top':0.950, 'bottom':0.1, "width_ratios": [.9, .025]},
-        facecolor   ='lightgrey', 
-        edgecolor   ='w')
+    # Figura con ejes y etiquetas, se reutiliza si se entrega un renderizador con los mismos vmin, vmax y step.
+    renderizador = kwargs.get("renderizador")
+    plantilla    = obtener_plantilla(renderizador, ("ciclo_estacional_viento", vmin, vmax, step), _plantilla_ciclo_estacional_viento)
+    fig, ax, cbar_ax = plantilla["fig"], plantilla["ax"], plantilla["cbar_ax"]
+
+    # Se quitan los contornos del gráfico anterior, la barra de colores se mantiene.
+    for elemento in plantilla.pop("elementos", []):
+        elemento.remove()
     
     # Grafico de contornos, correspondiente a la velocidad del viento    
-    cf = ax.contourf(x, y, z_viento, **{"levels": np.arange(vmin, vmax + step, step), "cmap": 'jet'})
-    ax.contour(x, y, z_viento, **{"levels": np.arange(vmin, vmax + step, step), "colors": "black", "linewidths": 0.15})
+    with etapa("contorno"):
+        cf = ax.contourf(x, y, z_viento, **{"levels": np.arange(vmin, vmax + step, step), "cmap": 'jet'})
+    cl = ax.contour(x, y, z_viento, **{"levels": np.arange(vmin, vmax + step, step), "colors": "black", "linewidths": 0.15})
 
     # Grafico que contiene las flechas que representan la dirección del viento
-    ax.quiver(x[1::n], y[1::n], u[1::n, 1::n], v[1::n, 1::n], scale_units='xy', scale=5, units="xy", width=0.025, headwidth=3., headlength=4.)
+    qv = ax.quiver(x[1::n], y[1::n], u[1::n, 1::n], v[1::n, 1::n], scale_units='xy', scale=5, units="xy", width=0.025, headwidth=3., headlength=4.)
+    plantilla["elementos"] = [cf, cl, qv]
     
     # Grafico que corresponde a la barra de colores
-    plt.colorbar(cf, cax= cbar_ax, **{"ticks":  np.arange(vmin, vmax + step*10, step*10)})
+    if "barra" not in plantilla:
+        plantilla["barra"] = plt.colorbar(cf, cax= cbar_ax, **{"ticks":  np.arange(vmin, vmax + step*10, step*10)})
     
-    # #Definición de etiqueta del eje "x", el eje "y" y colorvar
-    ax.set_xlabel("Hora", **{"fontsize": 11, "fontweight": "normal", "labelpad": 2.5})
-    ax.set_ylabel("Mes", **{"fontsize": 11, "fontweight": "normal", "labelpad": 2.5})
+    # #Definición de etiqueta de la colorbar
     cbar_ax.set_ylabel("Velocidad del viento (m/s)", **{"fontsize": 11, "fontweight": "normal", "labelpad": 5})
     
     # #Definición de números o tipografía del eje "x", eje "y" y colorbar
@@ -87,9 +102,7 @@ def ciclo_estacional_viento(df, velocidad, direccion, nombre_estacion, vmin, vma
         xticklabels = pivote_viento.columns,
         yticklabels = ["E", "F", "M", "A", "M", "J", "J", "A", "S", "O", "N", "D"]
         )
-    ax.tick_params(axis="both", **{"labelsize": 10, "length": 5, "direction": "in", "width": 1.25, "pad": 5})
-    cbar_ax.tick_params(labelsize = 10)
-    
+
     # Definición de limites
     ax.set_xlim(pivote_viento.columns.min() - 5/(2*n), pivote_viento.columns.max() + 5/(2*n))
     ax.set_ylim(pivote_viento.index.min()   - 5/(2*n), pivote_viento.index.max()   + 5/(2*n))
@@ -98,10 +111,11 @@ def ciclo_estacional_viento(df, velocidad, direccion, nombre_estacion, vmin, vma
     ax.set_title("Ciclo Estacional del viento "+nombre_estacion, **{"size": 12, "weight": "normal", "pad": 5})
     
     # Guarda la figura
-    fig.savefig(
-        "Output/Plot/CE_Viento_"+nombre_estacion.replace(" ","")+".png", 
-        facecolor = 'w', edgecolor = 'w', dpi = 96)
+    with etapa("savefig"):
+        fig.savefig(
+            kwargs.get("output_folder", "Output")+"/Plot/CE_Viento_"+nombre_estacion.replace(" ","")+".png", 
+            facecolor = 'w', edgecolor = 'w', dpi = 96)
     
-    # Cierra la figura
-    plt.close(fig)
+    # Cierra la figura, salvo que sea del renderizador
+    cerrar_plantilla(renderizador, plantilla)
     return
\ No newline at end of file
@@ -0,0 +1,259 @@
+import numpy as np
+import pandas as pd
+from .eje_tiempo import EjeTiempo, eje_tiempo, TEMPORADA_MES
+from .instrumentacion import instrumentado
+
+# Clases de calendario disponibles: número de clases y primer valor (la hora parte en 0 y el mes en 1).
+CLASES_CALENDARIO = {
+    "HORA"      : (24, 0),
+    "MES"       : (12, 1),
+    "DIA_ANIO"  : (366, 1),
+    "DIA_SEMANA": (7, 0),
+    "TEMPORADA" : (4, 0),
+    }
+
+def _campo_calendario(fechas, clase):
+    if clase == "HORA":
+        return fechas.hour
+    elif clase == "MES":
+        return fechas.month
+    elif clase == "DIA_ANIO":
+        return fechas.dayofyear
+    elif clase == "DIA_SEMANA":
+        return fechas.dayofweek
+    elif clase == "TEMPORADA":
+        return TEMPORADA_MES[np.asarray(fechas.month.fillna(1), dtype=np.intp) - 1]
+    raise ValueError("clase debe ser una de "+str(list(CLASES_CALENDARIO))+", no "+repr(clase))
+
+def codigos_calendario(fechas, por=("MES", "HORA"), desfase_horas=0):
+    """
+    Descripción: Código entero de clase para cada fecha, combinando las clases de calendario pedidas.
+                 Para por=("MES", "HORA") el código es (mes - 1)*24 + hora, es decir 288 clases.
+                 Las fechas nulas (NaT) quedan con código -1.
+                 Si se entrega un EjeTiempo los códigos se calculan una sola vez y quedan guardados en el eje, las
+                 siguientes llamadas con el mismo eje (ej. cubo.eje) los reutilizan.
+
+    fechas  (DatetimeIndex):    Fechas de los datos, o su EjeTiempo.
+    por             (tuple):    Clases de calendario, "MES", "HORA", "DIA_ANIO", "DIA_SEMANA" y/o "TEMPORADA".
+    desfase_horas     (int):    Horas que se suman a las fechas antes de clasificar (ej. para pasar de UTC a hora local).
+    """
+    for clase in por:
+        if clase not in CLASES_CALENDARIO:
+            raise ValueError("clase debe ser una de "+str(list(CLASES_CALENDARIO))+", no "+repr(clase))
+    forma = tuple(CLASES_CALENDARIO[clase][0] for clase in por)
+    eje   = eje_tiempo(fechas)
+    if eje is not None:
+        return eje.codigos(por, CLASES_CALENDARIO, desfase_horas), forma
+
+    # Fechas sin paso regular: campos de pandas en cada llamada.
+    fechas = pd.DatetimeIndex(fechas) + pd.Timedelta(hours=desfase_horas)
+    codigo = np.zeros(len(fechas), dtype=np.intp)
+    for clase in por:
+        n, inicio = CLASES_CALENDARIO[clase]
+        codigo = codigo*n + (np.asarray(_campo_calendario(fechas, clase), dtype=np.intp) - inicio)
+    codigo[np.asarray(fechas.isna())] = -1
+    return codigo, forma
+
+def horas_por_clase(fechas, por=("MES", "HORA")):
+    """
+    Descripción: Número de datos esperados en cada clase de calendario: pasos de la grilla regular completa entre la
+                 primera y la última fecha, incluyendo las horas que no aparecen en las fechas.
+
+    fechas  (DatetimeIndex):    Fechas de los datos con paso regular, o su EjeTiempo.
+    por             (tuple):    Clases de calendario.
+    """
+    eje = eje_tiempo(fechas)
+    if eje is None:
+        raise ValueError("Las fechas deben ser crecientes y con paso regular para calcular la completitud.")
+    if eje.contiguo == False:
+        eje = EjeTiempo(eje.inicio, np.timedelta64(eje.paso, eje.unidad), n=int(eje.desfases[-1]) + 1)
+    codigos, forma = codigos_calendario(eje, por)
+    return np.bincount(codigos, minlength=int(np.prod(forma)))
+
+def _excluir_incompletas(tablas, esperadas, completitud_minima):
+    # Fracción de datos válidos de cada clase, las clases bajo el mínimo quedan sin datos (conteo 0 y estadísticos NaN).
+    with np.errstate(invalid="ignore", divide="ignore"):
+        completitud = np.where(esperadas[:, None] > 0, tablas["conteo"]/esperadas[:, None], 0.0)
+    excluir = completitud < completitud_minima
+    for clave, tabla in tablas.items():
+        tabla[excluir] = 0 if clave in ("conteo", "suma") else np.nan
+    tablas["completitud"] = completitud
+    return tablas
+
+def indice_clases(por=("MES", "HORA")):
+    """
+    Descripción: Índice de pandas con la etiqueta de cada código entregado por codigos_calendario.
+    """
+    niveles = [np.arange(CLASES_CALENDARIO[clase][1], CLASES_CALENDARIO[clase][1] + CLASES_CALENDARIO[clase][0]) for clase in por]
+    if len(por) == 1:
+        return pd.Index(niveles[0], name=por[0])
+    return pd.MultiIndex.from_product(niveles, names=list(por))
+
+def _cuantil_ordenado(ordenados, inicio, conteo, percentil, dtype):
+    # Interpolación lineal de np.percentile, replicada para todas las clases a la vez.
+    if ordenados.size == 0:
+        # Ninguna clase tiene datos (ej. una variable vacía o un periodo sin datos), todo queda NaN como en pandas.
+        return np.full(conteo.shape, np.nan, dtype=dtype)
+    q       = np.true_divide(percentil, 100)
+    virtual = (conteo - 1)*q
+    previo  = np.floor(virtual)
+    gamma   = virtual - previo
+    previo  = previo.astype(np.intp)
+    siguiente = np.minimum(previo + 1, conteo - 1)
+    vacio   = conteo == 0
+    a = ordenados[np.where(vacio, 0, inicio + previo)]
+    b = ordenados[np.where(vacio, 0, inicio + siguiente)]
+    # np.percentile opera en el tipo de los datos con gamma como escalar de Python.
+    t = gamma.astype(dtype)
+    diferencia = b - a
+    resultado  = a + diferencia*t
+    mayor = gamma >= 0.5
+    resultado[mayor] = (b - diferencia*(1 - gamma).astype(dtype))[mayor]
+    resultado[vacio] = np.nan
+    return resultado
+
+def estadisticos_por_clase(valores, codigos, nclases, percentiles=()):
+    """
+    Descripción: Conteo, suma, promedio y percentiles de muchas series a la vez, agrupadas por un código entero de clase.
+                 Se hace un solo np.bincount para conteo y suma, y un solo ordenamiento para todos los percentiles.
+                 Los NaN y los códigos negativos se ignoran. Los percentiles usan la interpolación lineal de np.percentile.
+                 Los conteos, promedios y percentiles son iguales a los de pandas. Los promedios se calculan con
+                 groupby().mean() de todas las series a la vez, que suma en el tipo de los datos (float32) con
+                 compensación; la suma en float64 de np.bincount puede diferir en el último bit y cambiar los contornos.
+
+    valores    (np.ndarray):    Arreglo (tiempo, serie) con los datos.
+    codigos    (np.ndarray):    Código de clase de cada tiempo, entre 0 y nclases - 1.
+    nclases           (int):    Número de clases.
+    percentiles     (tuple):    Percentiles a calcular, entre 0 y 100 (ej. (5, 95)).
+
+    Entrega un diccionario con arreglos (clase, serie): "conteo", "suma", "promedio" y "P05", "P95", etc.
+    """
+    valores = np.asarray(valores)
+    if valores.ndim == 1:
+        valores = valores[:, None]
+    codigos = np.asarray(codigos, dtype=np.intp)
+    T, K    = valores.shape
+    dtype   = valores.dtype if valores.dtype.kind == 'f' else np.dtype(np.float64)
+
+    # Código combinado (serie, clase) para contar todas las series en un solo bincount.
+    valido     = ~np.isnan(valores) & (codigos >= 0)[:, None]
+    combinado  = (codigos[:, None] + nclases*np.arange(K, dtype=np.intp)[None, :])[valido]
+    x          = valores[valido]
+    conteo     = np.bincount(combinado, minlength=nclases*K)
+    suma       = np.bincount(combinado, weights=x, minlength=nclases*K)
+    clase    = codigos >= 0
+    promedio = pd.DataFrame(valores[clase].astype(dtype, copy=False)).groupby(codigos[clase]).mean()
+    promedio = np.array(promedio.reindex(range(nclases)).to_numpy(dtype=dtype).T.reshape(-1))
+    resultado = {"conteo": conteo, "suma": suma, "promedio": promedio}
+
+    if len(percentiles) > 0:
+        orden     = np.lexsort((x, combinado))
+        ordenados = x[orden].astype(dtype)
+        inicio    = np.cumsum(conteo) - conteo
+        for p in percentiles:
+            resultado[nombre_percentil(p)] = _cuantil_ordenado(ordenados, inicio, conteo, p, dtype)
+    return {clave: valor.reshape(K, nclases).T for clave, valor in resultado.items()}
+
+def nombre_percentil(p):
+    """
+    Descripción: Nombre de la columna de un percentil, ej. 5 -> "P05", 95 -> "P95", 99.5 -> "P99.5".
+    """
+    return "P"+("{:02d}".format(int(p)) if float(p).is_integer() else str(p))
+
+def componentes_vector(magnitud, direccion):
+    """
+    Descripción: Componentes u (este) y v (norte) de un vector dado por magnitud y dirección en grados desde el norte.
+    """
+    u = magnitud*np.sin(direccion * np.pi/180)
+    v = magnitud*np.cos(direccion * np.pi/180)
+    return u, v
+
+@instrumentado()
+def climatologia(df, variables, por=("MES", "HORA"), percentiles=(), vectores=None, completitud_minima=None):
+    """
+    Descripción: Climatología de varias variables en una sola pasada: conteo, promedio y percentiles por clase de calendario.
+
+    df          (Dataframe):    Conjunto de datos con índice de fechas.
+    variables        (list):    Variables a considerar.
+    por             (tuple):    Clases de calendario, ("HORA",), ("MES",) o ("MES", "HORA").
+    percentiles     (tuple):    Percentiles a calcular (ej. (5, 95)).
+    vectores         (dict):    Vectores a promediar por componentes, {nombre: (magnitud, dirección)}.
+                                Se agregan las variables nombre+"_u" y nombre+"_v".
+    completitud_minima (float): Fracción mínima de datos válidos de cada clase respecto a las horas del periodo de df
+                                (ej. 0.75), las clases con menos datos quedan con conteo 0 y sin estadísticos.
+                                Se agrega el estadístico "completitud"; con 0 solo se agrega, sin excluir clases.
+
+    Entrega un DataFrame con índice de clases y columnas (estadístico, variable). Las clases sin datos quedan con conteo 0.
+
+    Ejemplo:
+        clima = climatologia(df, ["M-TEMP", "M-HR"], por=("HORA",), percentiles=(5, 95))
+        clima["P95"]["M-TEMP"]
+    """
+    variables = list(variables)
+    columnas  = [df[v].to_numpy() for v in variables]
+    for nombre, (magnitud, direccion) in (vectores or {}).items():
+        u, v = componentes_vector(df[magnitud], df[direccion])
+        columnas  += [u.to_numpy(), v.to_numpy()]
+        variables += [nombre+"_u", nombre+"_v"]
+    codigos, forma = codigos_calendario(df.index, por)
+    valores  = np.column_stack(columnas) if len(columnas) > 0 else np.empty((len(df), 0))
+    tablas   = estadisticos_por_clase(valores, codigos, int(np.prod(forma)), percentiles)
+    if completitud_minima is not None:
+        tablas = _excluir_incompletas(tablas, horas_por_clase(df.index, por), completitud_minima)
+    indice   = indice_clases(por)
+    return pd.concat(
+        {clave: pd.DataFrame(tabla, index=indice, columns=variables) for clave, tabla in tablas.items()}, axis=1)
+
+@instrumentado()
+def climatologia_cubo(cubo, variables=None, por=("MES", "HORA"), percentiles=(), completitud_minima=None):
+    """
+    Descripción: Climatología de todas las estaciones y variables de un CuboEstaciones en una sola llamada.
+
+    cubo   (CuboEstaciones):    Datos de las estaciones.
+    variables        (list):    Variables a considerar, por defecto todas.
+    por             (tuple):    Clases de calendario.
+    percentiles     (tuple):    Percentiles a calcular.
+    completitud_minima (float): Fracción mínima de datos válidos de cada clase, ver climatologia().
+
+    Entrega un diccionario con arreglos (estación, clase, variable) y la clave "clases" con el índice de clases.
+    """
+    variables = cubo.variables if variables is None else list(variables)
+    v = [cubo.variables.index(variable) for variable in variables]
+    S, T, _ = cubo.valores.shape
+    valores = np.moveaxis(cubo.valores[:, :, v], 1, 0).reshape(T, S*len(v))
+    codigos, forma = codigos_calendario(cubo.eje, por)
+    nclases = int(np.prod(forma))
+    tablas  = estadisticos_por_clase(valores, codigos, nclases, percentiles)
+    if completitud_minima is not None:
+        tablas = _excluir_incompletas(tablas, horas_por_clase(cubo.eje, por), completitud_minima)
+    resultado = {clave: np.moveaxis(tabla.reshape(nclases, S, len(v)), 1, 0) for clave, tabla in tablas.items()}
+    resultado["clases"] = indice_clases(por)
+    return resultado
+
+def tabla_pivote(clima, estadistico, variable, completa=False):
+    """
+    Descripción: Tabla (MES x HORA) de un estadístico, como pd.pivot_table: sin las filas y columnas que no tienen datos.
+                 Con completa=True se mantienen los 12 meses y las 24 horas, las clases sin datos quedan como NaN
+                 (ej. para interpolar en la grilla fija de los ciclos estacionales).
+    """
+    conteo = clima["conteo"][variable].unstack("HORA")
+    tabla  = clima[estadistico][variable].unstack("HORA").where(conteo > 0)
+    if completa == True:
+        return tabla
+    return tabla.dropna(how="all", axis=0).dropna(how="all", axis=1)
+
+def verificar_datos(clima, variable, completitud_minima=None):
+    """
+    Descripción: ValueError si ninguna clase de la climatología tiene datos de la variable, ya sea porque la variable
+                 no tiene datos o porque ninguna clase alcanza la completitud mínima.
+
+    clima       (Dataframe):    Resultado de climatologia().
+    variable          (str):    Variable a verificar.
+    completitud_minima (float): Completitud mínima usada en climatologia(), para el mensaje.
+    """
+    if (clima["conteo"][variable] > 0).any():
+        return
+    if completitud_minima is not None and "completitud" in clima:
+        raise ValueError("Ninguna clase de {} alcanza completitud_minima={} (completitud máxima por clase {:.2f}).".format(
+            variable, completitud_minima, float(np.nanmax(clima["completitud"][variable].to_numpy(), initial=0))))
+    raise ValueError("La variable {} no tiene datos.".format(variable))
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+from .eje_tiempo import EjeTiempo, eje_tiempo
+from .climatologia import CLASES_CALENDARIO, codigos_calendario
+
+# Fracción mínima de datos válidos para considerar completo un periodo o una clase (criterio usual del 75%).
+UMBRAL_COMPLETITUD = 0.75
+
+def bloque_series(datos):
+    """
+    Descripción: Arreglo (tiempo, serie) sobre la grilla regular completa, su EjeTiempo contiguo y el índice de las series
+                 ((estación, variable) para un cubo, variable para un DataFrame). Las horas que faltan quedan como NaN.
+
+    datos (CuboEstaciones/DataFrame):  Datos de varias estaciones, o de una estación con índice de fechas horario.
+    """
+    if hasattr(datos, "valores") and hasattr(datos, "eje"):
+        S, T, V = datos.valores.shape
+        valores = np.moveaxis(datos.valores, 1, 0).reshape(T, S*V)
+        series  = pd.MultiIndex.from_product([datos.ids, datos.variables], names=["estacion", "variable"])
+        eje     = datos.eje
+    else:
+        valores = datos.to_numpy(dtype=np.float64) if len(set(datos.dtypes)) > 1 else datos.to_numpy()
+        series  = pd.Index(datos.columns, name="variable")
+        eje     = eje_tiempo(datos.index)
+        if eje is None:
+            raise ValueError("Las fechas deben ser crecientes y con paso regular.")
+    if eje.contiguo == False:
+        # Las horas que faltan en el índice son huecos de todas las series.
+        completo = np.full((int(eje.desfases[-1]) + 1, valores.shape[1]), np.nan, dtype=valores.dtype)
+        completo[eje.desfases] = valores
+        valores = completo
+        eje     = EjeTiempo(eje.inicio, np.timedelta64(eje.paso, eje.unidad), n=len(completo))
+    return valores, eje, series
+
+def rachas_nulas(valido):
+    """
+    Descripción: Codificación por rachas (run-length) de los huecos de muchas series a la vez, sin recorrer las series.
+
+    valido     (np.ndarray):    Arreglo booleano (tiempo, serie), True donde hay dato.
+
+    Entrega (serie, inicio, largo) de cada hueco, ordenados por serie y luego por inicio.
+    """
+    valido = np.asarray(valido, dtype=bool)
+    if valido.ndim == 1:
+        valido = valido[:, None]
+    nulo = np.zeros((valido.shape[1], valido.shape[0] + 2), dtype=np.int8)
+    nulo[:, 1:-1] = ~valido.T
+    cambio = np.diff(nulo, axis=1)
+    serie, inicio = np.nonzero(cambio == 1)
+    _, fin = np.nonzero(cambio == -1)
+    return serie, inicio, fin - inicio
+
+def lista_huecos(datos, minimo=1):
+    """
+    Descripción: Lista de huecos (periodos sin datos) de cada serie.
+
+    datos (CuboEstaciones/DataFrame):  Datos de varias estaciones, o de una estación con índice de fechas horario.
+    minimo            (int):    Largo mínimo de los huecos a entregar, en pasos (horas).
+
+    Entrega un DataFrame con las columnas de la serie (estación y/o variable), "inicio", "fin" (última fecha sin dato)
+    y "pasos" (largo del hueco).
+
+    Ejemplo:
+        lista_huecos(cubo, minimo=24*7)
+    """
+    valores, eje, series = bloque_series(datos)
+    serie, inicio, largo = rachas_nulas(~np.isnan(valores))
+    elegido = largo >= minimo
+    serie, inicio, largo = serie[elegido], inicio[elegido], largo[elegido]
+    paso  = np.timedelta64(eje.paso, eje.unidad)
+    tabla = series[serie].to_frame(index=False)
+    tabla["inicio"] = pd.DatetimeIndex(eje.inicio + inicio*paso)
+    tabla["fin"]    = pd.DatetimeIndex(eje.inicio + (inicio + largo - 1)*paso)
+    tabla["pasos"]  = largo
+    return tabla
+
+def resumen_completitud(datos):
+    """
+    Descripción: Resumen de completitud de cada serie: fracción de datos válidos, primer y último dato, número de huecos
+                 y hueco más largo, calculado para todas las series en una pasada.
+
+    datos (CuboEstaciones/DataFrame):  Datos de varias estaciones, o de una estación con índice de fechas horario.
+
+    Ejemplo:
+        resumen_completitud(cubo).sort_values("completitud")
+    """
+    valores, eje, series = bloque_series(datos)
+    valido = ~np.isnan(valores)
+    T, K   = valido.shape
+    serie, inicio, largo = rachas_nulas(valido)
+    paso   = np.timedelta64(eje.paso, eje.unidad)
+
+    # Hueco más largo de cada serie: el primero en orden (serie, -largo, inicio).
+    orden   = np.lexsort((inicio, -largo, serie))
+    primero = orden[np.r_[True, serie[orden][1:] != serie[orden][:-1]]] if len(serie) > 0 else np.zeros(0, dtype=np.intp)
+    maximo  = np.zeros(K, dtype=np.int64)
+    desde   = np.full(K, np.datetime64("NaT"), dtype=eje.inicio.dtype)
+    maximo[serie[primero]] = largo[primero]
+    desde[serie[primero]]  = eje.inicio + inicio[primero]*paso
+
+    hay    = valido.any(axis=0)
+    primer = np.where(hay, valido.argmax(axis=0), 0)
+    ultimo = np.where(hay, T - 1 - valido[::-1].argmax(axis=0), 0)
+    return pd.DataFrame({
+        "completitud"       : valido.sum(axis=0)/max(T, 1),
+        "validos"           : valido.sum(axis=0),
+        "primer_dato"       : pd.DatetimeIndex(np.where(hay, eje.inicio + primer*paso, np.datetime64("NaT"))),
+        "ultimo_dato"       : pd.DatetimeIndex(np.where(hay, eje.inicio + ultimo*paso, np.datetime64("NaT"))),
+        "huecos"            : np.bincount(serie, minlength=K),
+        "hueco_maximo"      : maximo,
+        "inicio_hueco_maximo": pd.DatetimeIndex(desde),
+        }, index=series)
+
+def _codigos_periodo(eje, por):
+    # Código combinado de las clases, "ANIO" se cuenta desde el primer año del eje.
+    codigo  = np.zeros(len(eje), dtype=np.intp)
+    niveles = []
+    for clase in por:
+        if clase == "ANIO":
+            anio = eje.campo("ANIO").astype(np.intp)
+            n, inicio = int(anio[-1] - anio[0]) + 1, int(anio[0])
+            valores = anio
+        else:
+            n, inicio = CLASES_CALENDARIO[clase]
+            valores = codigos_calendario(eje, (clase,))[0] + inicio
+        codigo = codigo*n + (valores - inicio)
+        niveles.append(np.arange(inicio, inicio + n))
+    indice = pd.Index(niveles[0], name=por[0]) if len(por) == 1 else pd.MultiIndex.from_product(niveles, names=list(por))
+    return codigo, indice
+
+def completitud(datos, por=("ANIO", "MES")):
+    """
+    Descripción: Fracción de datos válidos de cada serie por periodo o clase de calendario (ej. por año y mes, o por hora),
+                 respecto a las horas de la grilla completa en ese periodo.
+
+    datos (CuboEstaciones/DataFrame):  Datos de varias estaciones, o de una estación con índice de fechas horario.
+    por             (tuple):    Periodos o clases: "ANIO" y las clases de calendario ("MES", "HORA", ...).
+
+    Entrega un DataFrame (periodo x serie), los periodos fuera del rango de fechas quedan NaN.
+
+    Ejemplo:
+        completitud(cubo, por=("ANIO",)) >= UMBRAL_COMPLETITUD
+    """
+    valores, eje, series = bloque_series(datos)
+    if len(eje) == 0:
+        return pd.DataFrame(np.zeros((0, len(series))), columns=series)
+    codigo, indice = _codigos_periodo(eje, tuple(por))
+    nclases  = len(indice)
+    valido   = ~np.isnan(valores)
+    K        = valido.shape[1]
+    esperado = np.bincount(codigo, minlength=nclases)
+    combinado = (codigo[:, None] + nclases*np.arange(K, dtype=np.intp)[None, :])[valido]
+    conteo   = np.bincount(combinado, minlength=nclases*K).reshape(K, nclases).T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fraccion = conteo/esperado[:, None]
+    return pd.DataFrame(np.where(esperado[:, None] > 0, fraccion, np.nan), index=indice, columns=series)
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+from .climatologia import codigos_calendario, horas_por_clase
+from .exportacion import guardar_tabla
+from .instrumentacion import instrumentado
+
+# Límites de las clases de velocidad del viento (m/s), bajo el primer límite se considera calma.
+BINS_VELOCIDAD = np.array([0.5, 2.10, 3.60, 5.70, 8.80, 11.10])
+
+# Nombres de los sectores de las rosas de 4, 8 y 16 direcciones.
+NOMBRES_DIRECCIONES = {
+    4 : 'N E S W',
+    8 : 'N NE E SE S SW W NW',
+    16: 'N NNE NE ENE E ESE SE SSE S SSW SW WSW W WNW NW NNW',
+    }
+
+def nombres_direcciones(nrosa):
+    """
+    Descripción: Nombre de cada sector de la rosa, repitiendo el primero al final (ej. N ... N) para cerrar el círculo.
+                 Para un número de sectores sin nombres se usa el ángulo central del sector en grados.
+    """
+    if nrosa in NOMBRES_DIRECCIONES:
+        nombres = NOMBRES_DIRECCIONES[nrosa].split()
+    else:
+        nombres = ["{:g}°".format(round(n*360/nrosa, 2)) for n in range(nrosa)]
+    return np.array(nombres + nombres[:1])
+
+def escala_velocidad(bins_vel=BINS_VELOCIDAD):
+    """
+    Descripción: Nombre de cada clase de velocidad, ej. 'Calma', '0,50 - 2,10', ..., '>= 11,10'.
+    """
+    texto = ["{:.2f}".format(b).replace(".", ",") for b in bins_vel]
+    return ['Calma'] + [texto[n]+' - '+texto[n+1] for n in range(len(texto) - 1)] + ['>= '+texto[-1]]
+
+def histograma_rosa(velocidad, direccion, nrosa=16, bins_vel=BINS_VELOCIDAD, grupos=None, ngrupos=None):
+    """
+    Descripción: Conteo conjunto (clase de velocidad x sector de dirección) con un solo np.bincount sobre un código entero.
+                 Acepta cualquier número de sectores y límites de velocidad, y varias series (estaciones) y grupos
+                 (ej. meses u horas) a la vez. Los pares con NaN no se cuentan.
+
+    velocidad  (np.ndarray):    Velocidad del viento, de dimensiones (tiempo,) o (serie, tiempo).
+    direccion  (np.ndarray):    Dirección del viento en grados, de las mismas dimensiones que velocidad.
+    nrosa             (int):    Número de sectores de dirección, el primero centrado en el norte.
+    bins_vel   (np.ndarray):    Límites de las clases de velocidad, la clase 0 es calma.
+    grupos     (np.ndarray):    Código de grupo de cada tiempo, entre 0 y ngrupos - 1 (opcional, negativos se ignoran).
+    ngrupos           (int):    Número de grupos, por defecto el mayor código más uno.
+
+    Entrega un arreglo de conteos de dimensiones (serie, grupo, clase de velocidad, sector), sin las dimensiones
+    de serie o grupo si no se entregan.
+    """
+    velocidad = np.asarray(velocidad, dtype=np.float64)
+    direccion = np.asarray(direccion, dtype=np.float64)
+    lote      = velocidad.ndim == 2
+    agrupado  = grupos is not None
+    velocidad = np.atleast_2d(velocidad)
+    direccion = np.atleast_2d(direccion)
+    S, T      = velocidad.shape
+    nvel      = len(bins_vel) + 1
+    if agrupado == False:
+        grupos, ngrupos = np.zeros(T, dtype=np.intp), 1
+    else:
+        grupos  = np.asarray(grupos, dtype=np.intp)
+        ngrupos = int(grupos.max()) + 1 if ngrupos is None else int(ngrupos)
+
+    # Clasificación: el sector se obtiene con el mismo límite a step/2 del norte que np.digitize en la rosa original.
+    step   = 360/nrosa
+    clase  = np.digitize(velocidad, bins=bins_vel)
+    sector = np.digitize(direccion, bins=step/2 + step*np.arange(nrosa)) % nrosa
+    valido = ~np.isnan(velocidad) & ~np.isnan(direccion) & (grupos >= 0)[None, :]
+    codigo = ((np.arange(S)[:, None]*ngrupos + grupos[None, :])*nvel + clase)*nrosa + sector
+    conteo = np.bincount(codigo[valido], minlength=S*ngrupos*nvel*nrosa).reshape(S, ngrupos, nvel, nrosa)
+    if agrupado == False:
+        conteo = conteo[:, 0]
+    if lote == False:
+        conteo = conteo[0]
+    return conteo
+
+@instrumentado()
+def clasificando_viento(df, nrosa, var_vientos, var_direccion, nombre_estacion, bins_vel=BINS_VELOCIDAD, data_folder="Output/Data", exportador=None):
+    """
+    Descripción: Tabla de la rosa de los vientos: porcentaje por clase de velocidad y sector de dirección, sin calmas.
+                 No modifica df. Se guarda la tabla de conteos en "<data_folder>/rosadelosviento_<estación>.xlsx".
+
+    df          (Dataframe):    Conjunto de datos sin NaN en velocidad y dirección.
+    nrosa             (int):    Número de sectores de la rosa.
+    var_vientos       (str):    Variable que representa a los vientos.
+    var_direccion     (str):    Variable que representa a los direccion.
+    nombre_estacion   (str):    Nombre de la estación de monitoreo.
+    bins_vel   (np.ndarray):    Límites de las clases de velocidad.
+    data_folder       (str):    Carpeta donde se guarda la tabla.
+    exportador (ExportadorTablas):  Exportador del reporte (opcional), la tabla se escribe junto con las demás.
+    """
+    name_directions = nombres_direcciones(nrosa)
+    conteo = histograma_rosa(df[var_vientos], df[var_direccion], nrosa, bins_vel)
+
+    # Tabla pivote, igual que pd.pivot_table solo se incluyen las clases de velocidad con datos.
+    pivote = pd.DataFrame(
+        conteo,
+        index   = pd.Index(escala_velocidad(bins_vel), name="clase_velocidad"),
+        columns = pd.Index(name_directions[:-1], name="clase_direccion"))
+    pivote = pivote[conteo.sum(axis=1) > 0]
+    guardar_tabla(pivote, data_folder+"/rosadelosviento_"+nombre_estacion.replace(" ","")+".xlsx", "Sheet1", exportador)
+    calmas = conteo[0].sum()*100/len(df)
+    pivote = pivote.drop('Calma', errors="ignore")
+    pivote = pivote*100/pivote.sum().sum()
+    return pivote, calmas, name_directions
+
+def rosa_cubo(cubo, velocidad="M-VEL", direccion="M-DIR", nrosa=16, bins_vel=BINS_VELOCIDAD, por=None, completitud_minima=None):
+    """
+    Descripción: Conteos de la rosa de los vientos de todas las estaciones de un CuboEstaciones en una sola llamada.
+
+    cubo   (CuboEstaciones):    Datos de las estaciones.
+    velocidad         (str):    Variable de velocidad del viento.
+    direccion         (str):    Variable de dirección del viento.
+    nrosa             (int):    Número de sectores.
+    bins_vel   (np.ndarray):    Límites de las clases de velocidad.
+    por             (tuple):    Clases de calendario para separar los conteos (ej. ("MES",) o ("MES", "HORA")).
+    completitud_minima (float): Fracción mínima de horas con velocidad y dirección de cada grupo (ej. 0.75), los grupos
+                                con menos datos quedan con conteo 0. Sin grupos se usa todo el periodo del cubo.
+
+    Entrega conteos (estación, grupo, clase de velocidad, sector), con un solo grupo si por es None.
+    """
+    v = cubo.valores[:, :, cubo.variables.index(velocidad)]
+    d = cubo.valores[:, :, cubo.variables.index(direccion)]
+    if por is None:
+        conteo    = histograma_rosa(v, d, nrosa, bins_vel)[:, None]
+        esperadas = np.array([len(cubo.eje)])
+    else:
+        codigos, forma = codigos_calendario(cubo.eje, por)
+        conteo    = histograma_rosa(v, d, nrosa, bins_vel, grupos=codigos, ngrupos=int(np.prod(forma)))
+        esperadas = horas_por_clase(cubo.eje, por)
+    if completitud_minima is not None:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            completitud = np.where(esperadas > 0, conteo.sum(axis=(2, 3))/esperadas, 0.0)
+        conteo[completitud < completitud_minima] = 0
+    return conteo
@@ -0,0 +1,112 @@
+from functools import lru_cache
+import numpy as np
+
+# Modos de decimación de decimar().
+MODOS_DECIMACION = ("minmax", "m4", "pixel")
+
+def _celda(valores, limites, n):
+    # Índice de pixel de cada valor, los valores fuera de los límites quedan en -1 o n. Con límites de ancho cero
+    # (ej. una serie de un punto o constante) todos los valores quedan en la celda 0.
+    inicio, fin = limites
+    if fin == inicio:
+        return np.zeros(np.shape(valores), dtype=np.intp)
+    return np.clip(np.floor((valores - inicio)/(fin - inicio)*n), -1, n).astype(np.intp)
+
+def decimar(x, y, ancho, alto, xlim, ylim, modo="m4"):
+    """
+    Descripción: Índices de los puntos que se dibujan al reducir una serie a la resolución de la figura.
+                 El número de puntos queda acotado por el número de pixeles, sin importar el largo de la serie.
+
+                 "minmax": mínimo y máximo de cada columna de pixeles.
+                 "m4"    : primero, último, mínimo y máximo de cada columna (M4), para gráficos de líneas.
+                 "pixel" : un punto por pixel ocupado (columna x fila), para gráficos de puntos.
+
+    x          (np.ndarray):    Valores del eje "x" (ej. fechas como números de matplotlib).
+    y          (np.ndarray):    Valores del eje "y", sin NaN.
+    ancho             (int):    Número de columnas de pixeles de los ejes.
+    alto              (int):    Número de filas de pixeles de los ejes, solo se usa en el modo "pixel".
+    xlim            (tuple):    Límites del eje "x".
+    ylim            (tuple):    Límites del eje "y".
+    modo              (str):    "minmax", "m4" o "pixel".
+
+    Entrega los índices ordenados de los puntos que se mantienen.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    columna = _celda(x, xlim, ancho)
+    if modo == "pixel":
+        fila = _celda(y, ylim, alto)
+        _, indices = np.unique((columna + 1)*(alto + 2) + fila + 1, return_index=True)
+        return np.sort(indices)
+    elif modo not in MODOS_DECIMACION:
+        raise ValueError("modo debe ser uno de "+str(MODOS_DECIMACION)+", no "+repr(modo))
+
+    # Con los puntos ordenados por columna y luego por valor, el primero y el último de cada columna son el mínimo y el máximo.
+    seleccion = []
+    for orden in [np.lexsort((y, columna))] + ([np.lexsort((x, columna))] if modo == "m4" else []):
+        c      = columna[orden]
+        inicio = np.flatnonzero(np.r_[True, c[1:] != c[:-1]])
+        fin    = np.r_[inicio[1:] - 1, len(c) - 1]
+        seleccion += [orden[inicio], orden[fin]]
+    return np.unique(np.concatenate(seleccion)) if len(x) > 0 else np.zeros(0, dtype=np.intp)
+
+@lru_cache(maxsize=None)
+def nucleo_marcador(marker=".", markersize=0.5, markeredgewidth=1.0, dpi=96, radio=3):
+    """
+    Descripción: Opacidad promedio que deja un marcador en el pixel donde está su centro y en los pixeles vecinos,
+                 medida al dibujar 64 marcadores en distintas posiciones dentro del pixel con el mismo backend (Agg).
+                 Entrega un arreglo (2*radio + 1, 2*radio + 1), la fila 0 corresponde a los pixeles de abajo.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    lado   = 20
+    fig    = Figure(figsize=(8*lado/dpi, 8*lado/dpi), dpi=dpi, facecolor="none")
+    canvas = FigureCanvasAgg(fig)
+    ax     = fig.add_axes([0, 0, 1, 1])
+    ax.set_axis_off()
+    ax.set_xlim(0, 8*lado)
+    ax.set_ylim(0, 8*lado)
+    inicio = lado//2 + lado*np.arange(8)
+    x, y   = np.meshgrid(inicio + np.arange(8)/8, inicio + np.arange(8)/8)
+    ax.plot(x.reshape(-1), y.reshape(-1), ls="None", marker=marker, ms=markersize, mew=markeredgewidth, c="k")
+    canvas.draw()
+    opacidad = np.asarray(canvas.buffer_rgba())[::-1, :, 3]/255
+    ventana  = np.arange(-radio, radio + 1)
+    nucleo   = np.zeros((len(ventana), len(ventana)))
+    for fila in inicio:
+        for columna in inicio:
+            nucleo += opacidad[np.ix_(fila + ventana, columna + ventana)]
+    return nucleo/64
+
+def rasterizar(x, y, ancho, alto, xlim, ylim, nucleo=None):
+    """
+    Descripción: Imagen (fila x columna) con la opacidad de cada pixel al dibujar un marcador en cada dato, para dibujar
+                 la serie directamente con imshow. La fila 0 corresponde al límite inferior del eje "y".
+                 Como al superponer puntos con antialiasing, cada punto que cubre una fracción c de un pixel deja pasar
+                 (1 - c) del fondo, así la opacidad es 1 - prod(1 - c). El tiempo solo depende del largo de la serie en
+                 el conteo por pixel (np.bincount), el resto depende del tamaño de la imagen.
+
+    nucleo     (np.ndarray):    Opacidad que deja un marcador en su pixel y los vecinos (ver nucleo_marcador),
+                                por defecto cada dato cubre solo su pixel.
+    """
+    columna = _celda(np.asarray(x, dtype=np.float64), xlim, ancho)
+    fila    = _celda(np.asarray(y, dtype=np.float64), ylim, alto)
+    dentro  = (columna >= 0) & (columna < ancho) & (fila >= 0) & (fila < alto)
+    conteo  = np.bincount(fila[dentro]*ancho + columna[dentro], minlength=alto*ancho).reshape(alto, ancho)
+
+    # Suma de log(1 - c) de los puntos de cada pixel y de sus vecinos.
+    nucleo    = np.ones((1, 1)) if nucleo is None else nucleo
+    logaritmo = np.log1p(-np.minimum(nucleo, 1 - 1e-9))
+    radio     = logaritmo.shape[0]//2
+    acumulado = np.zeros((alto + 2*radio, ancho + 2*radio))
+    for i, j in zip(*np.nonzero(logaritmo)):
+        acumulado[i:i + alto, j:j + ancho] += conteo*logaritmo[i, j]
+    return 1 - np.exp(acumulado[radio:radio + alto, radio:radio + ancho])
+
+def pixeles_ejes(ax, dpi):
+    """
+    Descripción: Número de columnas y filas de pixeles de los ejes al guardar la figura con el dpi entregado.
+    """
+    caja = ax.get_position()
+    fig  = ax.get_figure()
+    return int(round(caja.width*fig.get_figwidth()*dpi)), int(round(caja.height*fig.get_figheight()*dpi))
@@ -0,0 +1,244 @@
+import os
+import json
+import hashlib
+from collections import OrderedDict
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from .cache_archivos import CARPETA_CACHE
+
+# Métricas de matriz_dependencia().
+METRICAS_DEPENDENCIA = ("pearson", "spearman", "informacion_mutua", "pps")
+
+# Cambiar la versión invalida los resultados guardados con un cálculo anterior.
+VERSION_DEPENDENCIA = 1
+
+# Resultados ya calculados de pares de series en esta sesión, {clave: resultado}. Se guardan a lo más
+# MAXIMO_RESULTADOS (cada uno es un diccionario pequeño), al llenarse se descarta el usado hace más tiempo.
+MAXIMO_RESULTADOS = 4096
+_RESULTADOS = OrderedDict()
+
+def limpiar_resultados():
+    """
+    Descripción: Borra los resultados de dependencia guardados en memoria (los archivos del cache no se borran).
+    """
+    _RESULTADOS.clear()
+
+def _recordar(clave, resultado):
+    _RESULTADOS[clave] = resultado
+    _RESULTADOS.move_to_end(clave)
+    while len(_RESULTADOS) > MAXIMO_RESULTADOS:
+        _RESULTADOS.popitem(last=False)
+    return resultado
+
+def huella_serie(valores):
+    """
+    Descripción: Hash blake2b de los valores de una serie (incluye el tipo), no depende del nombre de la columna.
+    """
+    valores = np.ascontiguousarray(valores)
+    h = hashlib.blake2b(str(valores.dtype).encode("utf-8"), digest_size=16)
+    h.update(valores.tobytes())
+    return h.hexdigest()
+
+def _rangos(x):
+    # Rango promedio de cada valor (empates con el mismo rango), como pandas.Series.rank().
+    unicos, inverso, conteo = np.unique(x, return_inverse=True, return_counts=True)
+    return (np.cumsum(conteo) - (conteo - 1)/2)[inverso]
+
+def _pearson(x, y):
+    x = x - x.mean()
+    y = y - y.mean()
+    denominador = np.sqrt((x*x).sum()*(y*y).sum())
+    return float((x*y).sum()/denominador) if denominador > 0 else np.nan
+
+def _clases_cuantiles(x, nbins):
+    # Clase de cada valor en intervalos de igual frecuencia, los valores repetidos quedan en la misma clase.
+    limites = np.unique(np.quantile(x, np.linspace(0, 1, nbins + 1)[1:-1]))
+    return np.searchsorted(limites, x, side="right"), len(limites) + 1
+
+def _entropia(p):
+    p = p[p > 0]
+    return -(p*np.log(p)).sum(), len(p)
+
+def _informacion_mutua(x, y, nbins):
+    # Información mutua (nats) del histograma conjunto de clases de igual frecuencia, H(x) + H(y) - H(x, y),
+    # con la corrección de Miller-Madow de cada entropía ((celdas ocupadas - 1)/2n) para quitar el sesgo del histograma.
+    cx, nx = _clases_cuantiles(x, nbins)
+    cy, ny = _clases_cuantiles(y, nbins)
+    conjunta = np.bincount(cx*ny + cy, minlength=nx*ny).reshape(nx, ny)/len(x)
+    hx, mx   = _entropia(conjunta.sum(axis=1))
+    hy, my   = _entropia(conjunta.sum(axis=0))
+    hxy, mxy = _entropia(conjunta.reshape(-1))
+    return float(max(0.0, hx + hy - hxy + ((mx - 1) + (my - 1) - (mxy - 1))/(2*len(x))))
+
+def _mediana_por_clase(clases, y, nclases):
+    # Mediana de y en cada clase con un solo ordenamiento, NaN en las clases vacías.
+    orden  = np.lexsort((y, clases))
+    y      = y[orden]
+    conteo = np.bincount(clases, minlength=nclases)
+    inicio = np.cumsum(conteo) - conteo
+    vacio  = conteo == 0
+    bajo   = np.where(vacio, 0, inicio + (conteo - 1)//2)
+    alto   = np.where(vacio, 0, inicio + conteo//2)
+    mediana = (y[bajo] + y[alto])/2 if len(y) > 0 else np.zeros(nclases)
+    return np.where(vacio, np.nan, mediana)
+
+def _puntaje_predictivo(x, y, nbins, pliegues, semilla):
+    # Como ppscore para un objetivo numérico: 1 - MAE del modelo/MAE de predecir la mediana, con validación cruzada.
+    # El modelo predice la mediana de y en cada clase de x (un árbol de decisión de una variable con nbins hojas).
+    ingenuo = np.abs(y - np.median(y)).mean()
+    if ingenuo == 0 or len(y) < pliegues:
+        return 0.0
+    clases, nclases = _clases_cuantiles(x, nbins)
+    pliegue = np.random.default_rng(semilla).permutation(len(y)) % pliegues
+    error = 0.0
+    for k in range(pliegues):
+        prueba = pliegue == k
+        mediana = _mediana_por_clase(clases[~prueba], y[~prueba], nclases)
+        prediccion = mediana[clases[prueba]]
+        prediccion = np.where(np.isnan(prediccion), np.median(y[~prueba]), prediccion)
+        error += np.abs(y[prueba] - prediccion).sum()
+    return float(max(0.0, 1 - error/len(y)/ingenuo))
+
+def dependencia_par(x, y, metricas=METRICAS_DEPENDENCIA, muestra=5000, nbins=32, pliegues=10, semilla=0):
+    """
+    Descripción: Métricas de dependencia entre dos series usando solo las filas donde ambas tienen datos.
+                 Pearson y Spearman usan todas las filas (igual que DataFrame.corr()); la información mutua y el
+                 puntaje predictivo usan una muestra aleatoria de a lo más "muestra" filas, como ppscore.
+
+    x, y       (np.ndarray):    Valores de las dos series, del mismo largo.
+    metricas        (tuple):    Métricas a calcular, ver METRICAS_DEPENDENCIA.
+    muestra           (int):    Número máximo de filas de la muestra.
+    nbins             (int):    Número de clases de igual frecuencia para la información mutua y el puntaje predictivo.
+    pliegues          (int):    Pliegues de la validación cruzada del puntaje predictivo.
+    semilla           (int):    Semilla de la muestra y de los pliegues.
+
+    Entrega un diccionario con el valor de cada métrica y el número de filas "n". En "pps" está el puntaje de predecir
+    y con x y en "pps_inverso" el de predecir x con y.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valido = ~np.isnan(x) & ~np.isnan(y)
+    x, y = x[valido], y[valido]
+    resultado = {"n": int(len(x))}
+    if len(x) < 2:
+        resultado.update({m: np.nan for m in metricas})
+        if "pps" in metricas:
+            resultado.update({"pps": 0.0, "pps_inverso": 0.0})
+        return resultado
+    if "pearson" in metricas:
+        resultado["pearson"] = _pearson(x, y)
+    if "spearman" in metricas:
+        resultado["spearman"] = _pearson(_rangos(x), _rangos(y))
+    if len(x) > muestra:
+        fila = np.sort(np.random.default_rng(semilla).choice(len(x), muestra, replace=False))
+        x, y = x[fila], y[fila]
+    if "informacion_mutua" in metricas:
+        resultado["informacion_mutua"] = _informacion_mutua(x, y, nbins)
+    if "pps" in metricas:
+        resultado["pps"]         = _puntaje_predictivo(x, y, nbins, pliegues, semilla)
+        resultado["pps_inverso"] = _puntaje_predictivo(y, x, nbins, pliegues, semilla)
+    return resultado
+
+def _clave_par(huella_x, huella_y, parametros):
+    return hashlib.blake2b(json.dumps([huella_x, huella_y, VERSION_DEPENDENCIA, parametros]).encode("utf-8"),
+                           digest_size=16).hexdigest()
+
+def _leer_resultado(carpeta, clave):
+    if clave in _RESULTADOS:
+        _RESULTADOS.move_to_end(clave)
+        return _RESULTADOS[clave]
+    if carpeta is None:
+        return None
+    try:
+        with open(os.path.join(carpeta, clave+".json"), "r", encoding="utf-8") as archivo:
+            return _recordar(clave, json.load(archivo))
+    except (OSError, ValueError):
+        return None
+
+def _guardar_resultado(carpeta, clave, resultado):
+    _recordar(clave, resultado)
+    if carpeta is None:
+        return
+    os.makedirs(carpeta, exist_ok=True)
+    temporal = os.path.join(carpeta, clave+".tmp"+str(os.getpid()))
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(resultado, archivo)
+    os.replace(temporal, os.path.join(carpeta, clave+".json"))
+
+def _calcular_par(par, **parametros):
+    return dependencia_par(par[0], par[1], **parametros)
+
+def matriz_dependencia(df, columnas=None, metricas=METRICAS_DEPENDENCIA, muestra=5000, nbins=32, pliegues=10,
+                       semilla=0, procesos=None, cache=None):
+    """
+    Descripción: Matrices de dependencia entre todas las columnas de un DataFrame (Pearson, Spearman, información mutua y
+                 puntaje predictivo tipo ppscore), en reemplazo de df.corr() y pps.matrix().
+                 Los pares se calculan en paralelo y cada resultado se guarda con la huella de los valores de ambas
+                 columnas, así al agregar una variable solo se calculan sus pares nuevos.
+                 Todas las métricas son invariantes a escalar las columnas (ej. MinMaxScaler), no es necesario
+                 calcularlas de nuevo con los datos escalados.
+
+    df          (Dataframe):    Conjunto de datos.
+    columnas         (list):    Columnas a considerar, por defecto todas las numéricas.
+    metricas        (tuple):    Métricas a calcular, ver METRICAS_DEPENDENCIA.
+    muestra, nbins, pliegues, semilla:  Parámetros de dependencia_par().
+    procesos          (int):    Número de procesos, por defecto el número de núcleos. Con 1 se calcula sin procesos.
+    cache        (bool/str):    True guarda los resultados en la carpeta del cache (CARPETA_CACHE/dependencia), un "str"
+                                indica la carpeta. None o False solo usa los resultados de esta sesión
+                                (a lo más MAXIMO_RESULTADOS pares en memoria, ver limpiar_resultados()).
+
+    Entrega un diccionario {métrica: DataFrame (objetivo x predictor)}, más "n" con el número de filas de cada par.
+    Como en pps.matrix(...).pivot(columns='x', index='y'), la fila es la variable que se predice.
+
+    Ejemplo:
+        matrices = matriz_dependencia(df, procesos=4, cache=True)
+        sns.heatmap(matrices["pps"], vmin=0, vmax=1, cmap="RdYlBu_r", annot=True, fmt=".2f")
+    """
+    columnas = df.select_dtypes("number").columns.tolist() if columnas is None else list(columnas)
+    metricas = tuple(metricas)
+    for metrica in metricas:
+        if metrica not in METRICAS_DEPENDENCIA:
+            raise ValueError("metricas debe contener solo "+str(METRICAS_DEPENDENCIA)+", no "+repr(metrica))
+    carpeta = None if cache in (None, False) else os.path.join(CARPETA_CACHE, "dependencia") if cache == True else cache
+    parametros = {"metricas": metricas, "muestra": muestra, "nbins": nbins, "pliegues": pliegues, "semilla": semilla}
+
+    # Cada par se identifica por las huellas ordenadas de sus columnas, así (a, b) y (b, a) usan el mismo resultado.
+    valores = {c: df[c].to_numpy() for c in columnas}
+    huellas = {c: huella_serie(v) for c, v in valores.items()}
+    pares   = {}
+    for i, a in enumerate(columnas):
+        for b in columnas[i:]:
+            x, y = sorted([a, b], key=lambda c: huellas[c])
+            pares[(a, b)] = (_clave_par(huellas[x], huellas[y], parametros), x, y)
+    resultados = {clave: _leer_resultado(carpeta, clave) for clave, _, _ in pares.values()}
+    pendientes = {clave: (x, y) for clave, x, y in pares.values() if resultados[clave] is None}
+
+    # Cálculo de los pares nuevos, en paralelo si se usa más de un proceso.
+    claves  = list(pendientes)
+    calculo = partial(_calcular_par, **parametros)
+    tareas  = [(valores[pendientes[clave][0]], valores[pendientes[clave][1]]) for clave in claves]
+    if procesos == 1 or len(tareas) <= 1:
+        nuevos = [calculo(tarea) for tarea in tareas]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            nuevos = list(pool.map(calculo, tareas, chunksize=max(1, len(tareas)//(4*(procesos or os.cpu_count() or 1)))))
+    for clave, resultado in zip(claves, nuevos):
+        _guardar_resultado(carpeta, clave, resultado)
+        resultados[clave] = resultado
+
+    # Matrices (objetivo x predictor).
+    matrices = {m: pd.DataFrame(np.nan, index=columnas, columns=columnas) for m in metricas + ("n",)}
+    for (a, b), (clave, x, _) in pares.items():
+        resultado = resultados[clave]
+        for m in metricas + ("n",):
+            if m == "pps":
+                # "pps" es el puntaje de predecir la segunda columna del par ordenado con la primera.
+                directo, inverso = (resultado["pps"], resultado["pps_inverso"]) if x == a else (resultado["pps_inverso"], resultado["pps"])
+                matrices[m].loc[b, a] = 1.0 if a == b else directo
+                matrices[m].loc[a, b] = 1.0 if a == b else inverso
+            else:
+                matrices[m].loc[a, b] = matrices[m].loc[b, a] = resultado[m]
+    matrices["n"] = matrices["n"].astype(np.int64)
+    return matrices
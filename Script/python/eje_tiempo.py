@@ -0,0 +1,258 @@
+import numpy as np
+import pandas as pd
+
+# Campos de calendario de EjeTiempo.campo() y el tipo entero (más chico posible) con que se guardan.
+CAMPOS_CALENDARIO = {
+    "HORA"      : np.int8,
+    "DIA"       : np.int8,
+    "MES"       : np.int8,
+    "ANIO"      : np.int16,
+    "DIA_ANIO"  : np.int16,
+    "DIA_SEMANA": np.int8,
+    "TEMPORADA" : np.int8,
+    }
+
+# Temporada de cada mes (hemisferio sur): 0 verano (DEF), 1 otoño (MAM), 2 invierno (JJA), 3 primavera (SON).
+TEMPORADA_MES = np.array([0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0], dtype=np.int8)
+
+HORA = np.timedelta64(1, 'h')
+
+def _unidades(delta, unidad):
+    # Número de unidades del datetime64 (ej. "us") en un timedelta64.
+    return int(np.timedelta64(delta)//np.timedelta64(1, unidad))
+
+def _campo_dia(dias, nombre):
+    # Campo que solo depende del día, para días enteros desde 1970-01-01.
+    fecha = dias.astype('datetime64[D]')
+    if nombre == "DIA":
+        return (fecha - fecha.astype('datetime64[M]').astype('datetime64[D]')).astype(np.int64) + 1
+    elif nombre == "MES":
+        return fecha.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    elif nombre == "ANIO":
+        return fecha.astype('datetime64[Y]').astype(np.int64) + 1970
+    elif nombre == "DIA_ANIO":
+        return (fecha - fecha.astype('datetime64[Y]').astype('datetime64[D]')).astype(np.int64) + 1
+    # 1970-01-01 fue jueves, el lunes queda como 0.
+    return (dias + 3) % 7
+
+class EjeTiempo:
+    """
+    Descripción: Eje de tiempo de una serie con paso regular (ej. horaria), guardado como fecha de inicio, paso y desfases
+                 enteros en vez de una fecha por fila. Si la serie no tiene huecos los desfases no se guardan (0, 1, ..., n - 1).
+                 Los campos de calendario (hora, mes, día del año, temporada, etc.) se calculan una sola vez, al pedirlos,
+                 como arreglos int8/int16 y quedan en el eje; los cortes por fecha se calculan con aritmética.
+
+    inicio    (datetime64):    Fecha del desfase 0, con la unidad de las fechas (ej. "datetime64[us]").
+    paso     (timedelta64):    Paso de la serie (ej. una hora).
+    n                (int):    Número de filas si no hay huecos.
+    desfases  (np.ndarray):    Desfase de cada fila en número de pasos, enteros crecientes (opcional, en lugar de n).
+
+    Ejemplo:
+        eje  = eje_tiempo(df.index)
+        hora = eje.campo("HORA")
+        df.iloc[eje.rebanada("2018-01-01", "2018-12-31 23:00")]
+    """
+    def __init__(self, inicio, paso=HORA, n=None, desfases=None):
+        self.inicio = np.datetime64(inicio)
+        self.unidad = np.datetime_data(self.inicio.dtype)[0]
+        self.paso   = _unidades(paso, self.unidad)
+        if desfases is None:
+            self.n = int(n)
+            self._desfases = None
+        else:
+            desfases = np.asarray(desfases)
+            self.n = len(desfases)
+            # Sin huecos no es necesario guardar los desfases.
+            if self.n == 0 or (desfases[0] == 0 and desfases[-1] == self.n - 1):
+                self._desfases = None
+            else:
+                self._desfases = desfases.astype(np.int32 if desfases[-1] < 2**31 else np.int64)
+        self._fechas  = None
+        self._campos  = {}
+        self._codigos = {}
+
+    def __len__(self):
+        return self.n
+
+    def __repr__(self):
+        return "EjeTiempo(inicio={}, paso={}, n={}, contiguo={})".format(
+            pd.Timestamp(self.inicio), pd.Timedelta(np.timedelta64(self.paso, self.unidad)), self.n, self.contiguo)
+
+    @classmethod
+    def desde_fechas(cls, fechas):
+        """
+        Descripción: Eje de tiempo de unas fechas crecientes con paso regular. El paso es el máximo común divisor de las
+                     diferencias entre fechas. Entrega None si las fechas no son estrictamente crecientes o tienen NaT.
+        """
+        fechas = pd.DatetimeIndex(fechas)
+        if fechas.tz is not None or fechas.hasnans:
+            return None
+        valores = fechas.to_numpy()
+        if len(valores) <= 1:
+            return cls(valores[0] if len(valores) == 1 else np.datetime64(0, 'us'), HORA, n=len(valores))
+        enteros = valores.view(np.int64)
+        delta   = np.diff(enteros)
+        if (delta <= 0).any():
+            return None
+        paso = int(np.gcd.reduce(delta))
+        return cls(valores[0], np.timedelta64(paso, np.datetime_data(valores.dtype)[0]), desfases=(enteros - enteros[0])//paso)
+
+    @property
+    def contiguo(self):
+        return self._desfases is None
+
+    @property
+    def desfases(self):
+        """
+        Descripción: Desfase de cada fila en número de pasos desde el inicio.
+        """
+        return np.arange(self.n, dtype=np.int64) if self._desfases is None else self._desfases
+
+    @property
+    def fin(self):
+        """
+        Descripción: Fecha de la última fila.
+        """
+        return self.inicio + np.timedelta64((0 if self.n == 0 else self.n - 1 if self.contiguo else int(self._desfases[-1]))*self.paso, self.unidad)
+
+    @property
+    def nbytes(self):
+        """
+        Descripción: Memoria en bytes de los desfases y de los campos y códigos calculados.
+        """
+        return (0 if self._desfases is None else self._desfases.nbytes) + \
+               sum(c.nbytes for c in self._campos.values()) + sum(c.nbytes for c in self._codigos.values())
+
+    def _enteros(self, desfase_horas=0):
+        # Fechas como enteros en la unidad del eje, corridas en desfase_horas.
+        return self.inicio.astype(np.int64) + self.desfases.astype(np.int64)*self.paso + desfase_horas*_unidades(HORA, self.unidad)
+
+    @property
+    def fechas(self):
+        """
+        Descripción: DatetimeIndex "Fecha" del eje, se crea una sola vez.
+        """
+        if self._fechas is None:
+            self._fechas = pd.DatetimeIndex(self._enteros().view(self.inicio.dtype), name="Fecha")
+        return self._fechas
+
+    def campo(self, nombre, desfase_horas=0):
+        """
+        Descripción: Campo de calendario de cada fila, se calcula la primera vez y luego se entrega el mismo arreglo.
+                     Los campos que dependen del día se calculan una vez por día y se copian a las filas.
+
+        nombre            (str):    "HORA", "DIA", "MES", "ANIO", "DIA_ANIO", "DIA_SEMANA" o "TEMPORADA".
+        desfase_horas     (int):    Horas que se suman a las fechas antes de calcular el campo (ej. -4 para pasar
+                                    de UTC a hora de Chile continental en invierno).
+        """
+        clave = (nombre, desfase_horas)
+        if clave in self._campos:
+            return self._campos[clave]
+        if nombre not in CAMPOS_CALENDARIO:
+            raise ValueError("nombre debe ser uno de "+str(list(CAMPOS_CALENDARIO))+", no "+repr(nombre))
+        enteros = self._enteros(desfase_horas)
+        unidad_dia = _unidades(np.timedelta64(1, 'D'), self.unidad)
+        dias = enteros//unidad_dia
+        if nombre == "HORA":
+            valores = (enteros - dias*unidad_dia)//_unidades(HORA, self.unidad)
+        elif nombre == "TEMPORADA":
+            valores = TEMPORADA_MES[self.campo("MES", desfase_horas) - 1]
+        elif self.n == 0:
+            valores = np.zeros(0, dtype=np.int64)
+        else:
+            primero = int(dias[0])
+            valores = _campo_dia(np.arange(primero, int(dias[-1]) + 1), nombre)[dias - primero]
+        return self._guardar(clave, valores)
+
+    def dias(self, desfase_horas=0):
+        """
+        Descripción: Índice del día de cada fecha, contado desde el primer día del eje, y la fecha (datetime64[D]) de cada
+                     día entre el primero y el último, para agrupar por día con np.bincount o en un arreglo (día, hora).
+
+        desfase_horas     (int):    Horas que se suman a las fechas antes de asignar el día (ej. -1 si la hora marca el
+                                    final del periodo y 24:00 pertenece al día anterior).
+        """
+        clave = ("DIAS", desfase_horas)
+        if clave not in self._codigos:
+            dias    = self._enteros(desfase_horas)//_unidades(np.timedelta64(1, 'D'), self.unidad)
+            primero = int(dias[0]) if self.n > 0 else 0
+            indice  = (dias - primero).astype(np.intp)
+            fechas  = np.arange(primero, int(dias[-1]) + 1 if self.n > 0 else 0).astype('datetime64[D]')
+            for arreglo in (indice, fechas):
+                arreglo.setflags(write=False)
+            self._codigos[clave] = indice
+            self._codigos[("FECHAS_DIAS", desfase_horas)] = fechas
+        return self._codigos[clave], self._codigos[("FECHAS_DIAS", desfase_horas)]
+
+    def _guardar(self, clave, valores):
+        valores = np.asarray(valores).astype(CAMPOS_CALENDARIO[clave[0]])
+        valores.setflags(write=False)
+        self._campos[clave] = valores
+        return valores
+
+    def codigos(self, por, clases, desfase_horas=0):
+        """
+        Descripción: Código entero combinado de las clases de calendario (ver codigos_calendario), guardado en el eje.
+
+        por             (tuple):    Campos de calendario (ej. ("MES", "HORA")).
+        clases           (dict):    Número de clases y primer valor de cada campo.
+        """
+        clave = (tuple(por), desfase_horas)
+        if clave not in self._codigos:
+            codigo = np.zeros(self.n, dtype=np.intp)
+            for nombre in por:
+                n, inicio = clases[nombre]
+                codigo = codigo*n + (self.campo(nombre, desfase_horas).astype(np.intp) - inicio)
+            codigo.setflags(write=False)
+            self._codigos[clave] = codigo
+        return self._codigos[clave]
+
+    def posicion(self, fecha, lado="izquierda"):
+        """
+        Descripción: Posición de la primera fila con fecha >= fecha ("izquierda") o > fecha ("derecha"),
+                     como np.searchsorted pero con aritmética si el eje no tiene huecos.
+        """
+        delta = _unidades(pd.Timestamp(fecha).to_datetime64() - self.inicio, self.unidad)
+        # Primer desfase que cumple la condición.
+        k = -(-delta//self.paso) if lado == "izquierda" else delta//self.paso + 1
+        if self.contiguo:
+            return int(min(max(k, 0), self.n))
+        return int(np.searchsorted(self._desfases, k))
+
+    def rebanada(self, desde=None, hasta=None):
+        """
+        Descripción: slice de las filas entre desde y hasta (ambas incluidas, como df.loc[desde:hasta]).
+                     Como en pandas, una fecha en texto incompleta (ej. "2018" o "2018-03") incluye todo el periodo.
+        """
+        if isinstance(hasta, str):
+            hasta = pd.Period(hasta).end_time
+        return slice(0 if desde is None else self.posicion(desde, "izquierda"),
+                     self.n if hasta is None else self.posicion(hasta, "derecha"))
+
+    def __getitem__(self, rebanada):
+        """
+        Descripción: Eje de un slice de filas (ej. eje[eje.rebanada(desde, hasta)]), con los campos ya calculados recortados.
+        """
+        inicio, fin, _ = rebanada.indices(self.n)
+        fin = max(fin, inicio)
+        desfases = self.desfases[inicio:fin]
+        eje = EjeTiempo(self.inicio + np.timedelta64(int(desfases[0])*self.paso if len(desfases) > 0 else 0, self.unidad),
+                        np.timedelta64(self.paso, self.unidad),
+                        desfases=desfases - (desfases[0] if len(desfases) > 0 else 0))
+        eje._campos = {clave: valores[inicio:fin] for clave, valores in self._campos.items()}
+        return eje
+
+def eje_tiempo(fechas):
+    """
+    Descripción: EjeTiempo de unas fechas. Entrega None si las fechas no tienen paso regular.
+                 Los campos de calendario quedan guardados en el eje entregado: para calcularlos una sola vez en varias
+                 funciones se entrega el mismo EjeTiempo (ej. cubo.eje) en lugar de las fechas.
+
+    fechas  (DatetimeIndex):    Fechas de los datos, o un EjeTiempo (se entrega el mismo).
+    """
+    if isinstance(fechas, EjeTiempo) or fechas is None:
+        return fechas
+    fechas = pd.DatetimeIndex(fechas)
+    if fechas.tz is not None or fechas.hasnans:
+        return None
+    return EjeTiempo.desde_fechas(fechas)
@@ -0,0 +1,213 @@
+import os
+from glob import glob
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from .lectura_archivos import lectura_csv, alineacion_horaria, seleccion_archivos, TIPO_VALORES
+from .eje_tiempo import EjeTiempo, eje_tiempo
+
+# Nombres de variables que el SINCA entrega distinto según la estación (ej. id244 descarga MP2,5 como "C-M25").
+ALIAS_VARIABLES = {"C-M25": "C-MP25"}
+
+# Elipsoide GRS80 de SIRGAS-Chile (EPSG:9155 para el huso 19S) y parámetros de la proyección UTM.
+SEMIEJE_MAYOR  = 6378137.0
+ACHATAMIENTO   = 1/298.257222101
+ESCALA_UTM     = 0.9996
+CRS_GEOGRAFICO = "EPSG:4326"
+
+def utm_a_geograficas(este, norte, huso, sur=True):
+    """
+    Descripción: Convierte coordenadas UTM a longitud y latitud en grados con las series de Krüger (precisión menor a
+                 un milímetro dentro del huso), sin usar pyproj. Entrega lo mismo que Proj("EPSG:9155")(este, norte, inverse=True)
+                 para las estaciones del huso 19S.
+
+    este       (array-like):    Coordenada UTM Este en metros.
+    norte      (array-like):    Coordenada UTM Norte en metros.
+    huso       (array-like):    Número del huso UTM (ej. 19).
+    sur              (bool):    True si las coordenadas están en el hemisferio sur (falso norte de 10.000.000 m).
+    """
+    n = ACHATAMIENTO/(2 - ACHATAMIENTO)
+    A = SEMIEJE_MAYOR/(1 + n)*(1 + n**2/4 + n**4/64)
+    beta  = [n/2 - 2*n**2/3 + 37*n**3/96, n**2/48 + n**3/15, 17*n**3/480]
+    delta = [2*n - 2*n**2/3 - 2*n**3, 7*n**2/3 - 8*n**3/5, 56*n**3/15]
+
+    xi  = (np.asarray(norte, dtype=np.float64) - (10000000 if sur else 0))/(ESCALA_UTM*A)
+    eta = (np.asarray(este, dtype=np.float64) - 500000)/(ESCALA_UTM*A)
+    xi_, eta_ = xi, eta
+    for j, b in enumerate(beta, start=1):
+        xi_  = xi_  - b*np.sin(2*j*xi)*np.cosh(2*j*eta)
+        eta_ = eta_ - b*np.cos(2*j*xi)*np.sinh(2*j*eta)
+    chi = np.arcsin(np.sin(xi_)/np.cosh(eta_))
+    lat = chi + sum(d*np.sin(2*j*chi) for j, d in enumerate(delta, start=1))
+    lon = np.radians(np.asarray(huso, dtype=np.float64)*6 - 183) + np.arctan2(np.sinh(eta_), np.cos(xi_))
+    return np.degrees(lon), np.degrees(lat)
+
+def lectura_info(data_folder):
+    """
+    Descripción: Lee el archivo "_info.txt" con los datos de las estaciones de monitoreo y agrega su longitud y latitud.
+
+    data_folder       (str):    Carpeta con los archivos del SINCA y el archivo "_info.txt".
+    """
+    info = pd.read_csv(os.path.join(data_folder, "_info.txt"), skipinitialspace=True)
+    info.columns = ["id", "nombre_estacion", "UTM_E", "UTM_N", "Huso"]
+    info["lon"], info["lat"] = utm_a_geograficas(info["UTM_E"], info["UTM_N"], info["Huso"])
+    return info.set_index("id")
+
+def geometria_estaciones(estaciones):
+    """
+    Descripción: GeoDataFrame con un punto (lon, lat) por estación. geopandas solo se importa al llamar esta función.
+
+    estaciones  (DataFrame):    Tabla de estaciones de lectura_info.
+    """
+    import geopandas as gpd
+    return gpd.GeoDataFrame(estaciones, geometry=gpd.points_from_xy(x=estaciones["lon"], y=estaciones["lat"]), crs=CRS_GEOGRAFICO)
+
+def id_estacion(id):
+    """
+    Descripción: Normaliza el identificador de estación, acepta 212, "212" o "id212".
+    """
+    return int(str(id).replace("id", ""))
+
+class CuboEstaciones:
+    """
+    Descripción: Datos de varias estaciones en un solo arreglo (estación x tiempo x variable) sobre una grilla horaria común.
+                 Las variables que una estación no mide, o los periodos sin datos, quedan como NaN.
+                 Los datos fijos de cada estación (nombre, coordenadas) están una sola vez en la tabla de estaciones y
+                 no se repiten en cada fila, la geometría se crea solo al pedir un GeoDataFrame.
+
+    valores    (np.ndarray):    Arreglo de dimensiones (estación, tiempo, variable).
+    estaciones  (DataFrame):    Datos de cada estación (nombre, UTM_E, UTM_N, Huso, lon, lat) con índice "id".
+    fechas  (DatetimeIndex):    Fechas horarias del eje de tiempo, o su EjeTiempo (inicio y paso, sin una fecha por hora).
+    variables        (list):    Nombre de cada variable.
+    """
+    def __init__(self, valores, estaciones, fechas, variables):
+        self.valores    = valores
+        self.estaciones = estaciones
+        self.eje        = eje_tiempo(fechas)
+        self.variables  = list(variables)
+        if self.eje is None:
+            raise ValueError("Las fechas del cubo deben ser crecientes y con paso regular.")
+
+    @property
+    def fechas(self):
+        return self.eje.fechas
+
+    @property
+    def ids(self):
+        return self.estaciones.index.tolist()
+
+    def __repr__(self):
+        return "CuboEstaciones(estaciones={}, fechas={} a {}, variables={})".format(
+            self.ids, pd.Timestamp(self.eje.inicio), pd.Timestamp(self.eje.fin), self.variables)
+
+    @property
+    def nbytes(self):
+        """
+        Descripción: Memoria en bytes de los valores y del eje de tiempo.
+        """
+        return self.valores.nbytes + self.eje.nbytes
+
+    def estacion(self, id, geometria=False):
+        """
+        Descripción: DataFrame (tiempo x variable) de una estación, como el que entrega lectura_todoscsv, sin copiar los valores.
+                     Con geometria=True entrega el GeoDataFrame del notebook, con las columnas id, lon, lat y geometry
+                     repetidas en cada fila (copia los datos y usa mucha más memoria).
+        """
+        id = id_estacion(id)
+        s  = self.estaciones.index.get_loc(id)
+        df = pd.DataFrame(self.valores[s], index=self.fechas, columns=self.variables, copy=False)
+        if geometria == False:
+            return df
+        import geopandas as gpd
+        df = df.assign(id=id, lon=self.estaciones.at[id, "lon"], lat=self.estaciones.at[id, "lat"])
+        return gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(x=df.lon, y=df.lat), crs=CRS_GEOGRAFICO)
+
+    def geodataframe(self):
+        """
+        Descripción: Tabla de estaciones como GeoDataFrame (ver geometria_estaciones).
+        """
+        return geometria_estaciones(self.estaciones)
+
+    def periodo(self, desde=None, hasta=None):
+        """
+        Descripción: Cubo con las fechas entre desde y hasta (ambas incluidas), sin copiar los valores.
+                     Las posiciones se calculan con aritmética sobre el eje de tiempo.
+
+        Ejemplo:
+            cubo.periodo("2018-01-01", "2018-12-31 23:00")
+        """
+        rebanada = self.eje.rebanada(desde, hasta)
+        return CuboEstaciones(self.valores[:, rebanada], self.estaciones, self.eje[rebanada], self.variables)
+
+    def variable(self, variable):
+        """
+        Descripción: DataFrame (tiempo x estación) de una variable en todas las estaciones.
+        """
+        v = self.variables.index(variable)
+        return pd.DataFrame(self.valores[:, :, v].T, index=self.fechas, columns=self.ids)
+
+def lectura_estaciones(data_folder, ids=None, procesos=None, modo="rapido", cache=None, alias=ALIAS_VARIABLES, dtype=TIPO_VALORES,
+                       variables=None, desde=None, hasta=None):
+    """
+    Descripción: Lee todos los archivos de varias estaciones en paralelo y entrega un CuboEstaciones.
+                 Cada archivo se lee en un proceso distinto y "_info.txt" se lee una sola vez.
+
+    data_folder       (str):    Carpeta con los archivos del SINCA y el archivo "_info.txt".
+    ids              (list):    Estaciones a leer (ej. ["id212", "id244"]), por defecto todas las de "_info.txt".
+    procesos          (int):    Número de procesos, por defecto el número de núcleos. Con 1 se lee sin procesos.
+    modo              (str):    Modo de lectura de lectura_csv.
+    cache        (bool/str):    Cache de lectura_csv.
+    alias            (dict):    Cambio de nombre de variables para que coincidan entre estaciones.
+    dtype        (np.dtype):    Tipo de los valores del cubo (por defecto float32, como lectura_csv).
+    variables        (list):    Variables a leer (nombres después del alias), por defecto todas. Los archivos de otras
+                                variables no se abren.
+    desde             (str):    Fecha inicial (opcional), solo se leen las filas del periodo de cada archivo.
+    hasta             (str):    Fecha final, incluida (opcional).
+
+    Ejemplo:
+        cubo = lectura_estaciones("Data/P001_calidad aire", ids=["id212", "id244", "id250", "id220"])
+        df   = cubo.estacion("id244")
+        viento = lectura_estaciones("Data/P001_calidad aire", variables=["M-VEL", "M-DIR"], desde="2019-06", hasta="2019-08")
+    """
+    info = lectura_info(data_folder)
+    ids  = info.index.tolist() if ids is None else [id_estacion(id) for id in ids]
+    paths = {id: seleccion_archivos(sorted(glob(os.path.join(data_folder, "id"+str(id)+"_*.csv"))), variables, desde, hasta, alias)
+             for id in ids}
+    todos = [path for id in ids for path in paths[id]]
+
+    # Lectura de archivos, en paralelo si se usa más de un proceso.
+    lector = partial(lectura_csv, modo=modo, cache=cache, desde=desde, hasta=hasta)
+    if procesos == 1 or len(todos) <= 1:
+        frames = [lector(path) for path in todos]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            frames = list(pool.map(lector, todos, chunksize=max(1, len(todos)//(4*(procesos or os.cpu_count() or 1)))))
+    frames = [df.rename(columns=alias) for df in frames]
+
+    # Cada estación se alinea en su grilla horaria y luego todas se copian en la grilla común.
+    n = 0
+    por_estacion = []
+    for id in ids:
+        por_estacion.append(alineacion_horaria(frames[n:n+len(paths[id])]) if len(paths[id]) > 0 else None)
+        n += len(paths[id])
+    variables = []
+    for df in por_estacion:
+        if df is not None:
+            variables += [v for v in df.columns if v not in variables]
+    presentes = [df for df in por_estacion if df is not None and len(df) > 0]
+    if len(presentes) == 0:
+        raise FileNotFoundError("No se encontraron archivos de las estaciones "+str(ids)+" en "+data_folder)
+    hora   = np.timedelta64(1, 'h')
+    inicio = min(df.index[0] for df in presentes)
+    fin    = max(df.index[-1] for df in presentes)
+    eje    = EjeTiempo(inicio.to_datetime64(), hora, n=(fin - inicio)//hora + 1)
+
+    valores = np.full((len(ids), len(eje), len(variables)), np.nan, dtype=dtype)
+    for s, df in enumerate(por_estacion):
+        if df is None or len(df) == 0:
+            continue
+        t = ((df.index - inicio)//hora).to_numpy()
+        v = np.array([variables.index(c) for c in df.columns])
+        valores[s, t[:, None], v[None, :]] = df.to_numpy()
+    return CuboEstaciones(valores, info.loc[ids], eje, variables)
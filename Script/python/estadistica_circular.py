@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+from .climatologia import codigos_calendario, indice_clases
+
+def sector_direccion(direccion, nsectores=24):
+    """
+    Descripción: Sector de cada dirección (en grados), con el sector 0 centrado en el norte. 360° queda en el sector 0.
+
+    direccion  (np.ndarray):    Dirección en grados.
+    nsectores         (int):    Número de sectores, 24 corresponde a sectores de 15°.
+    """
+    step = 360/nsectores
+    return np.digitize(direccion, bins=step/2 + step*np.arange(nsectores)) % nsectores
+
+def _preparar(direccion, codigos, nclases):
+    direccion = np.asarray(direccion, dtype=np.float64)
+    lote      = direccion.ndim == 2
+    direccion = np.atleast_2d(direccion)
+    S, T      = direccion.shape
+    if codigos is None:
+        codigos, nclases = np.zeros(T, dtype=np.intp), 1
+    codigos = np.asarray(codigos, dtype=np.intp)
+    nclases = int(codigos.max(initial=-1)) + 1 if nclases is None else int(nclases)
+    valido  = ~np.isnan(direccion) & (codigos >= 0)[None, :]
+    celda   = np.arange(S)[:, None]*nclases + codigos[None, :]
+    return direccion, lote, S, nclases, valido, celda
+
+def conteo_direccion(direccion, codigos=None, nclases=None, nsectores=24):
+    """
+    Descripción: Número de datos de cada sector de dirección dentro de cada clase (ej. cada hora), con un solo np.bincount.
+
+    direccion  (np.ndarray):    Dirección en grados, de dimensiones (tiempo,) o (serie, tiempo).
+    codigos    (np.ndarray):    Código de clase de cada tiempo (ej. de codigos_calendario), por defecto una sola clase.
+    nclases           (int):    Número de clases.
+    nsectores         (int):    Número de sectores.
+
+    Entrega un arreglo (sector, clase), o (serie, sector, clase) si se entregan varias series.
+    """
+    direccion, lote, S, nclases, valido, celda = _preparar(direccion, codigos, nclases)
+    sector = sector_direccion(direccion, nsectores)
+    conteo = np.bincount((celda*nsectores + sector)[valido], minlength=S*nclases*nsectores)
+    conteo = conteo.reshape(S, nclases, nsectores).swapaxes(1, 2)
+    return conteo if lote == True else conteo[0]
+
+def frecuencia_relativa(conteo):
+    """
+    Descripción: Frecuencia relativa (%) de cada sector dentro de cada clase a partir de los conteos (sector, clase).
+                 Las clases sin datos quedan como NaN.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 100*conteo/conteo.sum(axis=-2, keepdims=True)
+
+def frecuencia_direccion(direccion, codigos=None, nclases=None, nsectores=24):
+    """
+    Descripción: Frecuencia relativa (%) de cada sector de dirección dentro de cada clase, ver conteo_direccion.
+    """
+    return frecuencia_relativa(conteo_direccion(direccion, codigos, nclases, nsectores))
+
+def estadisticos_circulares(direccion, codigos=None, nclases=None, magnitud=None):
+    """
+    Descripción: Estadísticos circulares por clase: dirección media vectorial, longitud media resultante R (entre 0 y 1)
+                 y desviación estándar circular sqrt(-2 ln R), en grados. A diferencia del promedio lineal de los grados,
+                 el resultado es correcto en el cruce 0°/360° (ej. el promedio de 350° y 10° es 0°).
+
+    direccion  (np.ndarray):    Dirección en grados, de dimensiones (tiempo,) o (serie, tiempo).
+    codigos    (np.ndarray):    Código de clase de cada tiempo, por defecto una sola clase.
+    nclases           (int):    Número de clases.
+    magnitud   (np.ndarray):    Magnitud de cada vector (ej. velocidad del viento), si se entrega la dirección media
+                                se pondera por la magnitud y R es |suma de vectores|/suma de magnitudes.
+
+    Entrega un diccionario con arreglos (clase,) o (serie, clase): "conteo", "direccion", "R" y "desviacion".
+    """
+    sumas = sumas_circulares(direccion, codigos, nclases, magnitud)
+    lote  = sumas["conteo"].ndim == 2
+    resultado = resumen_circular(**{clave: np.atleast_2d(valor) for clave, valor in sumas.items()})
+    return resultado if lote == True else {clave: valor[0] for clave, valor in resultado.items()}
+
+def sumas_circulares(direccion, codigos=None, nclases=None, magnitud=None):
+    """
+    Descripción: Sumas por clase con las que se obtienen los estadísticos circulares: conteo, suma de pesos,
+                 suma de senos y suma de cosenos. Se pueden acumular por partes y luego usar resumen_circular.
+    """
+    direccion, lote, S, nclases, valido, celda = _preparar(direccion, codigos, nclases)
+    peso = np.ones_like(direccion) if magnitud is None else np.atleast_2d(np.asarray(magnitud, dtype=np.float64))
+    valido = valido & ~np.isnan(peso)
+    c, d, w = celda[valido], np.deg2rad(direccion[valido]), peso[valido]
+    n      = S*nclases
+    sumas  = {
+        "conteo": np.bincount(c, minlength=n),
+        "suma_w": np.bincount(c, weights=w, minlength=n),
+        "seno"  : np.bincount(c, weights=w*np.sin(d), minlength=n),
+        "coseno": np.bincount(c, weights=w*np.cos(d), minlength=n)}
+    sumas = {clave: valor.reshape(S, nclases) for clave, valor in sumas.items()}
+    return sumas if lote == True else {clave: valor[0] for clave, valor in sumas.items()}
+
+def resumen_circular(conteo, suma_w, seno, coseno):
+    """
+    Descripción: Dirección media, R y desviación circular a partir de las sumas de sumas_circulares.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        R = np.hypot(seno, coseno)/suma_w
+        media = np.rad2deg(np.arctan2(seno, coseno)) % 360
+        desviacion = np.abs(np.rad2deg(np.sqrt(-2*np.log(np.minimum(R, 1)))))
+    # Un ángulo apenas negativo queda como 360° al aplicar el módulo, se deja en 0°.
+    media[media >= 360] = 0
+    media[conteo == 0] = np.nan
+    return {"conteo": conteo, "direccion": media, "R": R, "desviacion": desviacion}
+
+def ciclo_direccion(df, variable, por=("HORA",), nsectores=24, magnitud=None):
+    """
+    Descripción: Tabla de frecuencia relativa (sector x clase) y estadísticos circulares por clase de una variable de dirección.
+
+    df          (Dataframe):    Conjunto de datos con índice de fechas.
+    variable          (str):    Variable de dirección en grados.
+    por             (tuple):    Clases de calendario, ("HORA",), ("MES",) o ("MES", "HORA").
+    nsectores         (int):    Número de sectores.
+    magnitud          (str):    Variable de magnitud para ponderar la dirección media (opcional).
+
+    Ejemplo:
+        frecuencia, estadisticos = ciclo_direccion(df, "M-DIR", por=("HORA",))
+    """
+    codigos, forma = codigos_calendario(df.index, por)
+    nclases = int(np.prod(forma))
+    clases  = indice_clases(por)
+    sectores = np.arange(nsectores)*360/nsectores
+    sectores = pd.Index(sectores.astype(np.int64) if (sectores % 1 == 0).all() else sectores, name="nombre_viento")
+    frecuencia = pd.DataFrame(frecuencia_direccion(df[variable], codigos, nclases, nsectores), index=sectores, columns=clases)
+    peso = None if magnitud is None else df[magnitud]
+    estadisticos = pd.DataFrame(estadisticos_circulares(df[variable], codigos, nclases, peso), index=clases)
+    return frecuencia, estadisticos
+
+def direccion_cubo(cubo, variable="M-DIR", por=("HORA",), nsectores=24, magnitud=None):
+    """
+    Descripción: Frecuencias por sector y estadísticos circulares de todas las estaciones de un CuboEstaciones en una pasada.
+
+    Entrega (frecuencia (estación, sector, clase), estadísticos {nombre: (estación, clase)}).
+    """
+    codigos, forma = codigos_calendario(cubo.eje, por)
+    nclases = int(np.prod(forma))
+    direccion = cubo.valores[:, :, cubo.variables.index(variable)]
+    peso = None if magnitud is None else cubo.valores[:, :, cubo.variables.index(magnitud)]
+    return (frecuencia_direccion(direccion, codigos, nclases, nsectores),
+            estadisticos_circulares(direccion, codigos, nclases, peso))
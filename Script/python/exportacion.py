@@ -0,0 +1,95 @@
+import os
+import pandas as pd
+from .instrumentacion import etapa
+
+# Formatos de salida de las tablas.
+FORMATOS_TABLAS = ("excel", "parquet", "csv")
+
+def _ruta_columnar(path, hoja, formato):
+    # "Output/Data/CE_Estacion.xlsx", hoja "M-HR" -> "Output/Data/CE_Estacion/M-HR.parquet"
+    return os.path.join(os.path.splitext(path)[0], hoja+"."+formato)
+
+def _escribir_columnar(tabla, path, hoja, formato):
+    ruta = _ruta_columnar(path, hoja, formato)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    if formato == "parquet":
+        # Parquet solo acepta nombres de columnas de texto (ej. las horas 0 a 23).
+        tabla = tabla.set_axis(tabla.columns.astype(str), axis=1)
+        tabla.to_parquet(ruta)
+    else:
+        tabla.to_csv(ruta)
+
+class ExportadorTablas:
+    """
+    Descripción: Junta en memoria las tablas pivote de un reporte y escribe cada archivo una sola vez.
+                 En formato "excel" cada archivo es un libro con una hoja por tabla, se escribe completo (las hojas de una
+                 versión anterior del archivo no se mantienen). En formato "parquet" o "csv" cada archivo es una carpeta con
+                 un archivo por tabla, para usar los datos en otros programas.
+
+    formato           (str):    "excel", "parquet" o "csv".
+    actualizar       (bool):    Si es True y el libro Excel ya existe, solo se reemplazan las hojas agregadas y se mantienen
+                                las demás (ej. en un reporte incremental, las hojas de los trabajos sin cambios).
+
+    Ejemplo:
+        with ExportadorTablas() as exportador:
+            for variable in ["M-TEMP", "M-HR"]:
+                ciclo_estacional(df, variable, ..., exportador=exportador)
+    """
+    def __init__(self, formato="excel", actualizar=False):
+        if formato not in FORMATOS_TABLAS:
+            raise ValueError("formato debe ser uno de "+str(FORMATOS_TABLAS)+", no "+repr(formato))
+        self.formato    = formato
+        self.actualizar = actualizar
+        self.tablas     = {}
+
+    def agregar(self, tabla, path, hoja):
+        """
+        Descripción: Agrega una tabla al archivo path en la hoja indicada, si la hoja ya existe se reemplaza.
+        """
+        self.tablas.setdefault(path, {})[hoja] = tabla
+
+    def escribir(self):
+        """
+        Descripción: Escribe todos los archivos, cada uno una sola vez, y vacía las tablas guardadas.
+        """
+        for path, hojas in self.tablas.items():
+            with etapa("exportacion_"+self.formato, filas=sum(len(tabla) for tabla in hojas.values())):
+                if self.formato == "excel" and self.actualizar == True and os.path.isfile(path) == True:
+                    with pd.ExcelWriter(path, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
+                        for hoja, tabla in hojas.items():
+                            tabla.to_excel(writer, sheet_name=hoja)
+                elif self.formato == "excel":
+                    with pd.ExcelWriter(path) as writer:
+                        for hoja, tabla in hojas.items():
+                            tabla.to_excel(writer, sheet_name=hoja)
+                else:
+                    for hoja, tabla in hojas.items():
+                        _escribir_columnar(tabla, path, hoja, self.formato)
+        self.tablas = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *args):
+        # Si hubo un error se escriben igual las tablas que alcanzaron a guardarse.
+        self.escribir()
+
+def guardar_tabla(tabla, path, hoja, exportador=None):
+    """
+    Descripción: Guarda una tabla como hoja de un libro Excel. Con un exportador la tabla se junta y se escribe al final
+                 con las demás; sin exportador se agrega la hoja al archivo (o se crea) en ese momento.
+
+    tabla       (DataFrame):    Tabla a guardar.
+    path              (str):    Ruta del archivo ".xlsx".
+    hoja              (str):    Nombre de la hoja.
+    exportador (ExportadorTablas):  Exportador del reporte (opcional).
+    """
+    if exportador is not None:
+        exportador.agregar(tabla, path, hoja)
+        return
+    with etapa("exportacion_excel", filas=len(tabla)):
+        if os.path.isfile(path) == True:
+            with pd.ExcelWriter(path, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
+                tabla.to_excel(writer, sheet_name=hoja)
+        else:
+            tabla.to_excel(path, sheet_name=hoja)
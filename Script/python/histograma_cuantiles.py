@@ -0,0 +1,174 @@
+import json
+import numpy as np
+import pandas as pd
+from .climatologia import CLASES_CALENDARIO, codigos_calendario, indice_clases, nombre_percentil
+
+class HistogramaCuantiles:
+    """
+    Descripción: Histogramas de resolución fija por (serie, clase de calendario) para estimar percentiles sin guardar los datos.
+                 Se actualizan con datos nuevos en O(filas nuevas), se combinan entre estaciones o periodos sumando conteos
+                 y se guardan en disco. El promedio, el conteo, el mínimo y el máximo de cada clase son exactos.
+
+                 Precisión: si todos los datos están en [minimo, maximo], cada percentil estimado está a una distancia
+                 menor o igual que el ancho de un intervalo, (maximo - minimo)/nbins, del valor de np.percentile.
+                 Los datos fuera del rango se cuentan en el primer o último intervalo, y el estimado se acota al mínimo
+                 y máximo observado de la clase.
+
+    series           (list):    Nombre de cada serie (ej. ["M-TEMP", "M-HR"] o ["244/M-TEMP", "212/M-TEMP"]).
+    minimo   (float/list):    Límite inferior del histograma, uno común o uno por serie.
+    maximo   (float/list):    Límite superior del histograma, uno común o uno por serie.
+    nbins             (int):    Número de intervalos de cada histograma.
+    por             (tuple):    Clases de calendario, por defecto ("HORA",).
+
+    Ejemplo:
+        h = HistogramaCuantiles(["M-TEMP"], minimo=-10, maximo=45, nbins=5500)
+        h.actualizar(df)
+        h.climatologia("M-TEMP", percentiles=(5, 95))
+    """
+    def __init__(self, series, minimo, maximo, nbins=1000, por=("HORA",)):
+        self.series  = list(series)
+        self.por     = tuple(por)
+        self.nbins   = int(nbins)
+        self.minimo  = np.broadcast_to(np.asarray(minimo, dtype=np.float64), (len(self.series),)).copy()
+        self.maximo  = np.broadcast_to(np.asarray(maximo, dtype=np.float64), (len(self.series),)).copy()
+        self.nclases = int(np.prod([CLASES_CALENDARIO[clase][0] for clase in self.por]))
+        forma = (len(self.series), self.nclases)
+        self.conteos = np.zeros(forma + (self.nbins,), dtype=np.int64)
+        self.suma    = np.zeros(forma, dtype=np.float64)
+        self.menor   = np.full(forma, np.inf)
+        self.mayor   = np.full(forma, -np.inf)
+
+    @property
+    def ancho(self):
+        """
+        Descripción: Ancho de los intervalos de cada serie, que es la cota del error de los percentiles.
+        """
+        return (self.maximo - self.minimo)/self.nbins
+
+    def _misma_grilla(self, otro):
+        return self.por == otro.por and self.nbins == otro.nbins
+
+    def actualizar(self, df, columnas=None):
+        """
+        Descripción: Agrega datos nuevos a los histogramas. Los NaN no se consideran.
+
+        df          (Dataframe):    Datos nuevos con índice de fechas.
+        columnas         (dict):    Columna de df para cada serie, {serie: columna}. Por defecto la columna con el nombre de la serie.
+        """
+        columnas = {serie: serie for serie in self.series if serie in df.columns} if columnas is None else columnas
+        if len(columnas) == 0 or len(df) == 0:
+            return self
+        k       = np.array([self.series.index(serie) for serie in columnas], dtype=np.intp)
+        valores = np.column_stack([df[c].to_numpy(dtype=np.float64) for c in columnas.values()])
+        codigos, _ = codigos_calendario(df.index, self.por)
+        valido  = ~np.isnan(valores) & (codigos >= 0)[:, None]
+        celda   = (k[None, :]*self.nclases + codigos[:, None])[valido]
+        serie   = np.broadcast_to(k[None, :], valores.shape)[valido]
+        x       = valores[valido]
+        intervalo = np.clip(((x - self.minimo[serie])/self.ancho[serie]).astype(np.intp), 0, self.nbins - 1)
+
+        n = self.conteos[:, :, 0].size
+        self.conteos += np.bincount(celda*self.nbins + intervalo, minlength=n*self.nbins).reshape(self.conteos.shape)
+        self.suma    += np.bincount(celda, weights=x, minlength=n).reshape(self.suma.shape)
+        np.fmin.at(self.menor.reshape(-1), celda, x)
+        np.fmax.at(self.mayor.reshape(-1), celda, x)
+        return self
+
+    def combinar(self, otro):
+        """
+        Descripción: Entrega un histograma nuevo con los conteos de ambos, por ejemplo de dos años o dos estaciones.
+                     Las series con el mismo nombre se suman, deben tener el mismo rango, intervalos y clases.
+        """
+        if self._misma_grilla(otro) == False:
+            raise ValueError("Los histogramas deben tener las mismas clases y número de intervalos.")
+        series = self.series + [s for s in otro.series if s not in self.series]
+        minimo = [self.minimo[self.series.index(s)] if s in self.series else otro.minimo[otro.series.index(s)] for s in series]
+        maximo = [self.maximo[self.series.index(s)] if s in self.series else otro.maximo[otro.series.index(s)] for s in series]
+        nuevo  = HistogramaCuantiles(series, minimo, maximo, self.nbins, self.por)
+        for h in (self, otro):
+            for i, s in enumerate(h.series):
+                j = series.index(s)
+                if h.minimo[i] != nuevo.minimo[j] or h.maximo[i] != nuevo.maximo[j]:
+                    raise ValueError("La serie "+repr(s)+" tiene distinto rango en los histogramas.")
+                nuevo.conteos[j] += h.conteos[i]
+                nuevo.suma[j]    += h.suma[i]
+                nuevo.menor[j]    = np.fmin(nuevo.menor[j], h.menor[i])
+                nuevo.mayor[j]    = np.fmax(nuevo.mayor[j], h.mayor[i])
+        return nuevo
+
+    def agrupar(self, series, nombre):
+        """
+        Descripción: Entrega un histograma con una sola serie que junta varias series, por ejemplo una curva regional.
+        """
+        i = [self.series.index(s) for s in series]
+        if len(set(self.minimo[i])) != 1 or len(set(self.maximo[i])) != 1:
+            raise ValueError("Las series a agrupar deben tener el mismo rango.")
+        nuevo = HistogramaCuantiles([nombre], self.minimo[i[0]], self.maximo[i[0]], self.nbins, self.por)
+        nuevo.conteos[0] = self.conteos[i].sum(axis=0)
+        nuevo.suma[0]    = self.suma[i].sum(axis=0)
+        nuevo.menor[0]   = self.menor[i].min(axis=0)
+        nuevo.mayor[0]   = self.mayor[i].max(axis=0)
+        return nuevo
+
+    def _estadistico_orden(self, acumulado, conteo, rango, k):
+        # Valor estimado del dato de orden "rango" (desde 0): posición proporcional dentro de su intervalo.
+        intervalo = (acumulado <= rango[..., None]).sum(axis=-1)
+        intervalo = np.minimum(intervalo, self.nbins - 1)
+        previo    = np.take_along_axis(acumulado, intervalo[..., None], axis=-1)[..., 0] - \
+                    np.take_along_axis(conteo, intervalo[..., None], axis=-1)[..., 0]
+        en_intervalo = np.take_along_axis(conteo, intervalo[..., None], axis=-1)[..., 0]
+        # Las clases sin datos quedan en el inicio del intervalo (luego se dejan en NaN), sin dividir por cero.
+        posicion = np.where(en_intervalo > 0, (rango - previo + 0.5)/np.maximum(en_intervalo, 1), 0.0)
+        return self.minimo[k][:, None] + (intervalo + posicion)*self.ancho[k][:, None]
+
+    def percentiles(self, serie, percentiles=(5, 95)):
+        """
+        Descripción: Percentiles estimados por clase para una serie, con la interpolación lineal de np.percentile.
+        """
+        k       = [self.series.index(serie)]
+        conteo  = self.conteos[k]
+        acumulado = np.cumsum(conteo, axis=-1)
+        n       = acumulado[..., -1]
+        tabla   = {}
+        for p in percentiles:
+            virtual = np.maximum(n - 1, 0)*np.true_divide(p, 100)
+            previo  = np.floor(virtual)
+            gamma   = virtual - previo
+            a = self._estadistico_orden(acumulado, conteo, previo, k)
+            b = self._estadistico_orden(acumulado, conteo, np.minimum(previo + 1, np.maximum(n - 1, 0)), k)
+            valor = np.clip(a + (b - a)*gamma, self.menor[k], self.mayor[k])
+            valor[n == 0] = np.nan
+            tabla[nombre_percentil(p)] = valor[0]
+        return pd.DataFrame(tabla, index=indice_clases(self.por))
+
+    def climatologia(self, serie, percentiles=(5, 95)):
+        """
+        Descripción: Tabla por clase con conteo, promedio y percentiles de una serie, como climatologia() para una variable.
+        """
+        k      = self.series.index(serie)
+        conteo = self.conteos[k].sum(axis=-1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            promedio = self.suma[k]/conteo
+        tabla = pd.DataFrame({"conteo": conteo, "promedio": promedio}, index=indice_clases(self.por))
+        return pd.concat([tabla, self.percentiles(serie, percentiles)], axis=1)
+
+    def guardar(self, path):
+        """
+        Descripción: Guarda los histogramas en un archivo .npz.
+        """
+        meta = {"series": self.series, "por": list(self.por), "nbins": self.nbins}
+        np.savez_compressed(
+            path, meta=np.array(json.dumps(meta)), minimo=self.minimo, maximo=self.maximo,
+            conteos=self.conteos, suma=self.suma, menor=self.menor, mayor=self.mayor)
+
+    @classmethod
+    def cargar(cls, path):
+        """
+        Descripción: Lee histogramas guardados con guardar().
+        """
+        with np.load(path) as archivo:
+            meta  = json.loads(str(archivo["meta"]))
+            nuevo = cls(meta["series"], archivo["minimo"], archivo["maximo"], meta["nbins"], meta["por"])
+            for nombre in ("conteos", "suma", "menor", "mayor"):
+                setattr(nuevo, nombre, archivo[nombre].copy())
+        return nuevo
@@ -0,0 +1,253 @@
+import os
+import json
+import atexit
+import time
+import threading
+import functools
+import tracemalloc
+from contextlib import contextmanager
+import pandas as pd
+
+# Variable de entorno para activar el registro al importar el paquete (ej. SINCA_INSTRUMENTACION=1, o "memoria" para
+# medir también el pico de memoria con tracemalloc). Al terminar el proceso el registro se guarda en el archivo de
+# ARCHIVO_ENTORNO (".csv", ".json" o ".trace.json", "{pid}" se reemplaza por el proceso), por defecto en el directorio
+# actual como "instrumentacion_{pid}.csv".
+VARIABLE_ENTORNO = "SINCA_INSTRUMENTACION"
+ARCHIVO_ENTORNO  = "SINCA_INSTRUMENTACION_ARCHIVO"
+
+# Registro activo, None si la instrumentación está desactivada (por defecto).
+_ACTIVO = None
+
+class RegistroEtapas:
+    """
+    Descripción: Registro de las etapas medidas con etapa() o @instrumentado mientras está activo: nombre, inicio, tiempo de
+                 reloj y de CPU, filas procesadas, pico de memoria (si memoria=True) y etapa contenedora. Se activa con
+                 activar() o con el bloque "with registro() as r" y se exporta como tabla, json o trace de Chrome.
+
+    memoria          (bool):    Mide el pico de memoria de cada etapa con tracemalloc (hace más lento el código medido).
+    """
+    def __init__(self, memoria=False):
+        self.memoria = memoria
+        self.eventos = []
+        self._pilas  = threading.local()
+        # True si tracemalloc se inició para este registro, solo entonces se detiene al desactivarlo.
+        self._tracemalloc = False
+
+    def _pila(self):
+        if not hasattr(self._pilas, "etapas"):
+            self._pilas.etapas = []
+        return self._pilas.etapas
+
+    def agregar(self, eventos):
+        """
+        Descripción: Agrega eventos medidos en otro proceso (ej. los trabajos de un reporte en paralelo).
+        """
+        self.eventos.extend(eventos)
+
+    def tabla(self):
+        """
+        Descripción: DataFrame con un evento por fila, en orden de inicio.
+        """
+        columnas = ["nombre", "padre", "nivel", "inicio", "segundos", "cpu", "filas", "memoria_mb", "pid", "hilo"]
+        tabla = pd.DataFrame(self.eventos, columns=columnas)
+        return tabla.sort_values("inicio", kind="stable").reset_index(drop=True)
+
+    def resumen(self):
+        """
+        Descripción: Resumen por etapa: llamadas, segundos totales, promedio y máximo, CPU, filas y pico de memoria,
+                     ordenado por segundos totales.
+        """
+        tabla = self.tabla()
+        resumen = tabla.groupby("nombre").agg(
+            llamadas=("segundos", "size"), segundos=("segundos", "sum"), promedio=("segundos", "mean"),
+            maximo=("segundos", "max"), cpu=("cpu", "sum"), filas=("filas", "sum"), memoria_mb=("memoria_mb", "max"))
+        return resumen.sort_values("segundos", ascending=False)
+
+    def a_json(self, path):
+        """
+        Descripción: Guarda los eventos como json.
+        """
+        with open(path, "w", encoding="utf-8") as archivo:
+            json.dump({"eventos": self.eventos}, archivo, ensure_ascii=False)
+
+    def a_chrome(self, path):
+        """
+        Descripción: Guarda los eventos en el formato "Trace Event" de Chrome, para verlos en chrome://tracing o Perfetto
+                     (una fila por proceso y hilo, las etapas anidadas se ven una dentro de otra).
+        """
+        eventos = [{
+            "name": evento["nombre"], "cat": "sinca", "ph": "X", "ts": evento["inicio"]*1e6, "dur": evento["segundos"]*1e6,
+            "pid": evento["pid"], "tid": evento["hilo"],
+            "args": {clave: evento[clave] for clave in ("cpu", "filas", "memoria_mb") if evento[clave] is not None}}
+            for evento in self.eventos]
+        with open(path, "w", encoding="utf-8") as archivo:
+            json.dump({"traceEvents": eventos, "displayTimeUnit": "ms"}, archivo, ensure_ascii=False)
+
+    def exportar(self, path):
+        """
+        Descripción: Guarda el registro según la extensión: ".csv" (eventos), ".json" (eventos) o ".trace.json" (Chrome).
+        """
+        if path.endswith(".trace.json"):
+            self.a_chrome(path)
+        elif path.endswith(".json"):
+            self.a_json(path)
+        else:
+            self.tabla().to_csv(path, index=False)
+
+class _Etapa:
+    __slots__ = ("registro", "nombre", "filas", "_inicio", "_cpu", "_memoria", "_pico")
+
+    def __init__(self, registro, nombre, filas):
+        self.registro = registro
+        self.nombre   = nombre
+        self.filas    = filas
+
+    def contar(self, filas):
+        """
+        Descripción: Registra el número de filas procesadas en la etapa.
+        """
+        self.filas = filas
+
+    def __enter__(self):
+        pila = self.registro._pila()
+        if self.registro.memoria == True and tracemalloc.is_tracing():
+            # El pico de la etapa contenedora se guarda antes de reiniciarlo para esta etapa.
+            actual, pico = tracemalloc.get_traced_memory()
+            if len(pila) > 0:
+                pila[-1]._pico = max(pila[-1]._pico, pico)
+            tracemalloc.reset_peak()
+            self._memoria, self._pico = actual, actual
+        pila.append(self)
+        self._cpu    = time.process_time()
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        fin  = time.perf_counter()
+        cpu  = time.process_time() - self._cpu
+        pila = self.registro._pila()
+        pila.pop()
+        memoria = None
+        if self.registro.memoria == True and tracemalloc.is_tracing():
+            pico = max(self._pico, tracemalloc.get_traced_memory()[1])
+            memoria = (pico - self._memoria)/2**20
+            if len(pila) > 0:
+                pila[-1]._pico = max(pila[-1]._pico, pico)
+            tracemalloc.reset_peak()
+        self.registro.eventos.append({
+            "nombre": self.nombre, "padre": pila[-1].nombre if len(pila) > 0 else None, "nivel": len(pila),
+            "inicio": self._inicio, "segundos": fin - self._inicio, "cpu": cpu, "filas": self.filas,
+            "memoria_mb": memoria, "pid": os.getpid(), "hilo": threading.get_ident()})
+        return False
+
+class _EtapaNula:
+    # Etapa sin registro activo: no mide nada, se usa la misma instancia en todas las llamadas.
+    __slots__ = ()
+
+    def contar(self, filas):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+_NULA = _EtapaNula()
+
+def etapa(nombre, filas=None):
+    """
+    Descripción: Bloque medido con el nombre de la etapa. Sin registro activo entrega una etapa vacía, el costo es una
+                 llamada y una comparación.
+
+    nombre            (str):    Nombre de la etapa (ej. "savefig").
+    filas             (int):    Filas procesadas (opcional, también con contar() dentro del bloque).
+
+    Ejemplo:
+        with etapa("lectura_csv") as e:
+            df = pd.read_csv(path)
+            e.contar(len(df))
+    """
+    if _ACTIVO is None:
+        return _NULA
+    return _Etapa(_ACTIVO, nombre, filas)
+
+def instrumentado(nombre=None):
+    """
+    Descripción: Decorador que mide cada llamada a la función como una etapa (por defecto con el nombre de la función).
+
+    Ejemplo:
+        @instrumentado()
+        def ciclo_diario(df, ...):
+    """
+    def decorador(funcion):
+        nombre_etapa = nombre or funcion.__name__
+        @functools.wraps(funcion)
+        def medida(*args, **kwargs):
+            if _ACTIVO is None:
+                return funcion(*args, **kwargs)
+            with _Etapa(_ACTIVO, nombre_etapa, None):
+                return funcion(*args, **kwargs)
+        return medida
+    return decorador
+
+def activar(memoria=False):
+    """
+    Descripción: Activa un registro nuevo y lo entrega. Con memoria=True se inicia tracemalloc si no estaba iniciado.
+    """
+    global _ACTIVO
+    _ACTIVO = RegistroEtapas(memoria)
+    if memoria == True and tracemalloc.is_tracing() == False:
+        tracemalloc.start()
+        _ACTIVO._tracemalloc = True
+    return _ACTIVO
+
+def _detener(registro):
+    # Detiene tracemalloc solo si lo inició el registro, si ya estaba iniciado antes se deja como estaba.
+    if registro is not None and registro._tracemalloc == True and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def desactivar():
+    """
+    Descripción: Desactiva el registro y lo entrega (None si no había uno activo).
+    """
+    global _ACTIVO
+    registro, _ACTIVO = _ACTIVO, None
+    _detener(registro)
+    return registro
+
+def registro_activo():
+    """
+    Descripción: Registro activo, o None si la instrumentación está desactivada.
+    """
+    return _ACTIVO
+
+@contextmanager
+def registro(memoria=False):
+    """
+    Descripción: Bloque con la instrumentación activa, al salir se restaura el registro anterior.
+
+    memoria          (bool):    Mide el pico de memoria de cada etapa.
+
+    Ejemplo:
+        with registro() as r:
+            reporte("Script/python/manifiesto_P001.json", procesos=1)
+        print(r.resumen())
+        r.a_chrome("reporte.trace.json")
+    """
+    global _ACTIVO
+    anterior = _ACTIVO
+    activo   = activar(memoria)
+    try:
+        yield activo
+    finally:
+        _detener(activo)
+        _ACTIVO = anterior
+
+def _exportar_al_salir(registro, path):
+    if len(registro.eventos) > 0:
+        registro.exportar(path.replace("{pid}", str(os.getpid())))
+
+if os.environ.get(VARIABLE_ENTORNO, "") not in ("", "0"):
+    atexit.register(_exportar_al_salir, activar(memoria=os.environ[VARIABLE_ENTORNO] == "memoria"),
+                    os.environ.get(ARCHIVO_ENTORNO) or "instrumentacion_{pid}.csv")
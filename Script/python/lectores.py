@@ -0,0 +1,202 @@
+import os
+import zipfile
+from contextlib import contextmanager
+from fnmatch import fnmatch
+import numpy as np
+import pandas as pd
+from .lectura_archivos import lectura_csv, alineacion_horaria, TIPO_FECHA, TIPO_VALORES
+
+class FormatoSerie:
+    """
+    Descripción: Descripción de un formato de archivo de series de tiempo, para leerlo con lectura_serie().
+                 Una tabla con una columna de fecha y una columna por variable; o, si se entrega lector, una función
+                 propia que entrega el DataFrame con índice "Fecha" (ej. los archivos del SINCA).
+
+    nombre            (str):    Nombre del formato en el registro.
+    patron            (str):    Patrón del nombre de archivo para reconocer el formato (ej. "id*_*_datos_*.csv").
+    separador         (str):    Separador de columnas.
+    decimal           (str):    Marca decimal.
+    columna_fecha     (str):    Columna con la fecha y hora (ej. "Date/Time").
+    orden_fecha       (str):    Orden de día, mes y año en la fecha: "DMY", "MDY" o "YMD". La hora va al final (HH:MM).
+    orden_mixto      (bool):    True si el archivo mezcla "DMY" y "MDY" (ej. fechas editadas en Excel con otra configuración
+                                regional). Cada fila usa el orden en que el día es mayor que 12; en las ambiguas se elige
+                                el orden cuya fecha queda entre las fechas seguras anterior y siguiente, y si ambas quedan
+                                se usa orden_fecha.
+    centinelas      (tuple):    Valores que indican dato faltante (ej. -99.9), quedan como NaN.
+    paso      (timedelta64):    Paso de la serie (ej. 30 minutos).
+    direcciones      (dict):    Variables de dirección en grados y su magnitud, {dirección: magnitud}, para usarlas como
+                                el viento (ej. {"Peak Direction": "Hs"}).
+    lector       (function):    Función path -> DataFrame con índice "Fecha" (opcional, reemplaza la lectura genérica).
+    """
+    def __init__(self, nombre, patron="*", separador=",", decimal=".", columna_fecha=None, orden_fecha="DMY",
+                 orden_mixto=False, centinelas=(), paso=np.timedelta64(1, 'h'), direcciones=None, lector=None):
+        if orden_fecha not in ("DMY", "MDY", "YMD"):
+            raise ValueError("orden_fecha debe ser 'DMY', 'MDY' o 'YMD', no "+repr(orden_fecha))
+        self.nombre        = nombre
+        self.patron        = patron
+        self.separador     = separador
+        self.decimal       = decimal
+        self.columna_fecha = columna_fecha
+        self.orden_fecha   = orden_fecha
+        self.orden_mixto   = orden_mixto
+        self.centinelas    = tuple(centinelas)
+        self.paso          = np.timedelta64(paso)
+        self.direcciones   = dict(direcciones or {})
+        self.lector        = lector
+
+    def __repr__(self):
+        return "FormatoSerie("+repr(self.nombre)+")"
+
+# Registro de formatos, {nombre: FormatoSerie}. En detectar_formato se revisan en el orden de registro.
+FORMATOS = {}
+
+def registrar_formato(formato):
+    """
+    Descripción: Agrega (o reemplaza) un formato en el registro y lo entrega.
+
+    Ejemplo:
+        registrar_formato(FormatoSerie("boya", patron="*boya*.csv", columna_fecha="Fecha", centinelas=(-999,)))
+    """
+    FORMATOS[formato.nombre] = formato
+    return formato
+
+def detectar_formato(path):
+    """
+    Descripción: Formato registrado cuyo patrón coincide con el nombre del archivo (o del csv dentro de un zip).
+    """
+    nombres = [os.path.basename(path)]
+    if path.lower().endswith(".zip"):
+        with zipfile.ZipFile(path) as archivo:
+            nombres = [os.path.basename(n) for n in archivo.namelist()]
+    for formato in FORMATOS.values():
+        if any(fnmatch(nombre, formato.patron) for nombre in nombres):
+            return formato
+    raise ValueError("Ningún formato registrado reconoce "+repr(path)+", formatos: "+str(list(FORMATOS)))
+
+def _fecha_componentes(anio, mes, dia, hora, minuto):
+    # datetime64 desde enteros, solo con aritmética entera (como fecha_sinca).
+    fecha = (np.asarray(anio, dtype=np.int64) - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (np.asarray(mes) - 1)
+    fecha = fecha.astype('datetime64[D]') + (np.asarray(dia) - 1)
+    return (fecha + (np.asarray(hora, dtype=np.int64)*60 + minuto).astype('timedelta64[m]')).astype(TIPO_FECHA)
+
+def _orden_mixto(a, b, anio, hora, minuto, dia_primero):
+    # Resuelve fila a fila si "a/b" es día/mes o mes/día, ver FormatoSerie.orden_mixto.
+    seguro_dmy = a > 12
+    seguro_mdy = b > 12
+    dmy = np.where(seguro_dmy | seguro_mdy, seguro_dmy, dia_primero)
+    ambiguo = ~(seguro_dmy | seguro_mdy) & (a != b)
+    if ambiguo.any():
+        fecha_dmy = _fecha_componentes(anio, np.clip(b, 1, 12), a, hora, minuto)
+        fecha_mdy = _fecha_componentes(anio, np.clip(a, 1, 12), b, hora, minuto)
+        fecha = np.where(dmy, fecha_dmy, fecha_mdy)
+        # Fechas seguras anterior y siguiente de cada fila.
+        n       = len(a)
+        seguro  = ~ambiguo
+        previo  = np.maximum.accumulate(np.where(seguro, np.arange(n), -1))
+        proximo = np.minimum.accumulate(np.where(seguro, np.arange(n), n)[::-1])[::-1]
+        desde   = np.where(previo >= 0, fecha[np.maximum(previo, 0)], np.datetime64("NaT"))
+        hasta   = np.where(proximo < n, fecha[np.minimum(proximo, n - 1)], np.datetime64("NaT"))
+        def dentro(f):
+            return (np.isnat(desde) | (f >= desde)) & (np.isnat(hasta) | (f <= hasta))
+        solo_dmy = dentro(fecha_dmy) & ~dentro(fecha_mdy)
+        solo_mdy = dentro(fecha_mdy) & ~dentro(fecha_dmy)
+        dmy = np.where(ambiguo & solo_dmy, True, np.where(ambiguo & solo_mdy, False, dmy))
+    return np.where(dmy, a, b), np.where(dmy, b, a)
+
+def fechas_texto(texto, orden_fecha="DMY", orden_mixto=False):
+    """
+    Descripción: Convierte fechas en texto como "31/01/2019 23:30" (o "1/31/2019 9:30") en datetime64, separando los números
+                 de todas las filas en una sola llamada y armando las fechas con aritmética entera.
+
+    texto       (array-like):    Fechas en texto.
+    orden_fecha       (str):    Orden de día, mes y año ("DMY", "MDY" o "YMD").
+    orden_mixto      (bool):    True si las filas mezclan "DMY" y "MDY", ver FormatoSerie.
+    """
+    texto  = pd.Series(texto, dtype=str)
+    # Todas las fechas como un solo texto de números separados por comas, convertido en una sola llamada.
+    numeros = np.fromstring(",".join(texto.tolist()).translate(str.maketrans("/-: T", ",,,,,")), dtype=np.int64, sep=",") \
+        if len(texto) > 0 else np.zeros(0, dtype=np.int64)
+    if len(numeros) == 5*len(texto):
+        partes = numeros.reshape(-1, 5)
+    else:
+        # Fechas con distinto número de campos (ej. sin hora o con segundos).
+        partes = texto.str.split(r"[/\-: T]+", regex=True, expand=True)
+        partes = partes.iloc[:, :5].reindex(columns=range(5)).fillna("0").to_numpy(dtype=np.int64)
+    a, b, c, hora, minuto = partes.T
+    if orden_fecha == "YMD":
+        anio, mes, dia = a, b, c
+    elif orden_mixto == True:
+        anio = c
+        dia, mes = _orden_mixto(a, b, c, hora, minuto, orden_fecha == "DMY")
+    else:
+        anio = c
+        dia, mes = (a, b) if orden_fecha == "DMY" else (b, a)
+    return _fecha_componentes(anio, mes, dia, hora, minuto)
+
+@contextmanager
+def _abrir(path, miembro=None):
+    # Archivo o csv dentro de un zip, leído directamente desde el zip sin extraerlo.
+    if path.lower().endswith(".zip") == False:
+        with open(path, "rb") as archivo:
+            yield archivo
+        return
+    with zipfile.ZipFile(path) as comprimido:
+        nombres = [n for n in comprimido.namelist() if n.lower().endswith(".csv")] if miembro is None else [miembro]
+        if len(nombres) == 0:
+            raise FileNotFoundError("No hay archivos csv en "+path)
+        with comprimido.open(nombres[0]) as archivo:
+            yield archivo
+
+def _lectura_tabla(path, formato, miembro=None):
+    with _abrir(path, miembro) as archivo:
+        df = pd.read_csv(archivo, sep=formato.separador, decimal=formato.decimal, dtype={formato.columna_fecha: str},
+                         float_precision="round_trip", engine="c")
+    variables = [c for c in df.columns if c != formato.columna_fecha]
+    valores   = df[variables].to_numpy(dtype=np.float64)
+    # Centinelas de dato faltante en una sola operación sobre toda la tabla.
+    if len(formato.centinelas) > 0:
+        valores[np.isin(valores, np.array(formato.centinelas, dtype=np.float64))] = np.nan
+    datos = pd.DataFrame(valores.astype(TIPO_VALORES), columns=variables, copy=False)
+    datos["Fecha"] = fechas_texto(df[formato.columna_fecha].to_numpy(), formato.orden_fecha, formato.orden_mixto)
+    return alineacion_horaria([datos], paso=formato.paso)
+
+def lectura_serie(path, formato=None, miembro=None, dtype=TIPO_VALORES):
+    """
+    Descripción: Lee un archivo (o un zip con el archivo) de cualquier formato registrado y entrega un DataFrame con
+                 índice "Fecha" sobre la grilla del paso del formato y valores del tipo dtype, igual que lectura_todoscsv.
+                 Así climatologia, rosa de los vientos y los gráficos se usan sin cambios.
+
+    path              (str):    Ruta del archivo ".csv" o ".zip".
+    formato  (str/FormatoSerie): Formato o nombre del formato registrado, por defecto se detecta por el nombre del archivo.
+    miembro           (str):    Archivo dentro del zip, por defecto el primer csv.
+    dtype        (np.dtype):    Tipo de los valores.
+
+    Ejemplo:
+        df = lectura_serie("Data/Waves Measuring Buoys Data/Waves Measuring Buoys Data.zip")
+        ciclo_direccion(df, "Peak Direction", magnitud="Hs")
+    """
+    formato = detectar_formato(path) if formato is None else FORMATOS[formato] if isinstance(formato, str) else formato
+    data = formato.lector(path) if formato.lector is not None else _lectura_tabla(path, formato, miembro)
+    return data if (data.dtypes == dtype).all() else data.astype(dtype)
+
+def _lectura_sinca(path):
+    return alineacion_horaria([lectura_csv(path)])
+
+registrar_formato(FormatoSerie(
+    "sinca",
+    patron      = "id*_*_datos_*.csv",
+    separador   = ";",
+    decimal     = ",",
+    direcciones = {"M-DIR": "M-VEL"},
+    lector      = _lectura_sinca))
+
+# Boyas de oleaje del Coastal Data System (Queensland): fechas con día y mes mezclados, -99.9 como dato faltante.
+registrar_formato(FormatoSerie(
+    "oleaje_cds",
+    patron        = "Coastal Data System - Waves*.csv",
+    columna_fecha = "Date/Time",
+    orden_fecha   = "DMY",
+    orden_mixto   = True,
+    centinelas    = (-99.9,),
+    paso          = np.timedelta64(30, 'm'),
+    direcciones   = {"Peak Direction": "Hs"}))
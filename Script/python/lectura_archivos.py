@@ -1,23 +1,307 @@
-
+import io
+import os
+import numpy as np
+import pandas as pd
+from functools import reduce
 from datetime import datetime
+from .cache_archivos import lectura_con_cache
+from .instrumentacion import etapa, instrumentado
+
+# Encabezados de los archivos descargados desde el SINCA.
+COLUMNA_FECHA = 'FECHA (YYMMDD)'
+COLUMNA_HORA  = 'HORA (HHMM)'
+COLUMNAS_REGISTROS = ['Registros validados', 'Registros preliminares', 'Registros no validados']
+
+# Tipo de fecha que entrega pd.to_datetime en la versión instalada de pandas (ns o us), para que ambos modos coincidan.
+TIPO_FECHA = pd.to_datetime(pd.Series(['20000101 000000']), format="%Y%m%d %H%M%S").dtype
+
+# Tipo de los valores de las variables en todas las lecturas.
+TIPO_VALORES = np.float32
+
+def nombre_variable(path):
+    """
+    Descripción: Obtiene el nombre de la variable a partir del nombre del archivo (ej. "id212_C-MP10_datos_...csv" -> "C-MP10").
+    """
+    return os.path.basename(path).split("_")[1]
+
+def fecha_sinca(fecha, hora):
+    """
+    Descripción: Convierte las columnas enteras YYMMDD y HHMM del SINCA en datetime64 usando solo aritmética entera.
+
+    fecha     (np.ndarray):    Fecha en formato entero YYMMDD (ej. 140101).
+    hora      (np.ndarray):    Hora en formato entero HHMM (ej. 2300).
+    """
+    fecha = np.asarray(fecha, dtype=np.int64)
+    hora  = np.asarray(hora, dtype=np.int64)
+    anio  = (2000 + fecha//10000 - 1970).astype('datetime64[Y]')
+    mes   = anio.astype('datetime64[M]') + (fecha//100 % 100 - 1)
+    dia   = mes.astype('datetime64[D]') + (fecha % 100 - 1)
+    segundos = (hora//100)*3600 + (hora % 100)*60
+    return (dia + segundos.astype('timedelta64[s]')).astype(TIPO_FECHA)
+
+def periodo_archivo(path):
+    """
+    Descripción: Primera y última fecha de un archivo según su nombre (ej. "id212_C-MP10_datos_140101_201231.csv" ->
+                 2014-01-01 00:00 y 2021-01-01 00:00, la hora 24:00 del último día). Entrega None si el nombre no las tiene.
+    """
+    partes = os.path.splitext(os.path.basename(path))[0].split("_")
+    if len(partes) < 5 or partes[2] != "datos" or any(len(p) != 6 or p.isdigit() == False for p in partes[3:5]):
+        return None
+    inicio, fin = fecha_sinca([int(partes[3]), int(partes[4])], [0, 0])
+    return inicio, fin + np.timedelta64(1, 'D')
+
+def limites_periodo(desde=None, hasta=None):
+    """
+    Descripción: Fechas desde y hasta como datetime64 (None si no se entregan). Como en EjeTiempo.rebanada, una fecha
+                 hasta en texto incompleta (ej. "2019" o "2019-08") incluye todo el periodo.
+    """
+    if isinstance(hasta, str):
+        hasta = pd.Period(hasta).end_time
+    return (None if desde is None else pd.Timestamp(desde).to_datetime64().astype(TIPO_FECHA),
+            None if hasta is None else pd.Timestamp(hasta).to_datetime64().astype(TIPO_FECHA))
+
+def seleccion_archivos(paths, variables=None, desde=None, hasta=None, alias=None):
+    """
+    Descripción: Archivos que pueden tener datos de las variables entre desde y hasta, según su nombre (variable y periodo),
+                 sin abrirlos. Los archivos cuyo nombre no tiene el periodo se mantienen.
+
+    paths            (list):    Rutas de los archivos csv.
+    variables        (list):    Variables a considerar, por defecto todas.
+    desde             (str):    Fecha inicial (opcional).
+    hasta             (str):    Fecha final, incluida (opcional).
+    alias            (dict):    Cambio de nombre de las variables antes de compararlas (ej. ALIAS_VARIABLES).
+
+    Ejemplo:
+        seleccion_archivos(glob("Data/P001_calidad aire/id212_*.csv"), ["M-VEL", "M-DIR"], "2019-06", "2019-08")
+    """
+    alias = alias or {}
+    desde, hasta = limites_periodo(desde, hasta)
+    seleccion = []
+    for path in paths:
+        if variables is not None and alias.get(nombre_variable(path), nombre_variable(path)) not in variables:
+            continue
+        periodo = periodo_archivo(path)
+        if periodo is not None and ((desde is not None and periodo[1] < desde) or (hasta is not None and periodo[0] > hasta)):
+            continue
+        seleccion.append(path)
+    return seleccion
+
+def recorte_periodo(df, desde=None, hasta=None):
+    """
+    Descripción: Filas de un DataFrame de lectura_csv (ordenado por 'Fecha') entre desde y hasta, ambas incluidas.
+                 Las posiciones se buscan con searchsorted, con el cache solo se leen del disco las filas del periodo.
+    """
+    desde, hasta = limites_periodo(desde, hasta)
+    if desde is None and hasta is None:
+        return df
+    fechas = df['Fecha'].to_numpy()
+    inicio = 0 if desde is None else np.searchsorted(fechas, desde.astype(fechas.dtype), side="left")
+    fin    = len(fechas) if hasta is None else np.searchsorted(fechas, hasta.astype(fechas.dtype), side="right")
+    return df.iloc[inicio:fin].reset_index(drop=True)
+
+def _clave_sinca(fecha):
+    # Fecha y hora como el entero YYMMDDHHMM de las columnas del SINCA, que crece con la fecha.
+    fecha = pd.Timestamp(fecha)
+    return ((fecha.year - 2000)*10000 + fecha.month*100 + fecha.day)*10000 + fecha.hour*100 + fecha.minute
 
-def lectura_csv(path):
-    #Apertura de 
-    variable = path.split("_")[1]
+def _linea(archivo, posicion):
+    # Inicio de la primera línea que empieza en posicion o después y su clave YYMMDDHHMM (None al final del archivo).
+    archivo.seek(posicion - 1)
+    archivo.readline()
+    comienzo = archivo.tell()
+    campos   = archivo.readline().split(b";", 2)
+    if len(campos) < 3:
+        return comienzo, None
+    return comienzo, int(campos[0])*10000 + int(campos[1])
+
+def _posicion_clave(archivo, clave, inicio, fin):
+    # Posición en bytes de la primera línea con clave >= clave entre inicio y fin (inicios de línea), por bisección sobre
+    # los bytes: solo se leen unas pocas líneas aunque el archivo tenga años de datos horarios.
+    while inicio < fin:
+        mitad = (inicio + fin)//2
+        comienzo, valor = _linea(archivo, mitad)
+        if comienzo >= fin:
+            # No hay líneas entre mitad y fin, quedan pocas líneas desde inicio y se recorren.
+            archivo.seek(inicio)
+            while archivo.tell() < fin:
+                comienzo = archivo.tell()
+                campos   = archivo.readline().split(b";", 2)
+                if len(campos) < 3 or int(campos[0])*10000 + int(campos[1]) >= clave:
+                    return comienzo
+            return fin
+        if valor is None or valor >= clave:
+            fin = comienzo
+        else:
+            # _linea deja el archivo al inicio de la línea siguiente.
+            inicio = archivo.tell()
+    return inicio
+
+def _bytes_periodo(path, desde, hasta):
+    # Encabezado y líneas del archivo entre desde y hasta, sin leer el resto (las filas del SINCA están ordenadas por fecha).
+    desde, hasta = limites_periodo(desde, hasta)
+    with open(path, "rb") as archivo:
+        encabezado = archivo.readline()
+        inicio     = archivo.tell()
+        fin        = archivo.seek(0, os.SEEK_END)
+        if desde is not None:
+            inicio = _posicion_clave(archivo, _clave_sinca(desde), inicio, fin)
+        if hasta is not None:
+            fin = _posicion_clave(archivo, _clave_sinca(hasta) + 1, inicio, fin)
+        archivo.seek(inicio)
+        return encabezado + archivo.read(fin - inicio)
+
+def _lectura_csv_texto(path):
+    # Lectura original: todas las columnas como texto y conversión de fecha con formato.
+    variable = nombre_variable(path)
     df = pd.read_csv(path, sep=";", dtype=str)
     df = df.iloc[:,:-1]
     # Definición fecha
-    df['Fecha'] = '20'+df['FECHA (YYMMDD)']+' '+df['HORA (HHMM)']+'00'
+    df['Fecha'] = '20'+df[COLUMNA_FECHA]+' '+df[COLUMNA_HORA]+'00'
     df['Fecha'] = pd.to_datetime(df['Fecha'], format="%Y%m%d %H%M%S")
-    df          = df.drop(['FECHA (YYMMDD)', 'HORA (HHMM)'], axis=1)
+    df          = df.drop([COLUMNA_FECHA, COLUMNA_HORA], axis=1)
     if ("Unnamed: 2" in df.columns) == True:
         df = df.rename({"Unnamed: 2": variable}, axis=1)
     if ('Registros validados' in df.columns) == True:
         df = df.drop(['Registros no validados','Registros preliminares'], axis=1)
         df = df.rename({'Registros validados': variable}, axis=1)
-    df[variable] = df[variable].str.replace(',','.').astype(np.float32)
+    df[variable] = df[variable].str.replace(',','.').astype(TIPO_VALORES)
+    return df
+
+def _lectura_csv_rapido(path, desde=None, hasta=None):
+    # Lectura directa: fecha y hora como enteros, valores con coma decimal leídos como número. Con desde o hasta solo se
+    # leen las líneas del periodo.
+    variable = nombre_variable(path)
+    with open(path, "r", encoding="utf-8") as archivo:
+        encabezado = archivo.readline().rstrip("\r\n").split(";")
+    # Solo se consideran los dos formatos conocidos: columna sin nombre o columnas de "Registros ...".
+    if encabezado[:2] != [COLUMNA_FECHA, COLUMNA_HORA] or encabezado[2] not in ("", COLUMNAS_REGISTROS[0]):
+        return recorte_periodo(_lectura_csv_texto(path), desde, hasta)
+    fuente = path if desde is None and hasta is None else io.BytesIO(_bytes_periodo(path, desde, hasta))
+    df = pd.read_csv(
+        fuente,
+        sep              = ";",
+        decimal          = ",",
+        header           = 0,
+        names            = [COLUMNA_FECHA, COLUMNA_HORA, variable],
+        usecols          = [0, 1, 2],
+        dtype            = {COLUMNA_FECHA: np.int64, COLUMNA_HORA: np.int64, variable: np.float64},
+        float_precision  = "round_trip",
+        engine           = "c")
+    # Se lee en float64 y luego se convierte, igual que la conversión desde texto.
+    df = pd.DataFrame({
+        variable: df[variable].to_numpy().astype(TIPO_VALORES),
+        'Fecha' : fecha_sinca(df[COLUMNA_FECHA].to_numpy(), df[COLUMNA_HORA].to_numpy()),
+        })
+    # Las líneas ya son del periodo salvo por los segundos de desde y hasta.
+    return recorte_periodo(df, desde, hasta)
+
+def lectura_csv(path, modo="rapido", cache=None, desde=None, hasta=None):
+    """
+    Descripción: Lee un archivo de estación del SINCA (separador ";" y coma decimal) y entrega la variable con su fecha.
+
+    path              (str):    Ruta del archivo csv, el nombre debe tener la forma "id212_C-MP10_datos_...csv".
+    modo              (str):    "rapido" lee fecha, hora y valores como números (por defecto).
+                                "texto" usa la lectura original como texto, más lenta.
+    cache        (bool/str):    True usa el cache en la carpeta por defecto, un "str" indica la carpeta del cache.
+                                None o False lee siempre el archivo.
+    desde             (str):    Fecha inicial (opcional).
+    hasta             (str):    Fecha final, incluida (opcional). Con desde o hasta en modo "rapido" se buscan las líneas
+                                del periodo por bisección sobre los bytes del archivo y solo esas se leen; con cache se
+                                cargan solo las filas del periodo del archivo binario (la primera vez se guarda completo).
+    Ejemplo:
+        lectura_csv("Data/P001_calidad aire/id212_C-MP10_datos_140101_201231.csv")
+        lectura_csv("Data/P001_calidad aire/id212_M-VEL_datos_140101_201231.csv", desde="2019-06", hasta="2019-08")
+    """
+    if cache not in (None, False):
+        carpeta = None if cache == True else cache
+        return recorte_periodo(lectura_con_cache(path, lambda p: lectura_csv(p, modo), carpeta), desde, hasta)
+    if modo not in ("rapido", "texto"):
+        raise ValueError("modo debe ser 'rapido' o 'texto', no "+repr(modo))
+    with etapa("lectura_csv") as medida:
+        df = _lectura_csv_rapido(path, desde, hasta) if modo == "rapido" else recorte_periodo(_lectura_csv_texto(path), desde, hasta)
+        medida.contar(len(df))
     return df
 
-def lectura_todoscsv(paths):
-    data = reduce(lambda left,right: pd.merge(left,right,on='Fecha', how="outer"), [lectura_csv(path) for path in paths])
-    return data.set_index("Fecha").sort_index()
\ No newline at end of file
+@instrumentado("union_merge")
+def _union_merge(frames):
+    # Unión original con merge sucesivos, se usa cuando los datos no están en una grilla horaria.
+    data = reduce(lambda left,right: pd.merge(left,right,on='Fecha', how="outer"), frames)
+    return data.set_index("Fecha").sort_index()
+
+@instrumentado()
+def alineacion_horaria(frames, paso=np.timedelta64(1, 'h')):
+    """
+    Descripción: Une los DataFrames entregados por lectura_csv sobre una grilla horaria común en una sola pasada.
+                 Se reserva un bloque (variable x tiempo) para todo el periodo y cada archivo se copia en su posición
+                 según el desfase en horas. El resultado es igual a la unión con pd.merge(how="outer") ordenada por fecha.
+                 Si alguna fecha no cae en una hora exacta o está repetida se usa la unión con pd.merge.
+
+    frames           (list):    Lista de DataFrames con columna 'Fecha' y una o más variables.
+    paso      (timedelta64):    Paso de la grilla, por defecto una hora (ej. 30 minutos para datos de oleaje).
+    """
+    hora     = np.timedelta64(paso)
+    fechas   = [df['Fecha'].to_numpy() for df in frames]
+    columnas = [[c for c in df.columns if c != 'Fecha'] for df in frames]
+    nombres  = [c for cs in columnas for c in cs]
+    valores  = [df[c].to_numpy() for df, cs in zip(frames, columnas) for c in cs]
+    if len(frames) == 0 or len(set(nombres)) != len(nombres) or any(v.dtype.kind != 'f' for v in valores) \
+            or len(set(f.dtype for f in fechas)) != 1 or sum(len(f) for f in fechas) == 0:
+        return _union_merge(frames)
+    # Fechas como enteros en la unidad del datetime64, para operar solo con aritmética entera.
+    paso    = int(hora/np.timedelta64(1, np.datetime_data(fechas[0].dtype)[0]))
+    enteros = [f.view(np.int64) for f in fechas]
+    inicio  = min(int(e.min()) for e in enteros if len(e) > 0)
+    fin     = max(int(e.max()) for e in enteros if len(e) > 0)
+    n       = (fin - inicio)//paso + 1
+
+    # Desfase en horas de cada archivo respecto al inicio del periodo.
+    desfases = []
+    presente = np.zeros(n, dtype=bool)
+    for e in enteros:
+        delta = e - inicio
+        if (delta % paso).any():
+            return _union_merge(frames)
+        desfase = (delta//paso).astype(np.intp)
+        # Fechas estrictamente crecientes no se repiten, en otro caso se cuentan.
+        if len(desfase) > 1 and (np.diff(desfase) <= 0).any() and np.bincount(desfase, minlength=n).max() > 1:
+            return _union_merge(frames)
+        presente[desfase] = True
+        desfases.append(desfase)
+
+    # Un solo bloque (variable x tiempo), se transpone para que pandas lo use sin copiarlo.
+    bloque = np.full((len(nombres), n), np.nan, dtype=np.result_type(*valores))
+    j = 0
+    for desfase, cs in zip(desfases, columnas):
+        for _ in cs:
+            bloque[j, desfase] = valores[j]
+            j += 1
+    indice = pd.DatetimeIndex((inicio + np.arange(n, dtype=np.int64)*paso).view(fechas[0].dtype), name="Fecha")
+    data = pd.DataFrame(bloque.T, index=indice, columns=nombres, copy=False)
+    # Se eliminan las horas que no aparecen en ningún archivo, igual que en la unión con merge.
+    if presente.all() == False:
+        data = data[presente]
+    return data
+
+@instrumentado()
+def lectura_todoscsv(paths, modo="rapido", cache=None, dtype=TIPO_VALORES, variables=None, desde=None, hasta=None):
+    """
+    Descripción: Lee los archivos de una estación y los une en un DataFrame (tiempo x variable) con índice de fechas.
+                 Con variables, desde o hasta no se abren los archivos de otras variables o de otros periodos (según su
+                 nombre) y de cada archivo solo se leen las filas del periodo (ver lectura_csv).
+
+    paths            (list):    Rutas de los archivos csv.
+    modo              (str):    Modo de lectura de lectura_csv.
+    cache        (bool/str):    Cache de lectura_csv.
+    dtype        (np.dtype):    Tipo de los valores.
+    variables        (list):    Variables a leer, por defecto todas.
+    desde             (str):    Fecha inicial (opcional).
+    hasta             (str):    Fecha final, incluida (opcional).
+
+    Ejemplo:
+        lectura_todoscsv(glob("Data/P001_calidad aire/id212_*.csv"), variables=["M-VEL", "M-DIR"], desde="2019-06", hasta="2019-08")
+    """
+    paths = seleccion_archivos(paths, variables, desde, hasta)
+    if len(paths) == 0:
+        return pd.DataFrame(index=pd.DatetimeIndex([], dtype=TIPO_FECHA, name="Fecha"), dtype=dtype)
+    data = alineacion_horaria([lectura_csv(path, modo, cache, desde, hasta) for path in paths])
+    return data if (data.dtypes == dtype).all() else data.astype(dtype)
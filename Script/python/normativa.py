@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+from .completitud import bloque_series, UMBRAL_COMPLETITUD
+from .climatologia import estadisticos_por_clase, nombre_percentil
+
+# Normas primarias de calidad del aire (Chile), en las unidades de los archivos del SINCA (MP en µg/m³N, gases en ppbv
+# salvo CO en ppmv). Para cada contaminante: ventana del promedio móvil en horas, límite del valor diario (promedio de 24 h,
+# o máximo diario de los promedios de 8 h) y percentil anual de ese valor diario que se compara con el límite.
+# Revisar los valores del decreto vigente antes de usarlos en un informe, se pueden cambiar o agregar entradas.
+NORMAS = {
+    "C-MP10": {"ventana": 24, "limite": 130, "percentil": 98, "unidad": "µg/m³N"},
+    "C-MP25": {"ventana": 24, "limite": 50,  "percentil": 98, "unidad": "µg/m³N"},
+    "C-O3"  : {"ventana": 8,  "limite": 61,  "percentil": 99, "unidad": "ppbv"},
+    "C-CO"  : {"ventana": 8,  "limite": 9,   "percentil": 99, "unidad": "ppmv"},
+    "C-SO2" : {"ventana": 24, "limite": 53,  "percentil": 99, "unidad": "ppbv"},
+    }
+
+# Los datos del SINCA marcan el final de la hora (01:00 a 24:00), la hora 24:00 (00:00 del día siguiente) es del día anterior.
+DESFASE_SINCA = -1
+
+def media_movil(valores, ventana, minimo=None):
+    """
+    Descripción: Promedio móvil hacia atrás (la hora y las ventana - 1 horas anteriores) de muchas series a la vez, con sumas
+                 acumuladas de los valores y del número de datos válidos, sin recorrer las ventanas. Los NaN no se cuentan y
+                 el promedio queda NaN si la ventana tiene menos de minimo datos válidos (o no está completa al inicio).
+
+    valores    (np.ndarray):    Arreglo (tiempo, serie) sobre una grilla regular sin huecos en el índice.
+    ventana           (int):    Número de pasos de la ventana (ej. 24 o 8 horas).
+    minimo            (int):    Mínimo de datos válidos en la ventana, por defecto el 75% de la ventana (18 de 24, 6 de 8).
+
+    Ejemplo:
+        media_movil(valores, 8)     # como pd.DataFrame(valores).rolling(8, min_periods=6).mean()
+    """
+    valores = np.asarray(valores)
+    if valores.ndim == 1:
+        return media_movil(valores[:, None], ventana, minimo)[:, 0]
+    minimo = int(np.ceil(UMBRAL_COMPLETITUD*ventana)) if minimo is None else minimo
+    valido = ~np.isnan(valores)
+    T, K   = valores.shape
+    # Sumas acumuladas en float64 (con un cero al inicio) para que la resta de dos sumas no pierda precisión.
+    suma   = np.zeros((T + 1, K), dtype=np.float64)
+    conteo = np.zeros((T + 1, K), dtype=np.int64)
+    np.cumsum(np.where(valido, valores, 0), axis=0, dtype=np.float64, out=suma[1:])
+    np.cumsum(valido, axis=0, out=conteo[1:])
+    desde    = np.maximum(np.arange(1, T + 1) - ventana, 0)
+    n        = conteo[1:] - conteo[desde]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        promedio = (suma[1:] - suma[desde])/n
+    return np.where(n >= max(minimo, 1), promedio, np.nan).astype(valores.dtype if valores.dtype.kind == 'f' else np.float64)
+
+def _por_dia(valores, eje, desfase_horas):
+    # Arreglo (día, hora del día, serie) y las fechas de cada día, con NaN en las horas fuera del eje.
+    if np.timedelta64(eje.paso, eje.unidad) != np.timedelta64(1, 'h'):
+        raise ValueError("Las métricas normativas necesitan datos horarios.")
+    dia, dias = eje.dias(desfase_horas)
+    hora      = eje.campo("HORA", desfase_horas)
+    tabla     = np.full((len(dias), 24, valores.shape[1]), np.nan, dtype=valores.dtype)
+    tabla[dia, hora] = valores
+    return tabla, dias
+
+def valor_diario(tabla, minimo_horas=None, maximo=False):
+    """
+    Descripción: Promedio (o máximo) diario de un arreglo (día, hora del día, serie). El valor queda NaN en los días con
+                 menos de minimo_horas datos válidos.
+
+    tabla      (np.ndarray):    Arreglo (día, hora del día, serie).
+    minimo_horas      (int):    Mínimo de horas válidas del día, por defecto el 75% (18 de 24).
+    maximo           (bool):    True para el máximo diario en lugar del promedio.
+    """
+    minimo_horas = int(np.ceil(UMBRAL_COMPLETITUD*tabla.shape[1])) if minimo_horas is None else minimo_horas
+    valido = ~np.isnan(tabla)
+    n      = valido.sum(axis=1)
+    if maximo == True:
+        # fmax ignora los NaN sin advertencias en los días sin datos.
+        valor = np.fmax.reduce(tabla, axis=1)
+    else:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            valor = np.where(valido, tabla, 0).sum(axis=1, dtype=np.float64)/n
+    return np.where(n >= max(minimo_horas, 1), valor, np.nan)
+
+def metricas_diarias(datos, contaminantes=None, normas=NORMAS, desfase_horas=DESFASE_SINCA):
+    """
+    Descripción: Valor diario de cada contaminante según su norma: promedio diario (ventana de 24 h) o máximo diario de los
+                 promedios móviles de 8 h, con los criterios de 75% de datos válidos (18 horas, 6 de 8 horas para cada
+                 promedio móvil y 18 promedios de 8 h para el máximo). Se calcula para todas las estaciones y contaminantes
+                 de cada ventana en una sola operación sobre el arreglo (tiempo, serie).
+
+    datos (CuboEstaciones/DataFrame):  Datos de varias estaciones, o de una estación con índice de fechas horario.
+    contaminantes    (list):    Variables a evaluar, por defecto las que están en normas.
+    normas           (dict):    {variable: {"ventana": horas, "limite": valor, "percentil": p}}, ver NORMAS.
+    desfase_horas     (int):    Horas que se suman a las fechas para asignar el día (-1 para las horas al final del periodo).
+
+    Entrega un DataFrame (día x serie).
+
+    Ejemplo:
+        diario = metricas_diarias(cubo)
+        (diario > 50).sum()
+    """
+    valores, eje, series = bloque_series(datos)
+    variable = series.get_level_values("variable")
+    if contaminantes is None:
+        contaminantes = [v for v in normas if v in set(variable)]
+    columnas = np.flatnonzero(variable.isin(contaminantes))
+    diario   = None
+    # Un grupo por ventana, todas las estaciones y contaminantes del grupo van juntos.
+    for ventana in sorted({normas[v]["ventana"] for v in contaminantes}):
+        grupo   = columnas[np.isin(variable[columnas], [v for v in contaminantes if normas[v]["ventana"] == ventana])]
+        horaria = valores[:, grupo]
+        if ventana == 24:
+            tabla, dias = _por_dia(horaria, eje, desfase_horas)
+            valor = valor_diario(tabla)
+        else:
+            tabla, dias = _por_dia(media_movil(horaria, ventana), eje, desfase_horas)
+            valor = valor_diario(tabla, maximo=True)
+        if diario is None:
+            diario = np.full((len(dias), len(columnas)), np.nan)
+        diario[:, np.searchsorted(columnas, grupo)] = valor
+    if diario is None:
+        return pd.DataFrame(index=pd.DatetimeIndex([], name="Fecha"), columns=series[columnas])
+    return pd.DataFrame(diario, index=pd.DatetimeIndex(dias, name="Fecha"), columns=series[columnas])
+
+def resumen_normativo(datos, contaminantes=None, normas=NORMAS, minimo_dias=None, desfase_horas=DESFASE_SINCA):
+    """
+    Descripción: Resumen anual de cada estación y contaminante frente a su norma: días válidos, promedio anual de los valores
+                 diarios, máximo diario, percentil anual de la norma (98 o 99), número de días sobre el límite y si el
+                 percentil cumple el límite. Los años con menos de minimo_dias días válidos quedan sin percentil ni
+                 cumplimiento.
+
+    datos (CuboEstaciones/DataFrame):  Datos de varias estaciones, o de una estación con índice de fechas horario.
+    contaminantes    (list):    Variables a evaluar, por defecto las que están en normas.
+    normas           (dict):    Ventana, límite y percentil de cada variable, ver NORMAS.
+    minimo_dias       (int):    Mínimo de días válidos del año, por defecto el 75% de los días del año.
+    desfase_horas     (int):    Horas que se suman a las fechas para asignar el día (-1 para los datos del SINCA).
+
+    Entrega un DataFrame con una fila por (estación, contaminante, año).
+
+    Ejemplo:
+        resumen = resumen_normativo(cubo)
+        resumen[resumen["cumple"] == False]
+    """
+    diario = metricas_diarias(datos, contaminantes, normas, desfase_horas)
+    series = diario.columns
+    if len(diario) == 0:
+        return pd.DataFrame()
+    anio   = diario.index.year.to_numpy()
+    codigo = anio - anio[0]
+    nanios = int(codigo[-1]) + 1
+    variable    = series.get_level_values("variable")
+    percentiles = sorted({normas[v]["percentil"] for v in set(variable)})
+    tablas = estadisticos_por_clase(diario.to_numpy(), codigo, nanios, percentiles)
+
+    limite  = np.array([normas[v]["limite"] for v in variable], dtype=np.float64)
+    p_norma = np.array([normas[v]["percentil"] for v in variable])
+    sobre   = (diario.to_numpy() > limite[None, :])
+    excedencias = np.stack([np.bincount(codigo, weights=sobre[:, k], minlength=nanios) for k in range(len(series))], axis=1)
+    # Días del año calendario, los años incompletos en los extremos del periodo cuentan como años con pocos datos.
+    anios     = np.arange(anio[0], anio[-1] + 1)
+    dias_anio = 365 + ((anios % 4 == 0) & ((anios % 100 != 0) | (anios % 400 == 0)))
+    minimo    = np.ceil(UMBRAL_COMPLETITUD*dias_anio) if minimo_dias is None else np.full(nanios, minimo_dias)
+    suficiente = tablas["conteo"] >= minimo[:, None]
+    valor_p = np.full((nanios, len(series)), np.nan)
+    for p in percentiles:
+        valor_p[:, p_norma == p] = tablas[nombre_percentil(p)][:, p_norma == p]
+    valor_p = np.where(suficiente, valor_p, np.nan)
+
+    # Filas (serie, año) en el orden de las series.
+    K = len(series)
+    resumen = series[np.repeat(np.arange(K), nanios)].to_frame(index=False)
+    resumen["anio"]            = np.tile(anios, K)
+    resumen["dias_validos"]    = tablas["conteo"].T.ravel()
+    resumen["completitud"]     = (tablas["conteo"]/dias_anio[:, None]).T.ravel()
+    resumen["promedio"]        = tablas["promedio"].T.ravel()
+    resumen["maximo"]          = diario.groupby(anio).max().to_numpy().T.ravel()
+    resumen["percentil"]       = np.repeat(p_norma, nanios)
+    resumen["valor_percentil"] = valor_p.T.ravel()
+    resumen["limite"]          = np.repeat(limite, nanios)
+    resumen["excedencias"]     = excedencias.T.ravel().astype(np.int64)
+    resumen["cumple"]          = pd.array(np.where(suficiente, valor_p <= limite[None, :], pd.NA).T.ravel(), dtype="boolean")
+    resumen = resumen.rename(columns={"variable": "contaminante"})
+    return resumen.set_index([c for c in ("estacion", "contaminante") if c in resumen.columns] + ["anio"])
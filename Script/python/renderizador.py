@@ -0,0 +1,57 @@
+import matplotlib.pyplot as plt
+
+class Renderizador:
+    """
+    Descripción: Guarda las figuras de cada tipo de gráfico para reutilizarlas entre estaciones y variables.
+                 La primera vez se crea la figura completa (ejes, grilla, ticks, barra de colores y leyenda) y en las
+                 siguientes solo se cambian los datos (set_data, set_array, barras nuevas) y los textos antes de guardar.
+                 Se entrega a las funciones de gráficos con el argumento renderizador; sin él cada gráfico crea y cierra
+                 su propia figura como antes.
+
+    Ejemplo:
+        with Renderizador() as renderizador:
+            for variable in ["M-TEMP", "M-HR"]:
+                ciclo_diario(df, variable, "Estación San Fernando", "Hora Local [horas]", variable,
+                             ylim={"bottom": 0, "top": 100}, renderizador=renderizador)
+    """
+    def __init__(self):
+        self.plantillas = {}
+
+    def plantilla(self, clave, crear):
+        """
+        Descripción: Entrega la plantilla (diccionario con la figura y sus elementos) guardada con la clave,
+                     o la crea con la función crear si no existe.
+
+        clave           (tuple):    Tipo de gráfico y parámetros que definen la figura (ej. ("ciclo_estacional", vmin, vmax, step)).
+        crear        (function):    Función sin argumentos que entrega un diccionario con al menos la llave "fig".
+        """
+        if clave not in self.plantillas:
+            self.plantillas[clave] = crear()
+        return self.plantillas[clave]
+
+    def cerrar(self):
+        """
+        Descripción: Cierra todas las figuras guardadas.
+        """
+        for plantilla in self.plantillas.values():
+            plt.close(plantilla["fig"])
+        self.plantillas = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cerrar()
+
+def obtener_plantilla(renderizador, clave, crear):
+    """
+    Descripción: Plantilla del renderizador, o una plantilla nueva si no se usa renderizador.
+    """
+    return crear() if renderizador is None else renderizador.plantilla(clave, crear)
+
+def cerrar_plantilla(renderizador, plantilla):
+    """
+    Descripción: Cierra la figura solo si no pertenece a un renderizador.
+    """
+    if renderizador is None:
+        plt.close(plantilla["fig"])
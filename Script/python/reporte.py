@@ -0,0 +1,376 @@
+import os
+import sys
+import json
+import time
+import argparse
+import traceback
+from glob import glob
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import matplotlib
+import numpy as np
+import pandas as pd
+import matplotlib.dates as mdates
+from .lectura_archivos import lectura_csv, lectura_todoscsv
+from .estaciones import ALIAS_VARIABLES, lectura_info, id_estacion
+from .renderizador import Renderizador
+from .exportacion import ExportadorTablas, FORMATOS_TABLAS
+from .cache_salidas import salidas_trabajo, huella_trabajo, leer_manifiesto, escribir_manifiesto, vigente, podar_salidas
+from .instrumentacion import RegistroEtapas, etapa, registro
+from .series_de_tiempo import series_de_tiempo
+from .ciclo_diario import ciclo_diario
+from .ciclo_diario_direccion import ciclo_diario_direccion
+from .ciclo_estacional import ciclo_estacional
+from .ciclo_estacional_viento import ciclo_estacional_viento
+from .rosa_viento import rosa_vientos
+
+# Funciones de gráficos disponibles en el manifiesto.
+GRAFICOS = {
+    "series_de_tiempo"       : series_de_tiempo,
+    "ciclo_diario"           : ciclo_diario,
+    "ciclo_diario_direccion" : ciclo_diario_direccion,
+    "ciclo_estacional"       : ciclo_estacional,
+    "ciclo_estacional_viento": ciclo_estacional_viento,
+    "rosa_vientos"           : rosa_vientos,
+    }
+
+# Argumentos de cada gráfico que son variables de la estación, para omitir los trabajos sin datos.
+ARGUMENTOS_VARIABLE = {
+    "ciclo_estacional_viento": ("velocidad", "direccion"),
+    "rosa_vientos"           : ("var_vientos", "var_direccion"),
+    }
+
+# Los gráficos que agregan hojas al mismo archivo Excel de la estación se ejecutan en el mismo proceso, uno tras otro,
+# y el archivo se escribe una sola vez al final del grupo.
+EXCEL_COMPARTIDO = {
+    "ciclo_estacional"       : "CE",
+    "ciclo_estacional_viento": "CE",
+    }
+
+# Datos de estaciones ya leídos y renderizador de cada proceso.
+_ESTACIONES   = {}
+_RENDERIZADOR = None
+
+def _iniciar_proceso():
+    global _RENDERIZADOR
+    matplotlib.use("Agg")
+    _RENDERIZADOR = Renderizador()
+
+def variables_trabajo(trabajo):
+    """
+    Descripción: Variables de la estación que usa un trabajo.
+    """
+    nombres = ARGUMENTOS_VARIABLE.get(trabajo["grafico"], ("variable",))
+    return [trabajo["parametros"][nombre] for nombre in nombres if nombre in trabajo["parametros"]]
+
+def clave_trabajo(trabajo):
+    """
+    Descripción: Clave de un trabajo en el manifiesto de salidas (ej. "id212/ciclo_diario/M-TEMP").
+    """
+    return "id"+str(trabajo["estacion"])+"/"+trabajo["grafico"]+"/"+"/".join(variables_trabajo(trabajo))
+
+def expandir_manifiesto(manifiesto, estaciones=None):
+    """
+    Descripción: Lista de trabajos (estación x gráfico x variable) a partir del manifiesto.
+                 Los trabajos cuyas variables no tiene la estación se marcan como "sin datos".
+
+    manifiesto       (dict):    Manifiesto del reporte, ver reporte().
+    estaciones       (list):    Estaciones a considerar, por defecto las del manifiesto o todas las de "_info.txt".
+    """
+    data_folder = manifiesto["data_folder"]
+    info        = lectura_info(data_folder)
+    estaciones  = estaciones or manifiesto.get("estaciones") or info.index.tolist()
+    nombres     = estaciones if isinstance(estaciones, dict) else {}
+    trabajos    = []
+    for estacion in estaciones:
+        id     = id_estacion(estacion)
+        nombre = nombres.get(estacion, info.loc[id, "nombre_estacion"])
+        disponibles = {
+            ALIAS_VARIABLES.get(os.path.basename(path).split("_")[1], os.path.basename(path).split("_")[1])
+            for path in glob(os.path.join(data_folder, "id"+str(id)+"_*.csv"))}
+        for grafico in manifiesto["graficos"]:
+            if grafico["tipo"] not in GRAFICOS:
+                raise ValueError("tipo de gráfico debe ser uno de "+str(list(GRAFICOS))+", no "+repr(grafico["tipo"]))
+            comunes    = {clave: valor for clave, valor in grafico.items() if clave not in ("tipo", "variables")}
+            por_variable = grafico.get("variables", {None: {}})
+            for variable, parametros in por_variable.items():
+                parametros = dict(comunes, **parametros)
+                if variable is not None:
+                    parametros["variable"] = variable
+                trabajo = {"estacion": id, "nombre_estacion": nombre, "grafico": grafico["tipo"], "parametros": parametros}
+                trabajo["sin_datos"] = any(v not in disponibles for v in variables_trabajo(trabajo))
+                trabajos.append(trabajo)
+    return trabajos
+
+def agrupar_trabajos(trabajos):
+    """
+    Descripción: Agrupa los trabajos que escriben el mismo archivo Excel, cada grupo se ejecuta en un solo proceso.
+                 Los grupos quedan ordenados por estación, para que cada proceso lea pocas estaciones.
+    """
+    grupos = {}
+    for n, trabajo in enumerate(trabajos):
+        compartido = EXCEL_COMPARTIDO.get(trabajo["grafico"])
+        clave = (trabajo["estacion"], compartido) if compartido is not None else (trabajo["estacion"], n)
+        grupos.setdefault(clave, []).append(trabajo)
+    return [grupos[clave] for clave in sorted(grupos, key=lambda clave: (clave[0], str(clave[1])))]
+
+def datos_estacion(data_folder, id, cache=True):
+    """
+    Descripción: DataFrame horario de una estación, se lee una sola vez por proceso.
+                 Con cache los archivos se leen del cache binario (np.load con mmap), sin volver a leer los csv.
+    """
+    clave = (data_folder, id, cache)
+    if clave not in _ESTACIONES:
+        paths = sorted(glob(os.path.join(data_folder, "id"+str(id)+"_*.csv")))
+        _ESTACIONES[clave] = lectura_todoscsv(paths, cache=cache).rename(columns=ALIAS_VARIABLES)
+    return _ESTACIONES[clave]
+
+def _ejecutar_grupo(grupo, data_folder, output_folder, cache, reutilizar, formato="excel", previas=None):
+    # previas: entradas del manifiesto de salidas de los trabajos del grupo, los trabajos con la misma huella no se ejecutan.
+    resultados = []
+    exportador = ExportadorTablas(formato)
+    for trabajo in grupo:
+        resultado = {
+            "estacion": trabajo["estacion"], "grafico": trabajo["grafico"],
+            "variable": "/".join(variables_trabajo(trabajo)), "estado": "ok", "lectura": 0.0, "segundos": 0.0, "error": "",
+            "clave": clave_trabajo(trabajo), "huella": None,
+            "salidas": salidas_trabajo(trabajo["grafico"], trabajo["parametros"], trabajo["nombre_estacion"], formato)}
+        inicio = time.perf_counter()
+        try:
+            if trabajo["sin_datos"] == True:
+                resultado["estado"] = "sin datos"
+            else:
+                df = datos_estacion(data_folder, trabajo["estacion"], cache)
+                resultado["lectura"] = time.perf_counter() - inicio
+                with etapa("huella"):
+                    huella = huella_trabajo(
+                        df, variables_trabajo(trabajo), trabajo["grafico"], trabajo["parametros"], trabajo["nombre_estacion"], formato)
+                if vigente((previas or {}).get(resultado["clave"]), huella, output_folder) == True:
+                    resultado["estado"] = "sin cambios"
+                    resultado["huella"] = huella
+                    resultado["segundos"] = time.perf_counter() - inicio
+                    resultados.append(resultado)
+                    continue
+                parametros = dict(trabajo["parametros"], output_folder=output_folder, exportador=exportador)
+                if trabajo["grafico"] == "series_de_tiempo":
+                    parametros.setdefault("xlabel", "Tiempo [años]")
+                    parametros.setdefault("major_locator", {"locator": mdates.YearLocator()})
+                    parametros.setdefault("major_formatter", {"formatter": mdates.DateFormatter('%Y')})
+                if reutilizar == True:
+                    parametros["renderizador"] = _RENDERIZADOR
+                GRAFICOS[trabajo["grafico"]](df=df, nombre_estacion=trabajo["nombre_estacion"], **parametros)
+                resultado["huella"] = huella
+        except Exception as error:
+            # Un trabajo con error no detiene el reporte, se registra el error y se sigue con el siguiente.
+            resultado["estado"] = "error"
+            resultado["error"]  = traceback.format_exception_only(type(error), error)[0].splitlines()[0]
+        resultado["segundos"] = time.perf_counter() - inicio
+        resultados.append(resultado)
+
+    # Escritura de las tablas del grupo, cada archivo una sola vez, se registra como un trabajo más.
+    # Si algún trabajo del grupo no cambió, su hoja se mantiene en el libro y solo se reemplazan las demás.
+    exportador.actualizar = any(resultado["estado"] == "sin cambios" for resultado in resultados)
+    if len(exportador.tablas) > 0:
+        resultado = {
+            "estacion": grupo[0]["estacion"], "grafico": "exportacion", "variable": "", "estado": "ok", "lectura": 0.0,
+            "segundos": 0.0, "error": ""}
+        inicio = time.perf_counter()
+        try:
+            exportador.escribir()
+        except Exception as error:
+            resultado["estado"] = "error"
+            resultado["error"]  = traceback.format_exception_only(type(error), error)[0].splitlines()[0]
+            # Las tablas no quedaron escritas, los trabajos del grupo se vuelven a ejecutar en el próximo reporte.
+            for anterior in resultados:
+                anterior["huella"] = None
+        resultado["segundos"] = time.perf_counter() - inicio
+        resultados.append(resultado)
+    return resultados
+
+def _previas_grupo(grupo, anteriores, formato):
+    # Entradas del manifiesto anterior de los trabajos del grupo. Si un archivo compartido del grupo (ej. el libro CE) lo
+    # producía también un trabajo que ya no está, el libro tiene hojas de más y se vuelve a generar el grupo completo.
+    claves  = {clave_trabajo(trabajo) for trabajo in grupo}
+    salidas = {salida for trabajo in grupo for salida in salidas_trabajo(trabajo["grafico"], trabajo["parametros"], trabajo["nombre_estacion"], formato)}
+    for clave, entrada in anteriores.items():
+        if clave not in claves and len(salidas.intersection(entrada.get("salidas", []))) > 0:
+            return {}
+    return {clave: anteriores[clave] for clave in claves if clave in anteriores}
+
+def _ejecutar_grupo_medido(medir, *argumentos):
+    # Ejecuta un grupo con la instrumentación activa (si medir no es None, con medir=True también la memoria) y entrega
+    # los eventos medidos, que así vuelven al proceso principal cuando el grupo corre en otro proceso.
+    if medir is None:
+        return _ejecutar_grupo(*argumentos), []
+    with registro(memoria=medir) as medicion:
+        resultados = _ejecutar_grupo(*argumentos)
+    return resultados, medicion.eventos
+
+def _precargar(path, cache):
+    lectura_csv(path, cache=cache)
+    return path
+
+def reporte(manifiesto, procesos=None, output_folder=None, estaciones=None, cache=True, reutilizar=True, formato="excel",
+            incremental=True, instrumentacion=None, memoria=False, verbose=True):
+    """
+    Descripción: Genera los gráficos y tablas de un reporte completo (estaciones x gráficos x variables) en varios procesos.
+                 Cada proceso usa el backend Agg, lee cada estación una sola vez y reutiliza las figuras (Renderizador).
+                 Con cache, primero se leen todos los csv en paralelo al cache binario y luego cada proceso los carga
+                 con mmap. Un trabajo con error no detiene el reporte. Al final se entrega un resumen con los tiempos.
+                 Las salidas de cada trabajo se registran en "manifiesto_salidas.json" con la huella de sus entradas (datos
+                 de las variables, parámetros y versión del código); en un reporte incremental los trabajos con la misma
+                 huella y salidas existentes quedan "sin cambios" y no se vuelven a generar, y las salidas de trabajos que
+                 ya no están en el reporte se eliminan.
+
+    manifiesto  (dict/str):    Manifiesto o ruta de un archivo json con:
+                                "data_folder"   carpeta con los archivos del SINCA y "_info.txt".
+                                "output_folder" carpeta de salida, se crean las subcarpetas "Plot" y "Data" (por defecto "Output").
+                                "estaciones"    lista de estaciones o diccionario {estación: nombre} (opcional).
+                                "graficos"      lista de gráficos, cada uno con "tipo" (nombre de la función), los argumentos
+                                                comunes y opcionalmente "variables": {variable: argumentos de la variable}.
+    procesos          (int):    Número de procesos, por defecto el número de núcleos. Con 1 se ejecuta sin procesos.
+    output_folder     (str):    Carpeta de salida, reemplaza la del manifiesto.
+    estaciones       (list):    Estaciones a considerar, reemplaza las del manifiesto.
+    cache        (bool/str):    Cache de lectura_csv, por defecto el cache en la carpeta por defecto.
+    reutilizar       (bool):    Reutiliza las figuras entre trabajos del mismo proceso.
+    formato           (str):    Formato de las tablas: "excel" (un libro por estación y tipo de tabla, escrito una sola vez),
+                                "parquet" o "csv" (una carpeta por libro con un archivo por tabla).
+    incremental      (bool):    Solo genera los trabajos cuya huella cambió. Con False se generan todos.
+    instrumentacion   (str):    Archivo donde se guardan los tiempos de cada etapa (lectura, cache, climatologías,
+                                contornos, savefig, exportación) de todos los procesos: ".csv", ".json" o ".trace.json"
+                                (para chrome://tracing o Perfetto). Por defecto no se mide.
+    memoria          (bool):    Con instrumentacion, mide también el pico de memoria de cada etapa con tracemalloc
+                                (hace más lento el reporte).
+    verbose          (bool):    Muestra el resumen de tiempos.
+
+    Entrega un DataFrame con el estado y los segundos de cada trabajo.
+
+    Ejemplo:
+        reporte({
+            "data_folder": "Data/P001_calidad aire",
+            "output_folder": "Output/P001calidad_aire",
+            "graficos": [
+                {"tipo": "ciclo_diario", "xlabel": "Hora Local [horas]",
+                 "variables": {"M-TEMP": {"ylabel": "Temperatura (°C)", "ylim": {"bottom": -5, "top": 40}}}},
+                {"tipo": "rosa_vientos", "var_vientos": "M-VEL", "var_direccion": "M-DIR", "nrosa": 16}]})
+    """
+    if isinstance(manifiesto, str):
+        with open(manifiesto, encoding="utf-8") as archivo:
+            manifiesto = json.load(archivo)
+    matplotlib.use("Agg")
+    inicio        = time.perf_counter()
+    data_folder   = manifiesto["data_folder"]
+    output_folder = output_folder or manifiesto.get("output_folder", "Output")
+    for carpeta in ("Plot", "Data"):
+        os.makedirs(os.path.join(output_folder, carpeta), exist_ok=True)
+    trabajos = expandir_manifiesto(manifiesto, estaciones)
+    grupos   = agrupar_trabajos(trabajos)
+    argumentos  = (data_folder, output_folder, cache, reutilizar, formato)
+    anteriores  = leer_manifiesto(output_folder)
+    previas     = [_previas_grupo(grupo, anteriores, formato) if incremental == True else {} for grupo in grupos]
+
+    medicion   = RegistroEtapas(memoria) if instrumentacion is not None else None
+    medir      = memoria if medicion is not None else None
+    resultados = []
+    if procesos == 1:
+        _iniciar_proceso()
+        for grupo, previa in zip(grupos, previas):
+            resultado, eventos = _ejecutar_grupo_medido(medir, grupo, *argumentos, previa)
+            resultados += resultado
+            if medicion is not None:
+                medicion.agregar(eventos)
+    else:
+        paths = sorted({path for id in {t["estacion"] for t in trabajos} for path in glob(os.path.join(data_folder, "id"+str(id)+"_*.csv"))})
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso) as pool:
+            # Cada csv se lee una sola vez al cache binario, luego los procesos lo cargan con mmap.
+            if cache not in (None, False):
+                for futuro in as_completed([pool.submit(_precargar, path, cache) for path in paths]):
+                    futuro.exception()
+            futuros = {pool.submit(_ejecutar_grupo_medido, medir, grupo, *argumentos, previa): grupo
+                       for grupo, previa in zip(grupos, previas)}
+            for futuro in as_completed(futuros):
+                try:
+                    resultado, eventos = futuro.result()
+                    resultados += resultado
+                    if medicion is not None:
+                        medicion.agregar(eventos)
+                except Exception as error:
+                    # El proceso terminó sin entregar resultados (ej. falta de memoria), se registran todos los trabajos del
+                    # grupo como error sin huella: sus salidas se mantienen y se vuelven a generar en el próximo reporte.
+                    resultados += [{
+                        "estacion": trabajo["estacion"], "grafico": trabajo["grafico"],
+                        "variable": "/".join(variables_trabajo(trabajo)), "estado": "error", "lectura": 0.0,
+                        "segundos": 0.0, "error": repr(error), "clave": clave_trabajo(trabajo), "huella": None,
+                        "salidas": salidas_trabajo(trabajo["grafico"], trabajo["parametros"], trabajo["nombre_estacion"], formato)}
+                        for trabajo in futuros[futuro]]
+
+    # Manifiesto de salidas: se mantienen las entradas de las estaciones que no están en este reporte (ej. con estaciones).
+    ejecutadas = {trabajo["estacion"] for trabajo in trabajos}
+    actuales   = {clave: entrada for clave, entrada in anteriores.items() if entrada.get("estacion") not in ejecutadas} \
+        if estaciones is not None else {}
+    for resultado in resultados:
+        if "clave" in resultado and resultado["estado"] != "sin datos":
+            actuales[resultado["clave"]] = {
+                "estacion": resultado["estacion"], "huella": resultado["huella"], "salidas": resultado["salidas"]}
+    eliminadas = podar_salidas(output_folder, anteriores, actuales)
+    escribir_manifiesto(output_folder, actuales)
+
+    resumen = pd.DataFrame(resultados, columns=["estacion", "grafico", "variable", "estado", "lectura", "segundos", "error"])
+    resumen = resumen.sort_values(["estacion", "grafico", "variable"]).reset_index(drop=True)
+    total   = time.perf_counter() - inicio
+    resumen.to_csv(os.path.join(output_folder, "resumen_reporte.csv"), index=False)
+    if medicion is not None:
+        medicion.exportar(instrumentacion)
+    if verbose == True:
+        print(resumen_tiempos(resumen, total))
+        if medicion is not None and len(medicion.eventos) > 0:
+            print("")
+            print(medicion.resumen().round(3).to_string())
+        if len(eliminadas) > 0:
+            print("Salidas eliminadas: "+", ".join(eliminadas))
+    return resumen
+
+def resumen_tiempos(resumen, total):
+    """
+    Descripción: Texto con los tiempos por tipo de gráfico, el tiempo total y los trabajos con error.
+    """
+    por_grafico = resumen.groupby("grafico").agg(
+        trabajos=("segundos", "size"), ok=("estado", lambda estado: int((estado == "ok").sum())),
+        segundos=("segundos", "sum"), promedio=("segundos", "mean"), maximo=("segundos", "max"))
+    suma   = resumen["segundos"].sum()
+    lineas = [
+        por_grafico.round(3).to_string(), "",
+        "Trabajos: {} ok, {} sin cambios, {} sin datos, {} con error".format(
+            (resumen["estado"] == "ok").sum(), (resumen["estado"] == "sin cambios").sum(),
+            (resumen["estado"] == "sin datos").sum(), (resumen["estado"] == "error").sum()),
+        "Tiempo total: {:.2f} s, suma de trabajos: {:.2f} s ({:.1f}x)".format(total, suma, suma/total if total > 0 else np.nan)]
+    errores = resumen[resumen["estado"] == "error"]
+    for _, fila in errores.iterrows():
+        lineas.append("Error id{} {} {}: {}".format(fila["estacion"], fila["grafico"], fila["variable"], fila["error"]))
+    return "\n".join(lineas)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m Script.python.reporte", description="Genera los gráficos de un reporte a partir de un manifiesto json.")
+    parser.add_argument("manifiesto", help="Archivo json con el manifiesto del reporte.")
+    parser.add_argument("-p", "--procesos", type=int, default=None, help="Número de procesos, por defecto el número de núcleos.")
+    parser.add_argument("-o", "--output-folder", default=None, help="Carpeta de salida, reemplaza la del manifiesto.")
+    parser.add_argument("-e", "--estaciones", nargs="+", default=None, help="Estaciones a considerar (ej. id212 id244).")
+    parser.add_argument("--sin-cache", action="store_true", help="Lee siempre los csv, sin el cache binario.")
+    parser.add_argument("--sin-reutilizar", action="store_true", help="Crea una figura nueva en cada gráfico.")
+    parser.add_argument("-f", "--formato", choices=FORMATOS_TABLAS, default="excel", help="Formato de las tablas.")
+    parser.add_argument("--completo", action="store_true", help="Genera todas las salidas, aunque no hayan cambiado.")
+    parser.add_argument("-i", "--instrumentacion", default=None,
+                        help="Guarda los tiempos de cada etapa en un archivo .csv, .json o .trace.json (Chrome).")
+    parser.add_argument("-m", "--memoria", action="store_true",
+                        help="Con -i, mide también el pico de memoria de cada etapa (tracemalloc, más lento).")
+    args = parser.parse_args(argv)
+    if args.memoria == True and args.instrumentacion is None:
+        parser.error("--memoria requiere -i/--instrumentacion.")
+    resumen = reporte(
+        args.manifiesto, procesos=args.procesos, output_folder=args.output_folder, estaciones=args.estaciones,
+        cache=not args.sin_cache, reutilizar=not args.sin_reutilizar, formato=args.formato, incremental=not args.completo,
+        instrumentacion=args.instrumentacion, memoria=args.memoria)
+    return 1 if (resumen["estado"] == "error").any() else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
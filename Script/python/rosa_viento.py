@@ -1,53 +1,39 @@
 import numpy as np
-import pandas as pd
-from scipy import interpolate
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import matplotlib.patches as mpatches
+from .renderizador import obtener_plantilla, cerrar_plantilla
+from .instrumentacion import etapa, instrumentado
+# Los conteos de la rosa están en conteo_rosa (sin matplotlib), se importan aquí para mantener los nombres de este módulo.
+from .conteo_rosa import (
+    BINS_VELOCIDAD, NOMBRES_DIRECCIONES, nombres_direcciones, escala_velocidad, histograma_rosa, clasificando_viento,
+    rosa_cubo)
 
-def clasificando_viento(df, nrosa, var_vientos, var_direccion, nombre_estacion):
-    #clasificación del viento según su velocidad
-    escala = { 
-        0  : 'Calma',
-        1  : '0,50 - 2,10', 
-        2  : '2,10 - 3,60',
-        3  : '3,60 - 5,70',
-        4  : '5,70 - 8,80',
-        5  : '8,80 - 11,10',
-        6  : '>= 11,10',}
-    bins_vel = np.array([0.5, 2.10, 3.60, 5.70, 8.80, 11.10])
-    df['clase_velocidad'] = np.digitize(x = df[var_vientos], bins=bins_vel)
-    
-    # Clasificación viento según la dirección
-    if nrosa == 8:
-        step            = 360/nrosa
-        name_directions = np.array('N NE E SE S SW W NW N'.split())
-        bins            = np.arange(step/2, 360 + step, step)
-        print(bins)
-    elif nrosa == 16:
-        step            = 360/nrosa
-        name_directions = np.array('N NNE NE ENE E ESE SE SSE S SSW SW WSW W WNW NW NNW N'.split())
-        bins            = np.arange(step/2, 360 + step, step)
-    
-    directions = {n: dir for n, dir in enumerate(name_directions)}
-    df["Nclase_direccion"] = np.digitize(x = df[var_direccion], bins=bins)
-    df["clase_direccion"]  = df["Nclase_direccion"].map(directions)
-    
-    # Determinación de la tabla pivote
-    pivote = pd.pivot_table(
-        df, 
-        values     = var_vientos, 
-        index      = "clase_velocidad", 
-        columns    = "clase_direccion", 
-        aggfunc    = "count", 
-        fill_value = 0)[name_directions[:-1]]
-    pivote.index   = pivote.index.map(escala)
-    pivote.to_excel("Output/Data/rosadelosviento_"+nombre_estacion.replace(" ","")+".xlsx")
-    calmas = pivote.iloc[0].sum().sum()*100/len(df)
-    pivote = pivote[1:]
-    pivote = pivote*100/pivote.sum().sum()
-    return pivote, calmas, name_directions
+def _plantilla_rosa_vientos(nrosa):
+    # Define figura
+    fig=plt.figure(
+        figsize=(10,8),
+        facecolor = 'lightgrey', 
+        edgecolor = 'w')
 
+    # definición de la rosa de los viento
+    rect      = [0, 0.05, 0.85, 0.85]
+    ax        = plt.axes(rect, projection='polar')
+    direccion = np.linspace(0, 2*np.pi, nrosa+1)
+
+    # definición de parámetros polares
+    ax.set(**{
+        "theta_zero_location": "N", 
+        "theta_direction": -1, 
+        "rorigin": -1, 
+        "rlim": (0,25), 
+        "rlabel_position": 90, 
+        "rticks": np.arange(0,25,5)})
+        
+    ax.set_thetagrids(direccion*(180/np.pi), nombres_direcciones(nrosa), fontsize = 9)
+    return {"fig": fig, "ax": ax}
+
+@instrumentado()
 def rosa_vientos(df, var_vientos, var_direccion, nrosa, nombre_estacion, **kwargs):
     """
     Descripción: Función para graficar ciclo diario de una variable.
@@ -55,8 +41,11 @@ def rosa_vientos(df, var_vientos, var_direccion, nrosa, nombre_estacion, **kwarg
     df          (Dataframe):    Conjunto de datos a graficar.
     var_vientos       (str):    Variable que representa a los vientos.
     var_direccion     (str):    Variable que representa a los direccion.
-    nrosa             (int):    Número que corresponde a una rosa de 8 o 16 direcciones.
+    nrosa             (int):    Número de sectores de la rosa (ej. 8 o 16 direcciones, o cualquier otro).
     nombre_estacion   (str):    Nombre de la estación de monitoreo.
+    **kwargs               :    renderizador (Renderizador) es opcional, reutiliza la figura entre llamadas.
+                                output_folder (str) es opcional, carpeta con las subcarpetas "Plot" y "Data", por defecto "Output".
+                                exportador (ExportadorTablas) es opcional, junta las tablas y escribe cada archivo una sola vez.
 
     Ejemplo: 
     rosa_vientos(
@@ -69,32 +58,23 @@ def rosa_vientos(df, var_vientos, var_direccion, nrosa, nombre_estacion, **kwarg
     """
 
     df = df.filter([var_vientos, var_direccion]).dropna()
-    pivote, calmas, name_directions = clasificando_viento(df, nrosa, var_vientos, var_direccion, nombre_estacion)
+    pivote, calmas, _ = clasificando_viento(
+        df, nrosa, var_vientos, var_direccion, nombre_estacion, data_folder=kwargs.get("output_folder", "Output")+"/Data",
+        exportador=kwargs.get("exportador"))
     
 
-    # Define figura
-    fig=plt.figure(
-        figsize=(10,8),
-        facecolor = 'lightgrey', 
-        edgecolor = 'w')
-
-    # definición de la rosa de los viento
-    rect      = [0, 0.05, 0.85, 0.85]
-    ax        = plt.axes(rect, projection='polar')
+    # Figura con la rosa y sus ejes polares, se reutiliza si se entrega un renderizador con el mismo nrosa.
+    renderizador = kwargs.get("renderizador")
+    plantilla    = obtener_plantilla(renderizador, ("rosa_vientos", nrosa), lambda: _plantilla_rosa_vientos(nrosa))
+    fig, ax      = plantilla["fig"], plantilla["ax"]
     btt       = 0
     direccion = np.linspace(0, 2*np.pi, nrosa+1)
     w         = 2*np.pi/nrosa
 
-    # definición de parámetros polares
-    ax.set(**{
-        "theta_zero_location": "N", 
-        "theta_direction": -1, 
-        "rorigin": -1, 
-        "rlim": (0,25), 
-        "rlabel_position": 90, 
-        "rticks": np.arange(0,25,5)})
-        
-    ax.set_thetagrids(direccion*(180/np.pi), name_directions, fontsize = 9)
+    # Se quitan las barras del gráfico anterior y se reinician los colores.
+    for barras in list(ax.containers):
+        barras.remove()
+    ax.set_prop_cycle(None)
 
     # Rosa de los vientos
     for n in range(len(pivote)):
@@ -128,8 +108,9 @@ def rosa_vientos(df, var_vientos, var_direccion, nrosa, nombre_estacion, **kwarg
     fig.suptitle("Rosa del viento "+nombre_estacion, **{"size": 14, "weight": "bold"})
 
     # guardar figura
-    fig.savefig(**{"fname": "Output/Plot/rosadelosviento_"+nombre_estacion.replace(" ","")+".png", "facecolor": 'lightgrey', "edgecolor": 'k', "dpi": 96})
+    with etapa("savefig"):
+        fig.savefig(**{"fname": kwargs.get("output_folder", "Output")+"/Plot/rosadelosviento_"+nombre_estacion.replace(" ","")+".png", "facecolor": 'lightgrey', "edgecolor": 'k', "dpi": 96})
 
-    # Cierre figura
-    plt.close(fig)
+    # Cierre figura, salvo que sea del renderizador
+    cerrar_plantilla(renderizador, plantilla)
     return
\ No newline at end of file
@@ -2,7 +2,27 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from .renderizador import obtener_plantilla, cerrar_plantilla
+from .decimacion import decimar, rasterizar, pixeles_ejes, nucleo_marcador
+from .instrumentacion import etapa, instrumentado
 
+def _plantilla_series_de_tiempo():
+    # Crear figura, los valores pueden ser modificados en función de lo que se necesite.
+    fig, ax = plt.subplots(
+        figsize     = (9,6),
+        gridspec_kw = {'left':0.075, 'right':0.975, 'top':0.945, 'bottom':0.085},
+        facecolor   ='w', 
+        edgecolor   ='w')
+
+    # Definición de tipografía del eje "x", el eje "y" y la grilla.
+    ax.grid(True)
+    ax.tick_params(
+        axis = "both", which = "major", direction = "in", length = 7.5, width = 1, pad = 5, 
+        grid_color = 'k', grid_linewidth = 0.5, grid_linestyle = "--", grid_alpha = 0.8,
+        bottom = True, top = True, left = True, right = True)
+    return {"fig": fig, "ax": ax}
+
+@instrumentado()
 def series_de_tiempo(df, variable, nombre_estacion, xlabel, ylabel, **kwargs):
     """
     Descripción: Función para graficar series de tiempo con promedio mensual.
@@ -14,6 +34,13 @@ def series_de_tiempo(df, variable, nombre_estacion, xlabel, ylabel, **kwargs):
     ylabel            (str):    Nombre de eje y del gráfico.
     **kwargs               :    Variables que no están definidas en la función directamente, pero que una vez que
                                 ajuste a sus requerimientos, pueden ser cambiadas. Recordar que si se tiene kwargs debe estar definido cuando se llama la función.
+                                renderizador (Renderizador) es opcional, reutiliza la figura entre llamadas.
+                                output_folder (str) es opcional, carpeta con las subcarpetas "Plot" y "Data", por defecto "Output".
+                                decimacion (str) es opcional, reduce los puntos a la resolución de la figura para que el tiempo
+                                no dependa del largo de la serie: "pixel" (un punto por pixel ocupado, se ve igual), "minmax"
+                                o "m4" (envolvente por columna de pixeles) o "raster" (imagen de los pixeles ocupados).
+                                Por defecto se dibujan todos los puntos.
+                                ylim (dict/tuple) son los límites del eje "y", {"bottom": ..., "top": ...} o (bottom, top).
 
     Ejemplo:
         series_de_tiempo(
@@ -30,28 +57,64 @@ def series_de_tiempo(df, variable, nombre_estacion, xlabel, ylabel, **kwargs):
     # Limpieza de valores NaN.
     df = df[variable].dropna()
 
-    # Crear figura, los valores pueden ser modificados en función de lo que se necesite.
-    fig, ax = plt.subplots(
-        figsize     = (9,6),
-        gridspec_kw = {'left':0.075, 'right':0.975, 'top':0.945, 'bottom':0.085},
-        facecolor   ='w', 
-        edgecolor   ='w')
+    # Límites del eje "y" como diccionario de ax.set_ylim, también se aceptan como tupla (bottom, top).
+    limites_y = kwargs["ylim"] if isinstance(kwargs["ylim"], dict) else dict(zip(("bottom", "top"), kwargs["ylim"]))
+
+    # Figura con ejes, grilla y ticks, se reutiliza si se entrega un renderizador.
+    decimacion   = kwargs.get("decimacion")
+    dpi          = 96
+    renderizador = kwargs.get("renderizador")
+    plantilla    = obtener_plantilla(renderizador, ("series_de_tiempo", decimacion == "raster"), _plantilla_series_de_tiempo)
+    fig, ax      = plantilla["fig"], plantilla["ax"]
+
+    # Decimación: solo se dibujan los puntos que se distinguen a la resolución con que se guarda la figura.
+    if decimacion is not None:
+        x     = mdates.date2num(df.index)
+        xlim  = (x.min(), x.max()) if len(x) > 0 else (0, 1)
+        ylim  = (limites_y.get("bottom", df.min()), limites_y.get("top", df.max()))
+        ancho, alto = pixeles_ejes(ax, dpi)
+        if decimacion == "raster":
+            imagen = np.zeros((alto, ancho, 4))
+            imagen[..., 2] = 1
+            imagen[..., 3] = rasterizar(
+                x, df.to_numpy(), ancho, alto, xlim, ylim, nucleo=nucleo_marcador(".", 0.5, 1.0, dpi))
+            extent = (xlim[0], xlim[1], ylim[0], ylim[1])
+            df     = df.iloc[:0]
+        else:
+            df = df.iloc[decimar(x, df.to_numpy(), ancho, alto, xlim, ylim, decimacion)]
 
     # Graficar datos, se recomienda como punto y no lineas.
-    ax.plot(
-        df,
-        ls     = "None",
-        ms     = 0.5, 
-        marker = '.',
-        c      = 'blue',
-        label  = "Datos", 
-        alpha  = 1, 
-        zorder = 4
-        )
+    if "linea" in plantilla:
+        plantilla["linea"].set_data(df.index.to_numpy(), df.to_numpy())
+    else:
+        plantilla["linea"], = ax.plot(
+            df,
+            ls     = "None",
+            ms     = 0.5, 
+            marker = '.',
+            c      = 'blue',
+            label  = "Datos", 
+            alpha  = 1, 
+            zorder = 4
+            )
+
+        # Imagen de los pixeles ocupados, la línea vacía se mantiene para la legenda.
+        if decimacion == "raster":
+            plantilla["imagen"] = ax.imshow(
+                imagen, extent = extent, origin = "lower", aspect = "auto", interpolation = "nearest", zorder = 4)
+
+        # Definición de legenda
+        ax.legend(
+            loc = 0, ncol = 2, fontsize = 10, markerscale = 10, facecolor = 'lightgrey', edgecolor = 'k')
     
     # Definición de limites: "x" corresponde al tiempo e "y" corresponde a el valor a graficar.
-    ax.set_xlim( df.index.min(), df.index.max() )
-    ax.set_ylim( **kwargs["ylim"] )
+    if decimacion == "raster":
+        plantilla["imagen"].set_data(imagen)
+        plantilla["imagen"].set_extent(extent)
+        ax.set_xlim( extent[0], extent[1] )
+    else:
+        ax.set_xlim( df.index.min(), df.index.max() )
+    ax.set_ylim( **limites_y )
     
     # Definición de etiqueta del eje "x" y el eje "y".
     ax.set_xlabel( xlabel, fontsize =  11, fontweight = "normal", labelpad = 2.5)
@@ -60,25 +123,16 @@ def series_de_tiempo(df, variable, nombre_estacion, xlabel, ylabel, **kwargs):
     # Coloca ticks en cada año y el formato de cada uno de los ticks
     ax.xaxis.set_major_locator(**kwargs["major_locator"])
     ax.xaxis.set_major_formatter( **kwargs["major_formatter"] )
-    
-    # Definición de tipografía del eje "x", el eje "y" y la grilla.
-    ax.grid(True)
-    ax.tick_params(
-        axis = "both", which = "major", direction = "in", length = 7.5, width = 1, pad = 5, 
-        grid_color = 'k', grid_linewidth = 0.5, grid_linestyle = "--", grid_alpha = 0.8,
-        bottom = True, top = True, left = True, right = True)
-    
-    # Definición de legenda
-    ax.legend(
-        loc = 0, ncol = 2, fontsize = 10, markerscale = 10, facecolor = 'lightgrey', edgecolor = 'k')
+
     # Definición del titulo del gráfico
     fig.suptitle(
         "Serie de Tiempo de "+ylabel+" "+nombre_estacion, 
         size = 11, weight = "normal")
     # Guarda la figura
-    fig.savefig(
-        "Output/Plot/ST_"+variable+"_"+nombre_estacion.replace(" ","")+".png",
-        facecolor = 'w', edgecolor = 'w', dpi = 96)
-    # Cierra la figura
-    plt.close(fig)
+    with etapa("savefig"):
+        fig.savefig(
+            kwargs.get("output_folder", "Output")+"/Plot/ST_"+variable+"_"+nombre_estacion.replace(" ","")+".png",
+            facecolor = 'w', edgecolor = 'w', dpi = dpi)
+    # Cierra la figura, salvo que sea del renderizador
+    cerrar_plantilla(renderizador, plantilla)
     return
\ No newline at end of file
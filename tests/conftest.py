@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Las pruebas importan el paquete como "Script.python", desde la raíz del repositorio.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
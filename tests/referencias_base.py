@@ -0,0 +1,96 @@
+"""
+Descripción: Crea las imágenes de referencia de tests/imagenes con el código de gráficos original del repositorio
+             (commit BASE), leído con git show, sobre los datos de la estación id244 de P001.
+
+             El código original usa scipy.interpolate.interp2d, que no existe desde scipy 1.14. Las referencias se
+             crean con scipy 1.13 (ej. instalado aparte con pip install --target y agregado al PYTHONPATH); con un
+             scipy más nuevo se reemplaza por la interpolación lineal de interp2d en una grilla regular (valor del
+             borde fuera de la grilla), que puede diferir en el último bit y mover algunos píxeles de los contornos.
+
+             Diferencias intencionales con el código original (user-008), que se aplican a los datos antes de graficar:
+                 - ciclo_diario_direccion: el sector de 360° se une al de 0°. Las direcciones de 352,5° o más se
+                   pasan a negativas (d - 360°), así el código original las cuenta en el sector de 0°.
+                 - ciclo_diario_direccion: las celdas hora x sector sin datos se muestran con 0% y no en blanco (NaN).
+                   Los datos de id244 no tienen celdas vacías, por lo que no cambia la referencia.
+
+    Ejemplo:
+        python -m tests.referencias_base
+"""
+import os
+import subprocess
+import tempfile
+import types
+from glob import glob
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+import matplotlib.dates as mdates
+from scipy import interpolate
+
+BASE     = "d6b82e5"
+RAIZ     = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATOS    = os.path.join(RAIZ, "Data", "P001_calidad aire")
+IMAGENES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "imagenes")
+
+def _interp2d(x, y, z, kind="linear"):
+    # interp2d(kind='linear') en una grilla regular: bilineal, con el valor del borde fuera de la grilla.
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    f = interpolate.RegularGridInterpolator((y, x), np.asarray(z, dtype=np.float64), method="linear")
+    def evaluar(xn, yn):
+        yy, xx = np.meshgrid(np.clip(yn, y[0], y[-1]), np.clip(xn, x[0], x[-1]), indexing="ij")
+        return f(np.stack([yy, xx], axis=-1))
+    return evaluar
+
+def _sector_360_en_0(df, parametros):
+    df = df.copy()
+    variable = parametros["variable"]
+    df.loc[df[variable] >= 352.5, variable] -= 360
+    return df
+
+# Ajuste de los datos de cada gráfico según las diferencias intencionales.
+AJUSTES = {"ciclo_diario_direccion": _sector_360_en_0}
+
+def modulo_base(nombre):
+    """
+    Descripción: Módulo de Script/python en el commit BASE, con interp2d reemplazado.
+    """
+    fuente = subprocess.run(["git", "show", BASE+":Script/python/"+nombre+".py"], cwd=RAIZ,
+                            check=True, capture_output=True, text=True).stdout
+    modulo = types.ModuleType(nombre)
+    exec(compile(fuente, nombre+"_"+BASE+".py", "exec"), modulo.__dict__)
+    if "interpolate" in modulo.__dict__ and hasattr(interpolate, "interp2d") == False:
+        modulo.interpolate = types.SimpleNamespace(interp2d=_interp2d)
+    return modulo
+
+def crear_referencias(casos, estacion):
+    """
+    Descripción: Grafica cada caso (función, parámetros, previo) con el código BASE y copia los PNG a tests/imagenes.
+    """
+    from Script.python.lectura_archivos import lectura_todoscsv
+    from Script.python.estaciones import ALIAS_VARIABLES
+    df = lectura_todoscsv(sorted(glob(os.path.join(DATOS, "id244_*.csv")))).rename(columns=ALIAS_VARIABLES)
+    os.makedirs(IMAGENES, exist_ok=True)
+    inicio = os.getcwd()
+    for tipo, (grafico, parametros, _) in casos.items():
+        # El código original guarda en Output/Plot y Output/Data del directorio actual. Cada caso usa una carpeta
+        # distinta, al agregar hojas a un Excel existente usa una API de pandas que ya no existe.
+        with tempfile.TemporaryDirectory() as carpeta:
+            os.chdir(carpeta)
+            try:
+                for subcarpeta in ("Plot", "Data"):
+                    os.makedirs(os.path.join("Output", subcarpeta))
+                parametros = dict(parametros)
+                if tipo == "series_de_tiempo":
+                    parametros["major_locator"]   = {"locator": mdates.YearLocator()}
+                    parametros["major_formatter"] = {"formatter": mdates.DateFormatter('%Y')}
+                funcion = getattr(modulo_base(grafico.__module__.split(".")[-1]), grafico.__name__)
+                datos   = AJUSTES[tipo](df, parametros) if tipo in AJUSTES else df
+                funcion(df=datos, nombre_estacion=estacion, **parametros)
+                for png in glob(os.path.join("Output", "Plot", "*.png")):
+                    os.replace(png, os.path.join(IMAGENES, os.path.basename(png)))
+            finally:
+                os.chdir(inicio)
+
+if __name__ == "__main__":
+    from tests.test_renderizador import CASOS, ESTACION
+    crear_referencias(CASOS, ESTACION)
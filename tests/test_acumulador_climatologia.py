@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+from Script.python.acumulador_climatologia import AcumuladorClimatologia
+from Script.python.climatologia import climatologia
+from Script.python.estadistica_circular import ciclo_direccion
+
+def _datos(n=24*90, semilla=1):
+    rng    = np.random.default_rng(semilla)
+    fechas = pd.date_range("2019-01-01 01:00", periods=n, freq="h")
+    df = pd.DataFrame({
+        "M-TEMP": (15 + 8*np.sin(2*np.pi*fechas.hour.to_numpy()/24) + rng.normal(0, 2, n)).astype(np.float32),
+        "M-VEL" : rng.gamma(2.0, 1.5, n).astype(np.float32),
+        "M-DIR" : rng.uniform(0, 360, n).astype(np.float32),
+        }, index=fechas)
+    df.iloc[::11, 0] = np.nan
+    df.iloc[::13, 2] = np.nan
+    return df
+
+def test_lotes_traslapados_igual_a_serie_completa():
+    df = _datos()
+    # Lotes desordenados que se traslapan y repiten horas, ninguno cubre toda la serie.
+    lotes = [df.iloc[1000:1600], df.iloc[0:700], df.iloc[650:1100], df.iloc[1500:], df.iloc[300:400]]
+    acumulador = AcumuladorClimatologia(["M-TEMP", "M-VEL"], por=("HORA",), direcciones=["M-DIR"])
+    for lote in lotes:
+        acumulador.actualizar(lote)
+
+    esperado = climatologia(df, ["M-TEMP", "M-VEL"], por=("HORA",))
+    clima = acumulador.climatologia()
+    for variable in ("M-TEMP", "M-VEL"):
+        np.testing.assert_array_equal(clima["conteo"][variable].to_numpy(), esperado["conteo"][variable].to_numpy())
+        np.testing.assert_allclose(clima["promedio"][variable].to_numpy(), esperado["promedio"][variable].to_numpy(), rtol=1e-6)
+
+    frecuencia, estadisticos = ciclo_direccion(df, "M-DIR", por=("HORA",))
+    acumulada = acumulador.frecuencia_direccion("M-DIR")
+    assert acumulada.index.dtype == frecuencia.index.dtype
+    pd.testing.assert_frame_equal(acumulada, frecuencia)
+    circulares = acumulador.estadisticos_circulares("M-DIR")
+    np.testing.assert_array_equal(circulares["conteo"].to_numpy(), estadisticos["conteo"].to_numpy())
+    np.testing.assert_allclose(circulares["direccion"].to_numpy(), estadisticos["direccion"].to_numpy(), atol=1e-6)
@@ -0,0 +1,35 @@
+import os
+from glob import glob
+import numpy as np
+from Script.python.benchmark import generar_datos, comparar_resultados, VERSION_BENCHMARK
+from Script.python.lectura_archivos import lectura_csv
+
+def _resultados(etapas):
+    return {"version": VERSION_BENCHMARK, "escala": {"estaciones": 1, "anios": 1}, "etapas": etapas}
+
+def test_datos_sinteticos_iguales_en_ambos_lectores(tmp_path):
+    generar_datos(str(tmp_path), estaciones=1, anios=1, variables=["M-TEMP", "C-MP10", "M-DIR"])
+    paths = sorted(glob(os.path.join(str(tmp_path), "id*_*_datos_*.csv")))
+    assert len(paths) == 3
+    for path in paths:
+        rapido, texto = lectura_csv(path), lectura_csv(path, modo="texto")
+        assert rapido.equals(texto[rapido.columns]), path
+        assert np.isfinite(rapido.iloc[:, 0]).mean() > 0.5
+
+def test_comparar_resultados_umbrales():
+    base   = _resultados({
+        "rapida" : {"segundos": 0.001, "memoria_mb": 0.01},
+        "vacia"  : {"segundos": 1.0,   "memoria_mb": 0.0},
+        "grande" : {"segundos": 1.0,   "memoria_mb": 10.0}})
+    actual = _resultados({
+        "rapida" : {"segundos": 0.004, "memoria_mb": 0.02},
+        "vacia"  : {"segundos": 1.1,   "memoria_mb": 0.5},
+        "grande" : {"segundos": 2.0,   "memoria_mb": 20.0}})
+    comparacion = comparar_resultados(actual, base).set_index(["etapa", "medida"])["regresion"]
+    # Bajo los mínimos de tiempo (0.005 s) y memoria (1 MB) de la base no se marcan regresiones.
+    assert comparacion[("rapida", "segundos")] == False
+    assert comparacion[("rapida", "memoria_mb")] == False
+    assert comparacion[("vacia", "memoria_mb")] == False
+    assert comparacion[("vacia", "segundos")] == False
+    assert comparacion[("grande", "segundos")] == True
+    assert comparacion[("grande", "memoria_mb")] == True
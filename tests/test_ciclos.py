@@ -0,0 +1,51 @@
+import os
+from glob import glob
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+import pytest
+from Script.python.lectura_archivos import lectura_todoscsv
+from Script.python.climatologia import climatologia, tabla_pivote
+from Script.python.ciclo_diario import ciclo_diario
+from Script.python.ciclo_estacional import ciclo_estacional
+
+RAIZ  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATOS = os.path.join(RAIZ, "Data", "P001_calidad aire")
+
+PARAMETROS = {
+    ciclo_diario    : {"xlabel": "Hora Local [horas]", "ylabel": "MP2,5", "ylim": {"bottom": 0, "top": 100}},
+    ciclo_estacional: {"vmin": 0, "vmax": 60, "step": 2, "clabel": "MP2,5", "unidad": "(µg/m³N)"},
+    }
+
+@pytest.fixture(scope="module")
+def mp25():
+    # id212 C-MP25 tiene ~43% de datos en el periodo del archivo.
+    return lectura_todoscsv(glob(os.path.join(DATOS, "id212_C-MP25_*.csv")))
+
+def _carpeta(tmp_path):
+    for subcarpeta in ("Plot", "Data"):
+        os.makedirs(str(tmp_path/subcarpeta), exist_ok=True)
+    return str(tmp_path)
+
+@pytest.mark.parametrize("grafico", list(PARAMETROS))
+def test_sin_clases_completas_error_claro(grafico, mp25, tmp_path):
+    with pytest.raises(ValueError, match=r"C-MP25.*completitud_minima=0.75.*completitud máxima por clase 0\.\d\d"):
+        grafico(df=mp25, variable="C-MP25", nombre_estacion="Test", output_folder=_carpeta(tmp_path),
+                completitud_minima=0.75, **PARAMETROS[grafico])
+
+@pytest.mark.parametrize("grafico", list(PARAMETROS))
+def test_variable_sin_datos_error_claro(grafico, mp25, tmp_path):
+    df = mp25.assign(**{"C-MP25": np.nan})
+    with pytest.raises(ValueError, match="La variable C-MP25 no tiene datos"):
+        grafico(df=df, variable="C-MP25", nombre_estacion="Test", output_folder=_carpeta(tmp_path), **PARAMETROS[grafico])
+
+def test_exclusion_parcial_mantiene_grilla_mes_hora(mp25, tmp_path):
+    clima  = climatologia(mp25, ["C-MP25"], completitud_minima=0.45)
+    pivote = tabla_pivote(clima, "promedio", "C-MP25", completa=True)
+    assert pivote.index.tolist() == list(range(1, 13)) and pivote.columns.tolist() == list(range(24))
+    # Quedan solo algunas clases, sin filas de meses completas.
+    assert 0 < pivote.notna().to_numpy().sum() < 288
+    assert len(tabla_pivote(clima, "promedio", "C-MP25")) < 12
+    ciclo_estacional(df=mp25, variable="C-MP25", nombre_estacion="Test", output_folder=_carpeta(tmp_path),
+                     completitud_minima=0.45, **PARAMETROS[ciclo_estacional])
+    assert os.path.isfile(str(tmp_path/"Plot"/"CE_C-MP25_Test.png"))
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+from Script.python.climatologia import climatologia
+
+def _datos(n=24*60, semilla=0):
+    rng    = np.random.default_rng(semilla)
+    fechas = pd.date_range("2019-01-01 01:00", periods=n, freq="h")
+    return pd.DataFrame({
+        "C-O3"  : rng.gamma(2.0, 8.0, n).astype(np.float32),
+        "M-TEMP": (15 + 8*np.sin(2*np.pi*fechas.hour.to_numpy()/24) + rng.normal(0, 2, n)).astype(np.float32),
+        }, index=fechas)
+
+def test_percentiles_iguales_a_pandas():
+    df = _datos()
+    df.iloc[::7, 0] = np.nan
+    clima = climatologia(df, ["C-O3", "M-TEMP"], por=("HORA",), percentiles=(5, 95))
+    for variable in ("C-O3", "M-TEMP"):
+        grupos = df[variable].groupby(df.index.hour)
+        for p in (5, 95):
+            esperado = grupos.quantile(p/100).to_numpy()
+            np.testing.assert_allclose(clima["P{:02d}".format(p)][variable].to_numpy(), esperado, rtol=1e-6)
+        np.testing.assert_array_equal(clima["conteo"][variable].to_numpy(), grupos.count().to_numpy())
+
+def test_variable_sin_datos_entrega_nan():
+    df = _datos()
+    df["C-O3"] = np.nan
+    clima = climatologia(df, ["C-O3"], por=("HORA",), percentiles=(5, 95))
+    assert (clima["conteo"]["C-O3"] == 0).all()
+    assert clima["P05"]["C-O3"].isna().all() and clima["P95"]["C-O3"].isna().all()
+    # Igual que groupby().quantile() sobre una columna vacía.
+    assert df["C-O3"].groupby(df.index.hour).quantile(0.05).isna().all()
+
+def test_periodo_vacio_entrega_nan():
+    df = _datos().iloc[:0]
+    clima = climatologia(df, ["M-TEMP"], por=("MES", "HORA"), percentiles=(50,))
+    assert len(clima) == 12*24 and clima["P50"]["M-TEMP"].isna().all()
+
+def test_completitud_minima_excluye_clases():
+    df = _datos()
+    df.iloc[:24*30, 0] = np.nan
+    clima = climatologia(df, ["C-O3", "M-TEMP"], por=("HORA",), completitud_minima=0.75)
+    # C-O3 tiene la mitad de los datos en cada hora, todas sus clases quedan excluidas.
+    assert (clima["conteo"]["C-O3"] == 0).all() and clima["promedio"]["C-O3"].isna().all()
+    assert (clima["conteo"]["M-TEMP"] == 60).all()
+    np.testing.assert_allclose(clima["completitud"]["C-O3"].to_numpy(), 0.5)
@@ -0,0 +1,17 @@
+import numpy as np
+import pandas as pd
+from Script.python import dependencia
+
+def test_resultados_en_memoria_acotados(monkeypatch):
+    monkeypatch.setattr(dependencia, "MAXIMO_RESULTADOS", 4)
+    dependencia.limpiar_resultados()
+    rng = np.random.default_rng(0)
+    df  = pd.DataFrame(rng.normal(size=(200, 4)), columns=list("abcd"))
+    matrices = dependencia.matriz_dependencia(df, metricas=("pearson",), procesos=1)
+    # 10 pares (con la diagonal), en memoria quedan solo los 4 últimos.
+    assert len(dependencia._RESULTADOS) == 4
+    np.testing.assert_allclose(matrices["pearson"].to_numpy(), df.corr().to_numpy(), atol=1e-12)
+    # Los pares descartados se calculan de nuevo y entregan lo mismo.
+    pd.testing.assert_frame_equal(dependencia.matriz_dependencia(df, metricas=("pearson",), procesos=1)["pearson"], matrices["pearson"])
+    dependencia.limpiar_resultados()
+    assert len(dependencia._RESULTADOS) == 0
@@ -0,0 +1,17 @@
+import numpy as np
+import pandas as pd
+from Script.python.eje_tiempo import eje_tiempo
+from Script.python.climatologia import codigos_calendario
+
+def test_campos_guardados_en_el_eje_entregado():
+    fechas = pd.date_range("2019-01-01 01:00", periods=24*40, freq="h").delete([5, 6, 300])
+    eje = eje_tiempo(fechas)
+    codigos, forma = codigos_calendario(eje, ("MES", "HORA"))
+    assert forma == (12, 24)
+    np.testing.assert_array_equal(codigos, (fechas.month - 1)*24 + fechas.hour)
+    # El mismo eje entrega los mismos arreglos, sin recalcular.
+    assert codigos_calendario(eje, ("MES", "HORA"))[0] is codigos
+    assert eje.campo("HORA") is eje.campo("HORA")
+    # Con las fechas se crea un eje nuevo en cada llamada, no queda ningún registro global.
+    assert eje_tiempo(fechas) is not eje_tiempo(fechas)
+    np.testing.assert_array_equal(codigos_calendario(fechas, ("MES", "HORA"))[0], codigos)
@@ -0,0 +1,44 @@
+import warnings
+import numpy as np
+import pandas as pd
+from Script.python.histograma_cuantiles import HistogramaCuantiles
+
+def _datos_horarios(n=24*400, semilla=0):
+    # Dos series horarias dentro de [0, 100], con un ciclo diario para que cada hora tenga otra distribución.
+    rng    = np.random.default_rng(semilla)
+    fechas = pd.date_range("2018-01-01", periods=n, freq="h")
+    ciclo  = 20*np.sin(2*np.pi*fechas.hour.to_numpy()/24)
+    df = pd.DataFrame({
+        "M-TEMP": np.clip(50 + ciclo + rng.normal(0, 12, n), 0, 100),
+        "C-MP10": np.clip(rng.gamma(2.0, 8.0, n) + ciclo + 20, 0, 100),
+        }, index=fechas)
+    df.iloc[rng.integers(0, n, n//20), 0] = np.nan
+    return df
+
+def test_percentiles_dentro_del_ancho_de_intervalo():
+    df = _datos_horarios()
+    h  = HistogramaCuantiles(["M-TEMP", "C-MP10"], minimo=0, maximo=100, nbins=500).actualizar(df)
+    for serie, ancho in zip(h.series, h.ancho):
+        estimado = h.percentiles(serie, percentiles=(5, 50, 95))
+        for hora, grupo in df[serie].groupby(df.index.hour):
+            valores = grupo.dropna().to_numpy()
+            for p in (5, 50, 95):
+                exacto = np.percentile(valores, p)
+                assert abs(estimado.loc[hora, "P{:02d}".format(p)] - exacto) <= ancho, (serie, hora, p)
+
+def test_combinar_igual_que_actualizar_todo():
+    df = _datos_horarios()
+    mitad = len(df)//2
+    a = HistogramaCuantiles(["M-TEMP"], 0, 100, 200).actualizar(df.iloc[:mitad])
+    b = HistogramaCuantiles(["M-TEMP"], 0, 100, 200).actualizar(df.iloc[mitad:])
+    todo = HistogramaCuantiles(["M-TEMP"], 0, 100, 200).actualizar(df)
+    pd.testing.assert_frame_equal(a.combinar(b).percentiles("M-TEMP"), todo.percentiles("M-TEMP"))
+
+def test_clases_sin_datos_sin_advertencias():
+    df = _datos_horarios(n=5)
+    h  = HistogramaCuantiles(["M-TEMP"], 0, 100, 100).actualizar(df)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        tabla = h.percentiles("M-TEMP", percentiles=(5, 50, 95))
+    assert tabla.loc[5:].isna().all().all()
+    assert tabla.loc[:4].notna().all().all()
@@ -0,0 +1,23 @@
+import os
+import sys
+import json
+import subprocess
+from Script.python.benchmark import importacion_nucleo, MODULOS_NUCLEO, BIBLIOTECAS_PESADAS
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_nucleo_sin_bibliotecas_pesadas():
+    # importacion_nucleo importa los módulos en un proceso nuevo, sin lo que ya cargó pytest.
+    _, cargadas = importacion_nucleo()
+    assert cargadas == []
+
+def test_cada_modulo_del_nucleo_por_separado():
+    for modulo in MODULOS_NUCLEO:
+        _, cargadas = importacion_nucleo((modulo,))
+        assert cargadas == [], (modulo, cargadas)
+
+def test_importar_paquete_no_carga_graficos():
+    codigo = ("import sys, json\nimport Script.python\n"
+              "print(json.dumps(sorted({m.split('.')[0] for m in sys.modules} & set("+repr(list(BIBLIOTECAS_PESADAS))+"))))")
+    salida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True)
+    assert json.loads(salida.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,47 @@
+import os
+import sys
+import subprocess
+import tracemalloc
+import pandas as pd
+from Script.python import instrumentacion
+from Script.python.instrumentacion import activar, desactivar, registro, etapa
+from Script.python.reporte import main
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_desactivar_mantiene_tracemalloc_iniciado_antes():
+    tracemalloc.start()
+    try:
+        activar(memoria=True)
+        desactivar()
+        assert tracemalloc.is_tracing()
+        with registro(memoria=True):
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    # Iniciado por el registro: se detiene al desactivarlo.
+    activar(memoria=True)
+    assert tracemalloc.is_tracing()
+    desactivar()
+    assert tracemalloc.is_tracing() == False
+
+def test_variable_de_entorno_exporta_al_salir(tmp_path):
+    path = str(tmp_path/"etapas_{pid}.csv")
+    codigo = "from Script.python.instrumentacion import etapa\nwith etapa('prueba'):\n    pass\n"
+    entorno = dict(os.environ, **{instrumentacion.VARIABLE_ENTORNO: "1", instrumentacion.ARCHIVO_ENTORNO: path})
+    subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, env=entorno, check=True)
+    archivos = list(tmp_path.glob("etapas_*.csv"))
+    assert len(archivos) == 1
+    assert pd.read_csv(archivos[0])["nombre"].tolist() == ["prueba"]
+
+def test_reporte_con_memoria(tmp_path):
+    manifiesto = tmp_path/"manifiesto.json"
+    manifiesto.write_text(
+        '{"data_folder": "'+os.path.join(RAIZ, "Data", "P001_calidad aire").replace("\\", "/")+'", "estaciones": ["id244"], '
+        '"graficos": [{"tipo": "rosa_vientos", "var_vientos": "M-VEL", "var_direccion": "M-DIR", "nrosa": 16}]}', encoding="utf-8")
+    path = str(tmp_path/"etapas.csv")
+    main([str(manifiesto), "-p", "1", "-o", str(tmp_path/"salida"), "--sin-cache", "-i", path, "-m"])
+    etapas = pd.read_csv(path)
+    assert etapas.loc[etapas["nombre"] == "rosa_vientos", "memoria_mb"].notna().all()
+    assert tracemalloc.is_tracing() == False
@@ -0,0 +1,89 @@
+import os
+from glob import glob
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+import pytest
+import matplotlib.image as mimage
+import matplotlib.dates as mdates
+from Script.python.lectura_archivos import lectura_todoscsv
+from Script.python.estaciones import ALIAS_VARIABLES
+from Script.python.renderizador import Renderizador
+from Script.python.cache_salidas import salidas_trabajo
+from Script.python.series_de_tiempo import series_de_tiempo
+from Script.python.ciclo_diario import ciclo_diario
+from Script.python.ciclo_diario_direccion import ciclo_diario_direccion
+from Script.python.ciclo_estacional import ciclo_estacional
+from Script.python.ciclo_estacional_viento import ciclo_estacional_viento
+from Script.python.rosa_viento import rosa_vientos
+
+RAIZ     = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATOS    = os.path.join(RAIZ, "Data", "P001_calidad aire")
+IMAGENES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "imagenes")
+
+# Las imágenes de referencia se crean con el código de gráficos original del repositorio (python -m tests.referencias_base),
+# no con el código actual. Las únicas diferencias permitidas son las intencionales de user-008 en ciclo_diario_direccion,
+# que se aplican a los datos del código original (ver tests/referencias_base.py):
+#   - el sector de 360° se une al de 0° (24 filas de 0° a 345° en lugar de 25 filas de 0° a 360°),
+#   - las celdas hora x sector sin datos se muestran con 0% en lugar de quedar en blanco (id244 no tiene celdas vacías).
+# Fuera de eso, las figuras nuevas y reutilizadas deben ser iguales píxel a píxel a las del código original.
+
+ESTACION = "Estación Test"
+
+# Gráfico, parámetros del gráfico comparado y parámetros de un gráfico previo distinto, que deja la figura del
+# renderizador con otros datos y textos antes de reutilizarla.
+CASOS = {
+    "series_de_tiempo": (series_de_tiempo,
+        {"variable": "M-TEMP", "xlabel": "Tiempo [años]", "ylabel": "Temperatura ambiente (°C)", "ylim": {"bottom": -5, "top": 40}},
+        {"variable": "M-HR", "xlabel": "Tiempo [años]", "ylabel": "Humedad relativa del aire (%)", "ylim": {"bottom": 0, "top": 100}}),
+    "ciclo_diario": (ciclo_diario,
+        {"variable": "M-TEMP", "xlabel": "Hora Local [horas]", "ylabel": "Temperatura ambiente (°C)", "ylim": {"bottom": -5, "top": 40}},
+        {"variable": "M-HR", "xlabel": "Hora Local [horas]", "ylabel": "Humedad relativa del aire (%)", "ylim": {"bottom": 0, "top": 100}}),
+    "ciclo_diario_direccion": (ciclo_diario_direccion,
+        {"variable": "M-DIR", "vmin": 0, "vmax": 30},
+        {"variable": "M-DIR", "vmin": 0, "vmax": 30, "nombre_estacion": "Estación Previa"}),
+    "ciclo_estacional": (ciclo_estacional,
+        {"variable": "M-TEMP", "vmin": 0, "vmax": 30, "step": 1.0, "clabel": "Temperatura ambiente", "unidad": "(°C)"},
+        {"variable": "M-HR", "vmin": 0, "vmax": 30, "step": 1.0, "clabel": "Humedad relativa del aire", "unidad": "(%)"}),
+    "ciclo_estacional_viento": (ciclo_estacional_viento,
+        {"velocidad": "M-VEL", "direccion": "M-DIR", "vmin": 0, "vmax": 3, "step": 0.05},
+        {"velocidad": "M-VEL", "direccion": "M-DIR", "vmin": 0, "vmax": 3, "step": 0.05, "nombre_estacion": "Estación Previa"}),
+    "rosa_vientos": (rosa_vientos,
+        {"var_vientos": "M-VEL", "var_direccion": "M-DIR", "nrosa": 16},
+        {"var_vientos": "M-VEL", "var_direccion": "M-DIR", "nrosa": 16, "nombre_estacion": "Estación Previa"}),
+    }
+
+@pytest.fixture(scope="module")
+def datos():
+    return lectura_todoscsv(sorted(glob(os.path.join(DATOS, "id244_*.csv")))).rename(columns=ALIAS_VARIABLES)
+
+def _graficar(grafico, df, parametros, carpeta, renderizador):
+    for subcarpeta in ("Plot", "Data"):
+        os.makedirs(os.path.join(carpeta, subcarpeta), exist_ok=True)
+    parametros = dict(parametros)
+    nombre     = parametros.pop("nombre_estacion", ESTACION)
+    if grafico is series_de_tiempo:
+        parametros["major_locator"]   = {"locator": mdates.YearLocator()}
+        parametros["major_formatter"] = {"formatter": mdates.DateFormatter('%Y')}
+    grafico(df=df, nombre_estacion=nombre, output_folder=carpeta, renderizador=renderizador, **parametros)
+
+@pytest.mark.parametrize("tipo", list(CASOS))
+def test_figura_reutilizada_igual_a_referencia(tipo, datos, tmp_path):
+    grafico, parametros, previo = CASOS[tipo]
+    png = [s for s in salidas_trabajo(tipo, parametros, ESTACION) if s.endswith(".png")][0]
+
+    # Figura nueva (plt.subplots en cada llamada) y figura reutilizada después de otro gráfico del mismo tipo.
+    _graficar(grafico, datos, parametros, str(tmp_path/"nueva"), None)
+    with Renderizador() as renderizador:
+        _graficar(grafico, datos.iloc[:len(datos)//2], previo, str(tmp_path/"previa"), renderizador)
+        _graficar(grafico, datos, parametros, str(tmp_path/"reutilizada"), renderizador)
+
+    referencia = os.path.join(IMAGENES, os.path.basename(png))
+    if os.path.exists(referencia) == False:
+        pytest.fail("Falta la imagen de referencia "+referencia+", se crea con python -m tests.referencias_base.")
+    esperada = mimage.imread(referencia)
+    for modo in ("nueva", "reutilizada"):
+        imagen = mimage.imread(str(tmp_path/modo/png))
+        assert imagen.shape == esperada.shape, (modo, imagen.shape, esperada.shape)
+        distintos = int((imagen != esperada).any(axis=-1).sum())
+        assert distintos == 0, "{}: {} píxeles distintos de la referencia ({})".format(modo, distintos, tipo)
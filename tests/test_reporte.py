@@ -0,0 +1,35 @@
+import os
+import multiprocessing
+import pytest
+from Script.python import reporte as modulo_reporte
+from Script.python.cache_salidas import leer_manifiesto
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MANIFIESTO = {
+    "data_folder": os.path.join(RAIZ, "Data", "P001_calidad aire"),
+    "estaciones": ["id244"],
+    "graficos": [
+        {"tipo": "ciclo_diario", "xlabel": "Hora Local [horas]",
+         "variables": {"M-TEMP": {"ylabel": "Temperatura ambiente (°C)", "ylim": {"bottom": -5, "top": 40}}}},
+        {"tipo": "rosa_vientos", "var_vientos": "M-VEL", "var_direccion": "M-DIR", "nrosa": 16}]}
+
+def _proceso_caido(*argumentos):
+    raise MemoryError("proceso terminado")
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="el reemplazo del trabajo requiere procesos con fork")
+def test_proceso_caido_no_elimina_salidas(tmp_path, monkeypatch):
+    carpeta = str(tmp_path)
+    modulo_reporte.reporte(MANIFIESTO, procesos=1, output_folder=carpeta, cache=False, verbose=False)
+    anteriores = leer_manifiesto(carpeta)
+    salidas = [salida for entrada in anteriores.values() for salida in entrada["salidas"]]
+    assert len(anteriores) == 2 and all(os.path.exists(os.path.join(carpeta, s)) for s in salidas)
+
+    # Los procesos del pool (fork) heredan el reemplazo y terminan sin entregar resultados.
+    monkeypatch.setattr(modulo_reporte, "_ejecutar_grupo_medido", _proceso_caido)
+    resumen = modulo_reporte.reporte(MANIFIESTO, procesos=2, output_folder=carpeta, cache=False, verbose=False)
+    assert (resumen["estado"] == "error").all()
+    assert all(os.path.exists(os.path.join(carpeta, s)) for s in salidas)
+    # Las entradas quedan sin huella, el próximo reporte las vuelve a generar.
+    actuales = leer_manifiesto(carpeta)
+    assert set(actuales) == set(anteriores) and all(entrada["huella"] is None for entrada in actuales.values())